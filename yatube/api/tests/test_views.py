@@ -0,0 +1,140 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve, reverse
+
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class ApiTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(
+            username='author', first_name='Лев', last_name='Толстой'
+        )
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Коты', slug='cats', description='Про котов'
+        )
+        cls.posts = [
+            Post.objects.create(
+                text=f'Пост {number}', author=cls.author, group=cls.group
+            )
+            for number in range(3)
+        ]
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def test_index_cursor_pages(self):
+        """Лента листается курсором, записи новые сверху"""
+        url = reverse('api:index')
+        first = self.client.get(url, {'limit': 2}).json()
+        self.assertEqual(
+            [post['id'] for post in first['results']],
+            [self.posts[2].pk, self.posts[1].pk]
+        )
+        self.assertIsNone(first['previous'])
+        second = self.client.get(
+            url, {'limit': 2, 'cursor': first['next']}
+        ).json()
+        self.assertEqual(
+            [post['id'] for post in second['results']], [self.posts[0].pk]
+        )
+        self.assertIsNone(second['next'])
+        self.assertEqual(second['results'][0]['author'], 'author')
+        self.assertEqual(second['results'][0]['group'], 'cats')
+
+    def test_sparse_fields(self):
+        """?fields= оставляет только перечисленные поля"""
+        response = self.client.get(reverse('api:index'), {'fields': 'id,text'})
+        self.assertEqual(
+            set(response.json()['results'][0]), {'id', 'text'}
+        )
+        error = self.client.get(reverse('api:index'), {'fields': 'password'})
+        self.assertEqual(error.status_code, 400)
+        self.assertIn('password', error.json()['error'])
+
+    def test_not_modified(self):
+        """Повтор с ETag отдаёт 304 без запросов к БД, запись сдвигает ETag"""
+        url = reverse('api:index')
+        response = self.client.get(url)
+        etag = response['ETag']
+        self.assertTrue(response.has_header('Last-Modified'))
+        with self.assertNumQueries(0):
+            cached = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(cached.content, b'')
+        Post.objects.create(text='Новый', author=self.author)
+        fresh = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(fresh.status_code, 200)
+        self.assertEqual(len(fresh.json()['results']), 4)
+
+    def test_if_modified_since(self):
+        url = reverse('api:group_list', args=['cats'])
+        response = self.client.get(url)
+        cached = self.client.get(
+            url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+        )
+        self.assertEqual(cached.status_code, 304)
+
+    def test_group_and_profile(self):
+        group = self.client.get(reverse('api:group_list', args=['cats']))
+        self.assertEqual(group.json()['group']['title'], 'Коты')
+        self.assertEqual(len(group.json()['results']), 3)
+        profile = self.client.get(reverse('api:profile', args=['author']))
+        self.assertEqual(profile.json()['author']['full_name'], 'Лев Толстой')
+        missing = self.client.get(reverse('api:profile', args=['nobody']))
+        self.assertEqual(missing.status_code, 404)
+
+    def test_single_lookup(self):
+        """Группа и автор читаются один раз на проверку ETag и ответ"""
+        for url, lookup in (
+            (reverse('api:group_list', args=['cats']), 'FROM "posts_group"'),
+            (reverse('api:profile', args=['author']), 'FROM "auth_user"'),
+        ):
+            with self.subTest(url=url):
+                with CaptureQueriesContext(connection) as queries:
+                    self.client.get(url)
+                self.assertEqual(sum(
+                    lookup in query['sql'] and 'JOIN' not in query['sql']
+                    for query in queries
+                ), 1)
+
+    def test_view_names(self):
+        """Декораторы сохраняют имена view для метрик"""
+        self.assertEqual(resolve(reverse('api:index')).func.__name__, 'index')
+        self.assertEqual(
+            resolve(reverse('api:follow_index')).func.__name__,
+            'follow_index'
+        )
+
+    def test_post_detail_comments(self):
+        """Новый комментарий меняет ETag поста"""
+        post = self.posts[0]
+        url = reverse('api:post_detail', args=[post.pk])
+        response = self.client.get(url)
+        self.assertEqual(response.json()['post']['text'], 'Пост 0')
+        self.assertEqual(response.json()['comments']['results'], [])
+        Comment.objects.create(post=post, author=self.reader, text='Мяу')
+        fresh = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(fresh.status_code, 200)
+        self.assertEqual(
+            fresh.json()['comments']['results'][0]['text'], 'Мяу'
+        )
+
+    def test_follow_index(self):
+        url = reverse('api:follow_index')
+        self.assertEqual(self.client.get(url).status_code, 401)
+        self.client.force_login(self.reader)
+        response = self.client.get(url)
+        self.assertEqual(len(response.json()['results']), 3)
+        self.assertIn('Cookie', response['Vary'])
+        self.assertEqual(self.client.post(url).status_code, 405)
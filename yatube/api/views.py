@@ -0,0 +1,212 @@
+"""
+JSON-версия лент posts только для чтения.
+
+Ответы повторяют index, group_posts, profile, post_detail и
+follow_index: записи листаются курсором (?cursor=, ссылки next и
+previous), ?fields= оставляет в записях только перечисленные поля, а
+?limit= меняет размер страницы. ETag и Last-Modified считаются по
+версиям лент из posts.versions, поэтому неизменившаяся страница
+отдаётся ответом 304 до запросов за постами и их сериализации.
+"""
+from functools import wraps
+
+from django.conf import settings
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
+from django.views.decorators.http import require_safe
+
+from posts import versions
+from posts.feed import follow_feed, pulled_authors
+from posts.models import Group, Post, User
+from posts.utils import CursorPaginator
+
+# Поле ответа: колонки для only() и способ достать значение.
+POST_FIELDS = {
+    'id': ((), lambda post: post.pk),
+    'text': (('text',), lambda post: post.text),
+    'pub_date': (('pub_date',), lambda post: post.pub_date),
+    'author': (
+        ('author', 'author__username'), lambda post: post.author.username
+    ),
+    'group': (
+        ('group', 'group__slug'),
+        lambda post: post.group.slug if post.group_id else None
+    ),
+    'image': (
+        ('image',), lambda post: post.image.url if post.image else None
+    ),
+    'thumbnail': (('thumbnail',), lambda post: post.thumbnail or None),
+}
+
+
+class ApiError(Exception):
+    status = 400
+
+
+def api_response(data, status=200):
+    return JsonResponse(data, status=status, json_dumps_params={
+        'ensure_ascii': False, 'separators': (',', ':')
+    })
+
+
+def api_view(view):
+    """Только GET/HEAD; ApiError превращается в JSON с описанием."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        try:
+            return view(request, *args, **kwargs)
+        except ApiError as error:
+            return api_response({'error': str(error)}, error.status)
+    return require_safe(wrapper)
+
+
+def requested_fields(request):
+    raw = request.GET.get('fields')
+    if not raw:
+        return list(POST_FIELDS)
+    names = [name.strip() for name in raw.split(',') if name.strip()]
+    unknown = [name for name in names if name not in POST_FIELDS]
+    if unknown or not names:
+        raise ApiError(
+            f'Неизвестные поля: {", ".join(unknown)}. '
+            f'Доступны: {", ".join(POST_FIELDS)}'
+        )
+    return names
+
+
+def page_size(request, default):
+    try:
+        size = int(request.GET.get('limit', default))
+    except ValueError:
+        raise ApiError('limit должен быть числом')
+    return max(1, min(size, settings.API_MAX_LIMIT))
+
+
+def page(request, queryset, per_page, key, serialize):
+    paginator = CursorPaginator(queryset, per_page, key=key)
+    page_obj = paginator.page(request.GET.get('cursor'))
+    return {
+        'results': [serialize(row) for row in page_obj],
+        'next': paginator.next_cursor,
+        'previous': paginator.previous_cursor,
+    }
+
+
+def posts_page(request, posts, key='pub_date'):
+    names = requested_fields(request)
+    columns = set()
+    if key not in posts.query.annotations:
+        columns.add(key)
+    for name in names:
+        columns.update(POST_FIELDS[name][0])
+    related = [name for name in ('author', 'group') if name in columns]
+    posts = posts.select_related(*related).only(*columns)
+    return page(
+        request, posts, page_size(request, settings.VIEWABLE_POSTS), key,
+        lambda post: {name: POST_FIELDS[name][1](post) for name in names}
+    )
+
+
+def _lookup(request, name, load):
+    """Объект ответа, общий для проверки ETag и самого view."""
+    cached = f'_api_{name}'
+    if not hasattr(request, cached):
+        setattr(request, cached, load())
+    return getattr(request, cached)
+
+
+def _group(request, slug):
+    return _lookup(request, 'group', lambda: get_object_or_404(
+        Group, slug=slug
+    ))
+
+
+def _author(request, username):
+    return _lookup(request, 'author', lambda: get_object_or_404(
+        User, username=username
+    ))
+
+
+def _group_scopes(request, slug):
+    return [versions.group(_group(request, slug).pk)]
+
+
+def _author_scopes(request, username):
+    return [versions.author(_author(request, username).pk)]
+
+
+def _follow_scopes(request):
+    user = request.user
+    if not user.is_authenticated:
+        return None
+    scopes = [versions.follower(user.pk)]
+    return scopes + [versions.author(pk) for pk in pulled_authors(user)]
+
+
+@api_view
+@versions.conditional(lambda request: [versions.GLOBAL])
+def index(request):
+    return api_response(posts_page(request, Post.objects.all()))
+
+
+@api_view
+@versions.conditional(_group_scopes)
+def group_posts(request, slug):
+    group = _group(request, slug)
+    data = posts_page(request, group.posts.all())
+    data['group'] = {
+        'slug': group.slug,
+        'title': group.title,
+        'description': group.description,
+    }
+    return api_response(data)
+
+
+@api_view
+@versions.conditional(_author_scopes)
+def profile(request, username):
+    author = _author(request, username)
+    data = posts_page(request, author.posts.all())
+    data['author'] = {
+        'username': author.username,
+        'full_name': author.get_full_name(),
+    }
+    return api_response(data)
+
+
+@api_view
+@versions.conditional(
+    lambda request, post_id: [versions.post(post_id)]
+)
+def post_detail(request, post_id):
+    names = requested_fields(request)
+    post = get_object_or_404(
+        Post.objects.select_related('author', 'group'), pk=post_id
+    )
+    comments = post.comments.select_related('author').only(
+        'text', 'created', 'post', 'author', 'author__username'
+    )
+    return api_response({
+        'post': {name: POST_FIELDS[name][1](post) for name in names},
+        'comments': page(
+            request, comments,
+            page_size(request, settings.VIEWABLE_COMMENTS), 'created',
+            lambda comment: {
+                'id': comment.pk,
+                'author': comment.author.username,
+                'text': comment.text,
+                'created': comment.created,
+            }
+        ),
+    })
+
+
+@api_view
+@versions.conditional(_follow_scopes)
+def follow_index(request):
+    user = request.user
+    if not user.is_authenticated:
+        return api_response({'error': 'Нужна авторизация'}, 401)
+    return api_response(
+        posts_page(request, follow_feed(user), key='feed_date')
+    )
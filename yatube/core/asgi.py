@@ -0,0 +1,171 @@
+"""
+ASGI-приложение поверх WSGI-обработчика Django.
+
+Django 2.2 не умеет ни ASGI, ни асинхронных view, поэтому сам запрос
+по-прежнему обрабатывается синхронно, но в пуле из ASGI_THREADS
+потоков. Цикл событий сервера принимает соединения и дочитывает тело
+запроса сам: медленный клиент держит корутину, а не поток, и потоки
+заняты только работой Django. Ответ собирается в потоке целиком и
+отдаётся клиенту уже из цикла. Тело больше max_body() не дочитывается:
+клиент сразу получает 413, а временный диск не забивается.
+"""
+import asyncio
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from tempfile import SpooledTemporaryFile
+
+from django.conf import settings
+
+
+class BodyTooLarge(Exception):
+    pass
+
+
+class AsgiHandler:
+    """ASGI 3 приложение: lifespan и http."""
+
+    def __init__(self, wsgi_application, threads=None):
+        self.wsgi_application = wsgi_application
+        self.executor = ThreadPoolExecutor(
+            max_workers=threads or settings.ASGI_THREADS,
+            thread_name_prefix='asgi',
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self.lifespan(receive, send)
+        if scope['type'] != 'http':
+            raise ValueError(f'Тип соединения не поддерживается: '
+                             f'{scope["type"]}')
+        try:
+            body = await self.read_body(scope, receive)
+        except BodyTooLarge:
+            await send({
+                'type': 'http.response.start',
+                'status': 413,
+                'headers': [(b'content-type', b'text/plain; charset=utf-8')],
+            })
+            await send({
+                'type': 'http.response.body',
+                'body': b'Request Entity Too Large',
+            })
+            return
+        if body is None:
+            return
+        loop = asyncio.get_running_loop()
+        try:
+            status, headers, content = await loop.run_in_executor(
+                self.executor, self.run, scope, body
+            )
+        finally:
+            body.close()
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': headers,
+        })
+        await send({'type': 'http.response.body', 'body': content})
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.executor.shutdown(wait=True)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    def max_body(self):
+        """Самое большое тело: картинка поста и остальные поля формы."""
+        return settings.POST_IMAGE_MAX_BYTES + (
+            settings.DATA_UPLOAD_MAX_MEMORY_SIZE or 0
+        )
+
+    async def read_body(self, scope, receive):
+        """
+        Тело запроса; большое уходит во временный файл. None, если
+        клиент отключился, не дослав его. BodyTooLarge, если тело
+        больше max_body().
+        """
+        limit = self.max_body()
+        for name, value in scope.get('headers', []):
+            if name.lower() == b'content-length' and value.isdigit() and (
+                    int(value) > limit):
+                raise BodyTooLarge
+        body = SpooledTemporaryFile(
+            max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE
+        )
+        size = 0
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                body.close()
+                return None
+            chunk = message.get('body', b'')
+            size += len(chunk)
+            if size > limit:
+                body.close()
+                raise BodyTooLarge
+            body.write(chunk)
+            if not message.get('more_body', False):
+                body.seek(0)
+                return body
+
+    def environ(self, scope, body):
+        # WSGI передаёт путь байтами в latin-1, как он пришёл по сети.
+        path = scope['path'].encode('utf-8').decode('latin-1')
+        root = scope.get('root_path', '').encode('utf-8').decode('latin-1')
+        if path.startswith(root):
+            path = path[len(root):]
+        server = scope.get('server') or ('localhost', 80)
+        client = scope.get('client') or ('', 0)
+        environ = {
+            'REQUEST_METHOD': scope['method'],
+            'SCRIPT_NAME': root,
+            'PATH_INFO': path,
+            'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+            'SERVER_NAME': server[0],
+            'SERVER_PORT': str(server[1] or 80),
+            'SERVER_PROTOCOL': f'HTTP/{scope.get("http_version", "1.1")}',
+            'REMOTE_ADDR': client[0],
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': scope.get('scheme', 'http'),
+            'wsgi.input': body,
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': True,
+            'wsgi.run_once': False,
+        }
+        for raw_name, raw_value in scope.get('headers', []):
+            name = raw_name.decode('latin-1').upper().replace('-', '_')
+            value = raw_value.decode('latin-1')
+            if name not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+                name = f'HTTP_{name}'
+            if name in environ:
+                separator = '; ' if name == 'HTTP_COOKIE' else ','
+                value = f'{environ[name]}{separator}{value}'
+            environ[name] = value
+        return environ
+
+    def run(self, scope, body):
+        """Обрабатывает запрос в потоке пула: (статус, заголовки, тело)."""
+        started = {}
+
+        def start_response(status, headers, exc_info=None):
+            started['status'] = int(status.split(' ', 1)[0])
+            started['headers'] = [
+                (name.lower().encode('latin-1'), value.encode('latin-1'))
+                for name, value in headers
+            ]
+
+        result = self.wsgi_application(
+            self.environ(scope, body), start_response
+        )
+        try:
+            content = b''.join(result)
+        finally:
+            # close() шлёт request_finished: Django закрывает соединения.
+            if hasattr(result, 'close'):
+                result.close()
+        return started['status'], started['headers'], content
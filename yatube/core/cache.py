@@ -0,0 +1,73 @@
+from django.core.cache.backends.base import BaseCache
+from django.utils.module_loading import import_string
+
+from . import metrics
+
+MISSING = object()
+
+
+class InstrumentedCache(BaseCache):
+    """
+    Обёртка над бэкендом из WRAPPED_BACKEND: считает попадания и
+    промахи чтений в метриках текущего запроса, остальное передаёт как
+    есть. Ключи строит обёрнутый бэкенд.
+    """
+
+    def __init__(self, location, params):
+        params = dict(params)
+        backend = import_string(params.pop('WRAPPED_BACKEND'))
+        self.wrapped = backend(location, params)
+        super().__init__(params)
+
+    def _count(self, hits, misses):
+        collected = metrics.current()
+        if collected is not None:
+            collected.cache_hits += hits
+            collected.cache_misses += misses
+
+    def get(self, key, default=None, version=None):
+        value = self.wrapped.get(key, MISSING, version=version)
+        if value is MISSING:
+            self._count(0, 1)
+            return default
+        self._count(1, 0)
+        return value
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        found = self.wrapped.get_many(keys, version=version)
+        self._count(len(found), len(keys) - len(found))
+        return found
+
+    def has_key(self, key, version=None):
+        return self.wrapped.has_key(key, version=version)
+
+    def add(self, key, value, timeout=None, version=None):
+        return self.wrapped.add(key, value, timeout, version=version)
+
+    def set(self, key, value, timeout=None, version=None):
+        return self.wrapped.set(key, value, timeout, version=version)
+
+    def set_many(self, data, timeout=None, version=None):
+        return self.wrapped.set_many(data, timeout, version=version)
+
+    def touch(self, key, timeout=None, version=None):
+        return self.wrapped.touch(key, timeout, version=version)
+
+    def delete(self, key, version=None):
+        return self.wrapped.delete(key, version=version)
+
+    def delete_many(self, keys, version=None):
+        return self.wrapped.delete_many(keys, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        return self.wrapped.incr(key, delta, version=version)
+
+    def decr(self, key, delta=1, version=None):
+        return self.wrapped.decr(key, delta, version=version)
+
+    def clear(self):
+        return self.wrapped.clear()
+
+    def close(self, **kwargs):
+        return self.wrapped.close(**kwargs)
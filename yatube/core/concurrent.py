@@ -0,0 +1,66 @@
+"""
+Независимые запросы к БД одного view — параллельно.
+
+Django 2.2 синхронный, поэтому «асинхронный» view здесь — обычный view,
+который раздаёт независимые выборки в пул из DB_LOOKUP_THREADS
+потоков: у каждого потока своё соединение, так что запросы идут к БД
+одновременно, а view ждёт самый долгий, а не их сумму. Внутри
+транзакции выборки идут по очереди в текущем потоке: другие
+соединения не видят её незафиксированных записей.
+
+Обёртки execute_wrapper вызывающего потока ставятся и на соединение
+потока пула, поэтому счётчики запросов (метрики, benchmark_views)
+видят и параллельные выборки.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from contextvars import copy_context
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+
+from . import metrics
+
+_executor = None
+
+
+def _pool():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.DB_LOOKUP_THREADS,
+            thread_name_prefix='db-lookup',
+        )
+    return _executor
+
+
+def _run(call, wrappers):
+    """Выборка в потоке пула под обёртками вызывающего и метриками."""
+    collected = metrics.current()
+    if collected is not None and collected not in wrappers:
+        wrappers = [*wrappers, collected]
+    try:
+        # Соединение открывается до обёрток: connection_created ставит
+        # свои обёртки сам, их не нужно дублировать.
+        connection.ensure_connection()
+        with ExitStack() as stack:
+            for wrapper in wrappers:
+                if wrapper not in connection.execute_wrappers:
+                    stack.enter_context(connection.execute_wrapper(wrapper))
+            return call()
+    finally:
+        close_old_connections()
+
+
+def gather(*calls):
+    """Результаты calls в том же порядке; первый выполняется на месте."""
+    if (len(calls) < 2 or not settings.DB_LOOKUP_THREADS
+            or connection.in_atomic_block):
+        return [call() for call in calls]
+    pool = _pool()
+    wrappers = list(connection.execute_wrappers)
+    futures = [
+        pool.submit(copy_context().run, _run, call, wrappers)
+        for call in calls[1:]
+    ]
+    return [calls[0]()] + [future.result() for future in futures]
@@ -0,0 +1,72 @@
+"""
+Личные фрагменты страниц («дырки»).
+
+Фрагмент, зависящий от пользователя, в шаблоне выводится тегом
+{% hole 'имя' параметр=значение %}. Обычно тег сразу рисует шаблон
+фрагмента. Если view рисует общую для всех страницу (within_holes),
+вместо фрагмента остаётся метка-комментарий с именем и параметрами:
+такую страницу можно хранить в кэше целиком, а fill() подставит в неё
+фрагменты для конкретного запроса. Фрагмент знает только свои
+параметры и запрос, поэтому в обоих режимах выглядит одинаково.
+"""
+import re
+from contextlib import contextmanager
+from urllib.parse import parse_qsl, urlencode
+
+from django.template.loader import render_to_string
+
+HOLE = re.compile(r'<!--hole:(\w+)\?([^>]*)-->')
+
+_registry = {}
+
+
+def register(name, template):
+    """Декоратор функции контекста фрагмента name."""
+    def decorator(context):
+        _registry[name] = (template, context)
+        return context
+    return decorator
+
+
+def placeholder(name, params):
+    return f'<!--hole:{name}?{urlencode(params)}-->'
+
+
+def render(request, name, params):
+    """Фрагмент для запроса; параметры приходят строками."""
+    template, context = _registry[name]
+    return render_to_string(
+        template, context(request, **params), request=request
+    )
+
+
+def punching(request):
+    return getattr(request, '_punch_holes', False)
+
+
+@contextmanager
+def within_holes(request):
+    """Пока открыт, теги hole оставляют метки вместо фрагментов."""
+    request._punch_holes = True
+    try:
+        yield
+    finally:
+        request._punch_holes = False
+
+
+def fill(request, page):
+    """Подставляет в страницу фрагменты для запроса."""
+    rendered = {}
+
+    def replace(match):
+        if match.group(0) not in rendered:
+            rendered[match.group(0)] = render(
+                request, match.group(1), dict(parse_qsl(match.group(2)))
+            )
+        return rendered[match.group(0)]
+    return HOLE.sub(replace, page)
+
+
+@register('header', 'includes/header.html')
+def header(request):
+    return {}
@@ -0,0 +1,69 @@
+import glob
+import json
+import statistics
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        'Сводка журнала медленных запросов по отпечаткам SQL: сколько раз, '
+        'суммарное и худшее время, view и последний снятый план.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--file', default=settings.SLOW_QUERY_LOG,
+            help='Журнал; ротированные копии file.1, file.2… читаются тоже.'
+        )
+        parser.add_argument(
+            '--limit', type=int, default=10,
+            help='Сколько отпечатков показать.'
+        )
+
+    def entries(self, path):
+        paths = sorted(glob.glob(f'{glob.escape(path)}.*'), reverse=True)
+        paths.append(path)
+        for name in paths:
+            try:
+                log = open(name, encoding='utf-8')
+            except FileNotFoundError:
+                continue
+            with log:
+                for line in log:
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        continue
+
+    def handle(self, *args, **options):
+        groups = defaultdict(list)
+        for entry in self.entries(options['file']):
+            groups[entry['fingerprint']].append(entry)
+        if not groups:
+            raise CommandError(f'Журнал {options["file"]} пуст.')
+        summary = sorted(
+            groups.values(),
+            key=lambda entries: sum(e['duration_ms'] for e in entries),
+            reverse=True,
+        )
+        for entries in summary[:options['limit']]:
+            durations = [entry['duration_ms'] for entry in entries]
+            views = sorted({entry['view'] or '-' for entry in entries})
+            plans = [entry['plan'] for entry in entries if entry['plan']]
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f'{entries[0]["fingerprint"]}: {len(entries)} раз, '
+                f'всего {sum(durations):.1f} мс, '
+                f'медиана {statistics.median(durations):.1f} мс, '
+                f'худший {max(durations):.1f} мс'
+            ))
+            self.stdout.write(f'  view: {", ".join(views)}')
+            self.stdout.write(f'  SQL: {entries[-1]["sql"]}')
+            for frame in entries[-1]['stack']:
+                self.stdout.write(f'    {frame}')
+            if plans:
+                self.stdout.write('  План:')
+                for line in plans[-1]:
+                    self.stdout.write(f'    {line}')
@@ -0,0 +1,158 @@
+"""
+Метрики запросов: сборщик текущего запроса и гистограммы процесса.
+
+PerformanceMiddleware заводит RequestMetrics на время запроса, а
+обёртка запросов к БД, шаблонный бэкенд и кэш-обёртка пишут в него
+через current(). По завершении запроса значения попадают в реестр
+REGISTRY, который отдаётся в текстовом формате Prometheus. Реестр
+свой у каждого процесса.
+"""
+import threading
+import time
+from collections import defaultdict
+from contextvars import ContextVar
+
+from django.conf import settings
+
+_current = ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    """Счётчики одного запроса."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.view = None
+        self.db_queries = 0
+        self.db_seconds = 0.0
+        self.template_seconds = 0.0
+        # Глубина вложенных render: время считает только внешний.
+        self.template_depth = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        """execute_wrapper соединения с БД."""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_seconds += time.perf_counter() - started
+            self.db_queries += 1
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def server_timing(self, total):
+        return ', '.join((
+            f'total;dur={total * 1000:.1f}',
+            f'db;dur={self.db_seconds * 1000:.1f};'
+            f'desc="{self.db_queries} queries"',
+            f'tpl;dur={self.template_seconds * 1000:.1f}',
+            f'cache;desc="hit={self.cache_hits} miss={self.cache_misses}"',
+        ))
+
+
+def start():
+    metrics = RequestMetrics()
+    return metrics, _current.set(metrics)
+
+
+def finish(token):
+    _current.reset(token)
+
+
+def current():
+    """Сборщик текущего запроса или None вне запроса."""
+    return _current.get()
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+        self.total += 1
+        self.sum += value
+
+
+HISTOGRAMS = {
+    'yatube_request_duration_seconds': 'Время ответа view.',
+    'yatube_db_duration_seconds': 'Время запросов к БД за ответ.',
+    'yatube_template_duration_seconds': 'Время рендеринга шаблонов.',
+}
+COUNTERS = {
+    'yatube_db_queries_total': 'Запросы к БД.',
+    'yatube_cache_hits_total': 'Попадания в кэш.',
+    'yatube_cache_misses_total': 'Промахи кэша.',
+}
+
+
+class Registry:
+    """Гистограммы и счётчики по имени view."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        buckets = tuple(settings.METRICS_BUCKETS)
+        self.histograms = {
+            name: defaultdict(lambda: Histogram(buckets))
+            for name in HISTOGRAMS
+        }
+        self.counters = {name: defaultdict(int) for name in COUNTERS}
+
+    def record(self, view, metrics, total):
+        observed = {
+            'yatube_request_duration_seconds': total,
+            'yatube_db_duration_seconds': metrics.db_seconds,
+            'yatube_template_duration_seconds': metrics.template_seconds,
+        }
+        counted = {
+            'yatube_db_queries_total': metrics.db_queries,
+            'yatube_cache_hits_total': metrics.cache_hits,
+            'yatube_cache_misses_total': metrics.cache_misses,
+        }
+        with self.lock:
+            for name, value in observed.items():
+                self.histograms[name][view].observe(value)
+            for name, value in counted.items():
+                self.counters[name][view] += value
+
+    def exposition(self):
+        """Текст в формате Prometheus 0.0.4."""
+        lines = []
+        with self.lock:
+            for name, help_text in HISTOGRAMS.items():
+                lines += [f'# HELP {name} {help_text}',
+                          f'# TYPE {name} histogram']
+                for view, histogram in sorted(self.histograms[name].items()):
+                    label = f'view="{view}"'
+                    for bound, count in zip(histogram.buckets,
+                                            histogram.counts):
+                        lines.append(
+                            f'{name}_bucket{{{label},le="{bound}"}} {count}'
+                        )
+                    lines += [
+                        f'{name}_bucket{{{label},le="+Inf"}} '
+                        f'{histogram.total}',
+                        f'{name}_sum{{{label}}} {histogram.sum}',
+                        f'{name}_count{{{label}}} {histogram.total}',
+                    ]
+            for name, help_text in COUNTERS.items():
+                lines += [f'# HELP {name} {help_text}',
+                          f'# TYPE {name} counter']
+                for view, value in sorted(self.counters[name].items()):
+                    lines.append(f'{name}{{view="{view}"}} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
@@ -0,0 +1,39 @@
+from contextlib import ExitStack
+
+from django.db import connections
+
+from . import metrics
+
+
+class PerformanceMiddleware:
+    """
+    Меряет время ответа, запросы к БД, рендеринг шаблонов и работу
+    кэша. Итог уходит в заголовок Server-Timing и в metrics.REGISTRY.
+    Стоит первым, чтобы учесть и остальные middleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        collected, token = metrics.start()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(collected)
+                    )
+                response = self.get_response(request)
+        finally:
+            metrics.finish(token)
+        total = collected.elapsed
+        match = request.resolver_match
+        view = match.view_name if match else 'unresolved'
+        metrics.REGISTRY.record(view, collected, total)
+        response['Server-Timing'] = collected.server_timing(total)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        collected = metrics.current()
+        if collected is not None:
+            collected.view = request.resolver_match.view_name
@@ -0,0 +1,128 @@
+"""
+Журнал медленных запросов к БД.
+
+SlowQueryLogger подключается к каждому новому соединению как
+execute_wrapper и пишет в логгер yatube.slow_queries запросы дольше
+SLOW_QUERY_THRESHOLD_MS: SQL, отпечаток, view, короткий стек и, для
+доли SLOW_QUERY_EXPLAIN_RATE из них, план выполнения. Логгер в
+settings.LOGGING пишет JSON-строки в ротируемый файл, сводку по нему
+строит команда slow_query_report.
+"""
+import hashlib
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+import traceback
+
+from django.conf import settings
+from django.utils import timezone
+
+from . import metrics
+
+logger = logging.getLogger('yatube.slow_queries')
+
+STACK_DEPTH = 5
+PARAMS_LIMIT = 500
+NORMALIZERS = (
+    (re.compile(r"'(?:[^']|'')*'"), '?'),
+    (re.compile(r'\b\d+(?:\.\d+)?\b'), '?'),
+    (re.compile(r'%s'), '?'),
+    (re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)'), '(...)'),
+    (re.compile(r'\s+'), ' '),
+)
+
+
+def fingerprint(sql):
+    """Короткий отпечаток SQL без литералов и длины списков IN."""
+    for pattern, replacement in NORMALIZERS:
+        sql = pattern.sub(replacement, sql)
+    return hashlib.md5(sql.strip().encode()).hexdigest()[:12]
+
+
+def stack_snippet():
+    """Последние кадры стека из кода проекта, без кадров этого модуля."""
+    frames = [
+        frame for frame in traceback.extract_stack()
+        if frame.filename.startswith(settings.BASE_DIR)
+        and frame.filename != __file__
+    ]
+    return [
+        f'{os.path.relpath(frame.filename, settings.BASE_DIR)}:'
+        f'{frame.lineno} in {frame.name}'
+        for frame in frames[-STACK_DEPTH:]
+    ]
+
+
+class SlowQueryLogger:
+    """execute_wrapper, который пишет медленные запросы в журнал."""
+
+    def __init__(self):
+        self.local = threading.local()
+
+    def __call__(self, execute, sql, params, many, context):
+        if getattr(self.local, 'explaining', False):
+            return execute(sql, params, many, context)
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = (time.perf_counter() - started) * 1000
+            threshold = settings.SLOW_QUERY_THRESHOLD_MS
+            if threshold is not None and duration >= threshold:
+                self.log(sql, params, many, context, duration)
+
+    def explain(self, connection, sql, params):
+        prefix = connection.ops.explain_query_prefix()
+        self.local.explaining = True
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(f'{prefix} {sql}', params)
+                return [
+                    ' '.join(str(column) for column in row)
+                    for row in cursor.fetchall()
+                ]
+        except Exception as error:
+            return [f'EXPLAIN не выполнен: {error}']
+        finally:
+            self.local.explaining = False
+
+    def log(self, sql, params, many, context, duration):
+        collected = metrics.current()
+        plan = None
+        sampled = random.random() < settings.SLOW_QUERY_EXPLAIN_RATE
+        if sampled and not many and sql.lstrip().upper().startswith('SELECT'):
+            plan = self.explain(context['connection'], sql, params)
+        logger.warning({
+            'time': timezone.now().isoformat(),
+            'duration_ms': round(duration, 3),
+            'fingerprint': fingerprint(sql),
+            'sql': sql,
+            'params': repr(params)[:PARAMS_LIMIT],
+            'view': getattr(collected, 'view', None),
+            'stack': stack_snippet(),
+            'plan': plan,
+        })
+
+
+SLOW_QUERY_LOGGER = SlowQueryLogger()
+
+
+def install(sender, connection, **kwargs):
+    """
+    Обработчик connection_created. Соединение может открыться внутри
+    execute_wrapper(), который при выходе снимает последнюю обёртку,
+    поэтому журнал встаёт первым, а не последним.
+    """
+    if SLOW_QUERY_LOGGER not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, SLOW_QUERY_LOGGER)
+
+
+class JsonFormatter(logging.Formatter):
+    """Запись журнала — одна строка JSON."""
+
+    def format(self, record):
+        return json.dumps(record.msg, ensure_ascii=False, default=str)
@@ -0,0 +1,38 @@
+import time
+
+from django.template.backends.django import DjangoTemplates, Template
+
+from . import metrics
+
+
+class TimedTemplate(Template):
+
+    def render(self, context=None, request=None):
+        collected = metrics.current()
+        if collected is None:
+            return super().render(context, request)
+        outermost = not collected.template_depth
+        if outermost:
+            started = time.perf_counter()
+        collected.template_depth += 1
+        try:
+            return super().render(context, request)
+        finally:
+            collected.template_depth -= 1
+            if outermost:
+                collected.template_seconds += time.perf_counter() - started
+
+
+class InstrumentedTemplates(DjangoTemplates):
+    """
+    Шаблоны Django с замером рендеринга. Вложенные include и шаблоны,
+    отрисованные через render_to_string внутри другого (например
+    {% hole %}), уже входят во время внешнего и отдельно не считаются.
+    """
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        template = super().get_template(template_name)
+        return TimedTemplate(template.template, self)
@@ -0,0 +1,15 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+from core import holes
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def hole(context, name, **params):
+    request = context['request']
+    params = {key: str(value) for key, value in params.items()}
+    if holes.punching(request):
+        return mark_safe(holes.placeholder(name, params))
+    return holes.render(request, name, params)
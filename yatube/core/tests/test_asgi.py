@@ -0,0 +1,179 @@
+import asyncio
+import threading
+
+from django.core.cache import caches
+from django.core.wsgi import get_wsgi_application
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from core import concurrent, metrics
+from core.asgi import AsgiHandler
+
+
+def call(application, scope, messages):
+    """Прогоняет ASGI-приложение, возвращает отправленные им сообщения."""
+    incoming = list(messages)
+    sent = []
+
+    async def receive():
+        return incoming.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(application(scope, receive, send))
+    return sent
+
+
+def http_scope(path, query=b'', headers=(), method='GET'):
+    return {
+        'type': 'http',
+        'http_version': '1.1',
+        'method': method,
+        'scheme': 'http',
+        'path': path,
+        'root_path': '',
+        'query_string': query,
+        'headers': [(b'host', b'testserver'), *headers],
+        'server': ('testserver', 80),
+        'client': ('127.0.0.1', 5000),
+    }
+
+
+class AsgiHandlerTests(TransactionTestCase):
+    def setUp(self):
+        for cache in caches.all():
+            cache.clear()
+        self.application = AsgiHandler(get_wsgi_application(), threads=2)
+
+    def tearDown(self):
+        self.application.executor.shutdown()
+
+    def test_get(self):
+        """Страница Django отдаётся через пул потоков"""
+        start, body = call(
+            self.application,
+            http_scope('/search/', b'q=%D0%BA%D0%BE%D1%82'),
+            [{'type': 'http.request', 'body': b''}],
+        )
+        self.assertEqual(start['type'], 'http.response.start')
+        self.assertEqual(start['status'], 200)
+        self.assertIn(
+            (b'content-type', b'text/html; charset=utf-8'), start['headers']
+        )
+        self.assertIn('Поиск: кот', body['body'].decode())
+
+    def test_body_in_chunks(self):
+        """Тело, пришедшее частями, доходит до приложения целиком"""
+        def echo(environ, start_response):
+            start_response(
+                '201 Created', [('X-Method', environ['REQUEST_METHOD'])]
+            )
+            return [environ['wsgi.input'].read()]
+
+        start, body = call(
+            AsgiHandler(echo, threads=1),
+            http_scope('/', method='POST'),
+            [
+                {'type': 'http.request', 'body': b'username=a',
+                 'more_body': True},
+                {'type': 'http.request', 'body': b'&password=b'},
+            ],
+        )
+        self.assertEqual(start['status'], 201)
+        self.assertEqual(start['headers'], [(b'x-method', b'POST')])
+        self.assertEqual(body['body'], b'username=a&password=b')
+
+    @override_settings(POST_IMAGE_MAX_BYTES=8,
+                       DATA_UPLOAD_MAX_MEMORY_SIZE=2)
+    def test_body_too_large(self):
+        """Тело сверх лимита не дочитывается, клиент получает 413"""
+        chunks = [
+            {'type': 'http.request', 'body': b'123456', 'more_body': True},
+            {'type': 'http.request', 'body': b'123456', 'more_body': True},
+            {'type': 'http.request', 'body': b'123456'},
+        ]
+        start, body = call(
+            self.application, http_scope('/', method='POST'), chunks
+        )
+        self.assertEqual(start['status'], 413)
+        declared = http_scope(
+            '/', headers=[(b'content-length', b'11')], method='POST'
+        )
+        start, body = call(self.application, declared, [])
+        self.assertEqual(start['status'], 413)
+
+    def test_disconnect(self):
+        """Отключившийся клиент ничего не получает"""
+        sent = call(
+            self.application, http_scope('/'), [{'type': 'http.disconnect'}]
+        )
+        self.assertEqual(sent, [])
+
+    def test_lifespan(self):
+        sent = call(self.application, {'type': 'lifespan'}, [
+            {'type': 'lifespan.startup'}, {'type': 'lifespan.shutdown'},
+        ])
+        self.assertEqual([message['type'] for message in sent], [
+            'lifespan.startup.complete', 'lifespan.shutdown.complete',
+        ])
+
+    def test_environ(self):
+        """Путь, повторные заголовки и куки переводятся в WSGI"""
+        scope = http_scope('/app/профиль/', headers=[
+            (b'cookie', b'a=1'), (b'cookie', b'b=2'),
+            (b'accept', b'text/html'), (b'accept', b'*/*'),
+            (b'content-length', b'0'),
+        ])
+        scope['root_path'] = '/app'
+        environ = self.application.environ(scope, None)
+        self.assertEqual(environ['SCRIPT_NAME'], '/app')
+        self.assertEqual(
+            environ['PATH_INFO'].encode('latin-1').decode(), '/профиль/'
+        )
+        self.assertEqual(environ['HTTP_COOKIE'], 'a=1; b=2')
+        self.assertEqual(environ['HTTP_ACCEPT'], 'text/html,*/*')
+        self.assertEqual(environ['CONTENT_LENGTH'], '0')
+
+
+class GatherTests(TransactionTestCase):
+    def lookup(self):
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        return threading.get_ident()
+
+    def test_parallel(self):
+        """Выборки идут в других потоках и попадают в метрики запроса"""
+        collected, token = metrics.start()
+        try:
+            results = concurrent.gather(self.lookup, self.lookup, self.lookup)
+        finally:
+            metrics.finish(token)
+        self.assertEqual(results[0], threading.get_ident())
+        self.assertNotIn(threading.get_ident(), results[1:])
+        self.assertEqual(collected.db_queries, 2)
+
+    def test_caller_wrappers(self):
+        """Обёртки вызывающего потока считают и параллельные выборки"""
+        queries = []
+
+        def counter(execute, sql, params, many, context):
+            queries.append(sql)
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(counter):
+            results = concurrent.gather(self.lookup, self.lookup, self.lookup)
+        self.assertNotIn(threading.get_ident(), results[1:])
+        self.assertEqual(len(queries), 3)
+
+    @override_settings(DB_LOOKUP_THREADS=0)
+    def test_disabled(self):
+        results = concurrent.gather(self.lookup, self.lookup)
+        self.assertEqual(set(results), {threading.get_ident()})
+
+
+class GatherInTransactionTests(TestCase):
+    def test_sequential(self):
+        """В транзакции выборки идут по очереди в текущем потоке"""
+        results = concurrent.gather(lambda: 1, threading.get_ident)
+        self.assertEqual(results, [1, threading.get_ident()])
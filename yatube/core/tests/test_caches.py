@@ -0,0 +1,131 @@
+import shutil
+import socketserver
+import tempfile
+import threading
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import caches
+from django.test import SimpleTestCase, override_settings
+
+from yatube import settings as project_settings
+
+
+class MemcachedStandIn(socketserver.StreamRequestHandler):
+    """Подмножество текстового протокола memcached поверх словаря."""
+
+    def handle(self):
+        store = self.server.store
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command, *args = line.decode().split()
+            if command in ('set', 'add', 'replace'):
+                key, flags, _, size = args[:4]
+                data = self.rfile.read(int(size) + 2)[:-2]
+                exists = key in store
+                if command == 'add' and exists or (
+                        command == 'replace' and not exists):
+                    self.wfile.write(b'NOT_STORED\r\n')
+                    continue
+                store[key] = (flags, data)
+                self.wfile.write(b'STORED\r\n')
+            elif command == 'get':
+                for key in args:
+                    if key in store:
+                        flags, data = store[key]
+                        self.wfile.write(
+                            f'VALUE {key} {flags} {len(data)}\r\n'.encode()
+                            + data + b'\r\n'
+                        )
+                self.wfile.write(b'END\r\n')
+            elif command == 'delete':
+                found = store.pop(args[0], None) is not None
+                self.wfile.write(b'DELETED\r\n' if found else b'NOT_FOUND\r\n')
+            elif command == 'flush_all':
+                store.clear()
+                self.wfile.write(b'OK\r\n')
+            else:
+                self.wfile.write(b'ERROR\r\n')
+
+
+class CacheBackendsTests(SimpleTestCase):
+
+    def test_named_caches(self):
+        """Фрагменты, версии, сессии и миниатюры — в отдельных кэшах"""
+        for alias in ('default', 'fragments', 'versions', 'sessions',
+                      'thumbnails'):
+            with self.subTest(alias=alias):
+                self.assertIn(alias, settings.CACHES)
+        self.assertEqual(settings.SESSION_CACHE_ALIAS, 'sessions')
+        self.assertEqual(settings.THUMBNAIL_CACHE, 'thumbnails')
+        self.assertEqual(settings.VERSION_CACHE_ALIAS, 'versions')
+        fragments = caches['fragments']
+        fragments.set('key', 'fragment')
+        self.assertIsNone(caches['default'].get('key'))
+
+    def test_alias_location(self):
+        """Отдельному кэшу можно дать свой сервер memcached"""
+        environ = {'CACHE_LOCATION_VERSIONS': '10.0.0.2:11211'}
+        with mock.patch.object(project_settings, 'CACHE_BACKEND',
+                               'memcached'), \
+                mock.patch.object(project_settings, 'CACHE_LOCATION',
+                                  '10.0.0.1:11211'), \
+                mock.patch.dict('os.environ', environ):
+            config = project_settings.cache_config
+            self.assertEqual(
+                config('versions', None)['LOCATION'], ['10.0.0.2:11211']
+            )
+            self.assertEqual(
+                config('fragments', 10)['LOCATION'], ['10.0.0.1:11211']
+            )
+
+    def test_local_versions_expire(self):
+        """С кэшем процесса версии лент живут недолго"""
+        if settings.CACHE_BACKEND != 'locmem':
+            self.skipTest('кэш общий для процессов')
+        self.assertEqual(
+            settings.FEED_VERSION_TIMEOUT, settings.FEED_CACHE_TIMEOUT
+        )
+        self.assertLessEqual(settings.FEED_CACHE_TIMEOUT, 60)
+
+    def test_file_cache_eviction(self):
+        """Файловый кэш соблюдает MAX_ENTRIES"""
+        location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, location, ignore_errors=True)
+        file_cache = {
+            'BACKEND': settings.CACHE_BACKENDS['file'],
+            'LOCATION': location,
+            'OPTIONS': {'MAX_ENTRIES': 5, 'CULL_FREQUENCY': 1},
+        }
+        with override_settings(CACHES={'default': file_cache}):
+            cache = caches['default']
+            for i in range(10):
+                cache.set(f'key{i}', i)
+            self.assertLessEqual(len(cache._list_cache_files()), 5)
+
+    def test_memcached_backend(self):
+        """Бэкенд memcached работает с сервером по протоколу memcached"""
+        server = socketserver.ThreadingTCPServer(
+            ('127.0.0.1', 0), MemcachedStandIn
+        )
+        server.daemon_threads = True
+        server.store = {}
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        host, port = server.server_address
+        memcached = {
+            'BACKEND': settings.CACHE_BACKENDS['memcached'],
+            'LOCATION': f'{host}:{port}',
+            'KEY_PREFIX': 'fragments',
+        }
+        with override_settings(CACHES={'default': memcached}):
+            cache = caches['default']
+            cache.set('page', {'html': '<p>пост</p>'})
+            self.assertEqual(cache.get('page'), {'html': '<p>пост</p>'})
+            self.assertFalse(cache.add('page', 'другое'))
+            cache.delete('page')
+            self.assertIsNone(cache.get('page'))
+            cache.close()
@@ -0,0 +1,98 @@
+import re
+from itertools import count
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.template import engines
+from django.test import Client, TestCase
+
+from core import metrics
+
+User = get_user_model()
+
+
+class PerformanceMiddlewareTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.staff = User.objects.create_user(username='staff', is_staff=True)
+
+    def setUp(self):
+        for cache in caches.all():
+            cache.clear()
+        metrics.REGISTRY.reset()
+        self.client = Client()
+
+    def timing(self, response):
+        return dict(
+            re.match(r'\s*(\w+);(.*)', part).groups()
+            for part in response['Server-Timing'].split(',')
+        )
+
+    def test_server_timing(self):
+        """Ответ несёт время, запросы к БД, шаблоны и работу кэша"""
+        first = self.timing(self.client.get('/'))
+        self.assertEqual(
+            set(first), {'total', 'db', 'tpl', 'cache'}
+        )
+        self.assertRegex(first['db'], r'dur=[\d.]+;desc="[1-9]\d* queries"')
+        self.assertNotEqual(first['tpl'], 'dur=0.0')
+        self.assertIn('miss=', first['cache'])
+        second = self.timing(self.client.get('/'))
+        hits = int(re.search(r'hit=(\d+)', second['cache']).group(1))
+        self.assertGreater(hits, 0)
+
+    def test_metrics_endpoint(self):
+        """Гистограммы по view доступны только персоналу"""
+        self.client.get('/')
+        response = self.client.get('/metrics/')
+        self.assertEqual(response.status_code, 302)
+        self.client.force_login(self.staff)
+        response = self.client.get('/metrics/')
+        self.assertEqual(response.status_code, 200)
+        text = response.content.decode()
+        self.assertIn(
+            '# TYPE yatube_request_duration_seconds histogram', text
+        )
+        self.assertIn(
+            'yatube_request_duration_seconds_count{view="posts:index"} 1',
+            text
+        )
+        self.assertRegex(
+            text, r'yatube_db_queries_total\{view="posts:index"\} [1-9]'
+        )
+
+    def test_cache_get_many(self):
+        """Обёртка кэша считает попадания и промахи get_many"""
+        cache = caches['default']
+        cache.set('present', 1)
+        collected, token = metrics.start()
+        try:
+            self.assertEqual(
+                cache.get_many(['present', 'absent']), {'present': 1}
+            )
+            self.assertIsNone(cache.get('absent'))
+        finally:
+            metrics.finish(token)
+        self.assertEqual(
+            (collected.cache_hits, collected.cache_misses), (1, 2)
+        )
+
+
+class TemplateTimingTests(TestCase):
+    @mock.patch('core.template_backend.time')
+    def test_nested_render_counted_once(self, clock):
+        """Шаблон, отрисованный внутри другого, не считается дважды"""
+        clock.perf_counter.side_effect = count()
+        engine = engines.all()[0]
+        inner = engine.from_string('внутри')
+        outer = engine.from_string('снаружи {{ inner }}')
+        collected, token = metrics.start()
+        try:
+            content = outer.render({'inner': lambda: inner.render()})
+        finally:
+            metrics.finish(token)
+        self.assertEqual(content, 'снаружи внутри')
+        self.assertEqual(collected.template_seconds, 1)
+        self.assertEqual(collected.template_depth, 0)
@@ -0,0 +1,119 @@
+import json
+import os
+import tempfile
+import threading
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.core.cache import caches
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+
+from core.slow_queries import SLOW_QUERY_LOGGER, fingerprint
+
+
+class SlowQueryLoggerTests(TestCase):
+    def setUp(self):
+        for cache in caches.all():
+            cache.clear()
+
+    def test_installed_on_connection(self):
+        """Журнал подключён к соединению с БД"""
+        connection.ensure_connection()
+        self.assertIn(SLOW_QUERY_LOGGER, connection.execute_wrappers)
+
+    def test_connection_opened_inside_wrapper(self):
+        """Соединение, открытое внутри execute_wrapper, сохраняет журнал"""
+        def wrapper(execute, sql, params, many, context):
+            return execute(sql, params, many, context)
+
+        def lookup():
+            # В новом потоке своё, ещё не открытое соединение.
+            try:
+                with connection.execute_wrapper(wrapper):
+                    with connection.cursor() as cursor:
+                        cursor.execute('SELECT 1')
+                wrappers.extend(connection.execute_wrappers)
+            finally:
+                connection.close()
+
+        wrappers = []
+        thread = threading.Thread(target=lookup)
+        thread.start()
+        thread.join()
+        self.assertEqual(wrappers, [SLOW_QUERY_LOGGER])
+
+    def test_fingerprint_ignores_literals(self):
+        """Отпечаток не зависит от литералов и длины списка IN"""
+        self.assertEqual(
+            fingerprint("SELECT * FROM t WHERE a = 1 AND b IN (1, 2, 3)"),
+            fingerprint("SELECT *  FROM t WHERE a = 25 AND b IN (%s)"),
+        )
+        self.assertNotEqual(
+            fingerprint("SELECT * FROM t WHERE a = 'x'"),
+            fingerprint("SELECT * FROM u WHERE a = 'x'"),
+        )
+
+    @override_settings(SLOW_QUERY_THRESHOLD_MS=0, SLOW_QUERY_EXPLAIN_RATE=1)
+    def test_logs_view_stack_and_plan(self):
+        """Запрос дольше порога пишется с view, стеком и планом"""
+        with self.assertLogs('yatube.slow_queries', 'WARNING') as logs:
+            Client().get('/')
+        entries = [record.msg for record in logs.records]
+        selects = [
+            entry for entry in entries
+            if entry['sql'].startswith('SELECT')
+            and 'posts_post' in entry['sql']
+        ]
+        self.assertTrue(selects)
+        entry = selects[0]
+        self.assertEqual(entry['view'], 'posts:index')
+        self.assertTrue(entry['plan'])
+        self.assertTrue(entry['stack'])
+        self.assertGreaterEqual(entry['duration_ms'], 0)
+
+    @override_settings(SLOW_QUERY_THRESHOLD_MS=None)
+    def test_disabled(self):
+        """Без порога журнал молчит"""
+        with self.assertRaises(AssertionError):
+            with self.assertLogs('yatube.slow_queries', 'WARNING'):
+                Client().get('/')
+
+
+class SlowQueryReportTests(TestCase):
+    def write(self, path, entries):
+        with open(path, 'w', encoding='utf-8') as log:
+            for entry in entries:
+                log.write(json.dumps(entry) + '\n')
+
+    def entry(self, fingerprint, duration, plan=None):
+        return {
+            'fingerprint': fingerprint, 'duration_ms': duration,
+            'sql': f'SELECT {fingerprint}', 'view': 'posts:index',
+            'stack': ['posts/views.py:10 in index'], 'plan': plan,
+        }
+
+    def test_groups_by_fingerprint(self):
+        """Сводка группирует по отпечатку и сортирует по общему времени"""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'slow.log')
+            self.write(path + '.1', [self.entry('aaa', 300)])
+            self.write(path, [
+                self.entry('bbb', 200), self.entry('bbb', 250),
+                self.entry('aaa', 100, plan=['SCAN posts_post']),
+            ])
+            output = StringIO()
+            call_command('slow_query_report', file=path, stdout=output)
+        report = output.getvalue()
+        self.assertLess(report.index('bbb: 2 раз'), report.index('aaa: 2 раз'))
+        self.assertIn('всего 450.0 мс', report)
+        self.assertIn('худший 300.0 мс', report)
+        self.assertIn('SCAN posts_post', report)
+
+    def test_empty_log(self):
+        with self.assertRaises(CommandError):
+            call_command(
+                'slow_query_report', file='/nonexistent/slow.log',
+                stdout=StringIO()
+            )
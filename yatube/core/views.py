@@ -1,6 +1,10 @@
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import HttpResponse
 from django.shortcuts import render
 from django.views.decorators.cache import cache_page
 
+from .metrics import REGISTRY
+
 
 def page_not_found(request, exception):
     return render(request, 'core/404.html', {'path': request.path}, status=404)
@@ -17,3 +21,11 @@ def page_forbidden(request, exception):
 
 def page_server_error(request):
     render(request, 'core/500.html', status=500)
+
+
+@staff_member_required
+def metrics(request):
+    return HttpResponse(
+        REGISTRY.exposition(),
+        content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
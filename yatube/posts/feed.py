@@ -0,0 +1,212 @@
+"""
+Лента подписок с раздачей при записи (fan-out-on-write).
+
+Новый пост сразу раскладывается по FeedEntry подписчиков автора, а
+страница /follow/ читает ленту одним диапазоном по индексу
+(user, pub_date). Для авторов с числом подписчиков больше
+FEED_FANOUT_MAX_FOLLOWERS раздача не выполняется: их посты
+подмешиваются при чтении (fan-out-on-read). Какие авторы
+подмешиваются, хранит флаг AuthorStats.pulled: он ставится при переходе
+порога и снимается restore(), когда посты автора снова разложены.
+"""
+from itertools import islice
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Q
+
+from . import graph
+from .models import AuthorStats, FeedEntry, Follow, Post
+
+BATCH_SIZE = 1000
+
+
+def _bulk_insert(entries):
+    # bulk_create собирает объекты в список, поэтому поток режется
+    # на пачки заранее: память не зависит от размера ленты.
+    entries = iter(entries)
+    while True:
+        batch = list(islice(entries, BATCH_SIZE))
+        if not batch:
+            break
+        FeedEntry.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def is_pushed(author_id):
+    """Раздаются ли посты автора по лентам при записи."""
+    return not AuthorStats.objects.filter(
+        user_id=author_id, pulled=True
+    ).exists()
+
+
+def pushed_followers(author_id):
+    """Подписчики, в чьи ленты раздаются посты автора."""
+    return list(Follow.objects.filter(author_id=author_id).exclude(
+        author__stats__pulled=True
+    ).values_list('user_id', flat=True))
+
+
+def fan_out(post):
+    """
+    Раскладывает новый пост по лентам подписчиков автора и возвращает
+    их id.
+    """
+    followers = pushed_followers(post.author_id)
+    _bulk_insert(
+        FeedEntry(user_id=user_id, post=post, pub_date=post.pub_date)
+        for user_id in followers
+    )
+    return followers
+
+
+def backfill(user_id, author_id):
+    """Добавляет в ленту последние посты автора после подписки."""
+    if not is_pushed(author_id):
+        return
+    posts = Post.objects.filter(author_id=author_id).values_list(
+        'pk', 'pub_date'
+    )[:settings.FEED_BACKFILL_POSTS]
+    _bulk_insert(
+        FeedEntry(user_id=user_id, post_id=pk, pub_date=pub_date)
+        for pk, pub_date in posts
+    )
+
+
+def prune(user_id, author_id):
+    """Убирает посты автора из ленты после отписки."""
+    FeedEntry.objects.filter(
+        user_id=user_id, post__author_id=author_id
+    ).delete()
+
+
+# Последние посты каждого из авторов в ленту читателя одним запросом.
+BACKFILL_MANY_SQL = """
+    INSERT INTO {entries} (user_id, post_id, pub_date)
+    SELECT %s, ranked.id, ranked.pub_date FROM (
+        SELECT id, pub_date, ROW_NUMBER() OVER (
+            PARTITION BY author_id ORDER BY pub_date DESC
+        ) AS position
+        FROM {posts} WHERE author_id IN ({{authors}})
+    ) ranked
+    WHERE ranked.position <= %s AND NOT EXISTS (
+        SELECT 1 FROM {entries} entry
+        WHERE entry.user_id = %s AND entry.post_id = ranked.id
+    )
+""".format(
+    entries=FeedEntry._meta.db_table,
+    posts=Post._meta.db_table,
+)
+
+
+def backfill_many(user_id, author_ids):
+    """backfill для подписки сразу на многих авторов."""
+    pushed = list(AuthorStats.objects.filter(
+        user_id__in=author_ids,
+        followers_count__lte=settings.FEED_FANOUT_MAX_FOLLOWERS
+    ).values_list('user_id', flat=True))
+    if not pushed:
+        return
+    sql = BACKFILL_MANY_SQL.format(authors=', '.join(['%s'] * len(pushed)))
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [
+            user_id, *pushed, settings.FEED_BACKFILL_POSTS, user_id
+        ])
+
+
+def prune_many(user_id, author_ids):
+    FeedEntry.objects.filter(
+        user_id=user_id, post__author_id__in=author_ids
+    ).delete()
+
+
+# Последние посты автора в ленты всех его подписчиков одним запросом.
+REBUILD_SQL = """
+    INSERT INTO {entries} (user_id, post_id, pub_date)
+    SELECT follow.user_id, post.id, post.pub_date
+    FROM {follows} follow, (
+        SELECT id, pub_date FROM {posts} WHERE author_id = %s
+        ORDER BY pub_date DESC LIMIT %s
+    ) post
+    WHERE follow.author_id = %s
+""".format(
+    entries=FeedEntry._meta.db_table,
+    follows=Follow._meta.db_table,
+    posts=Post._meta.db_table,
+)
+
+
+def rebuild():
+    """
+    Заново раскладывает по лентам посты всех раздаваемых авторов,
+    как если бы каждая подписка прошла через backfill. Строки
+    собирает сама база, без объектов моделей в памяти.
+    """
+    authors = list(AuthorStats.objects.filter(
+        posts_count__gt=0, followers_count__gt=0, pulled=False
+    ).values_list('user_id', flat=True))
+    with transaction.atomic(), connection.cursor() as cursor:
+        FeedEntry.objects.all().delete()
+        for author_id in authors:
+            cursor.execute(REBUILD_SQL, [
+                author_id, settings.FEED_BACKFILL_POSTS, author_id
+            ])
+
+
+# То же для ещё не разложенных постов: ленты подписчиков уже не пусты.
+RESTORE_SQL = REBUILD_SQL + """
+    AND NOT EXISTS (
+        SELECT 1 FROM {entries} entry
+        WHERE entry.user_id = follow.user_id AND entry.post_id = post.id
+    )
+""".format(entries=FeedEntry._meta.db_table)
+
+
+def restore(author_ids):
+    """
+    Вызывается после отписок. Подмешиваемый автор, у которого
+    подписчиков снова не больше FEED_FANOUT_MAX_FOLLOWERS, снова
+    раздаётся, а его посты, пока он подмешивался, не раскладывались:
+    они раскладываются сейчас. Возвращает id подписчиков, чьи ленты
+    изменились.
+    """
+    dropped = list(AuthorStats.objects.filter(
+        user_id__in=author_ids, pulled=True,
+        followers_count__lte=settings.FEED_FANOUT_MAX_FOLLOWERS
+    ).values_list('user_id', flat=True))
+    followers = []
+    with connection.cursor() as cursor:
+        for author_id in dropped:
+            # Флаг снимает только один из параллельных вызовов.
+            if not AuthorStats.objects.filter(
+                user_id=author_id, pulled=True
+            ).update(pulled=False):
+                continue
+            cursor.execute(RESTORE_SQL, [
+                author_id, settings.FEED_BACKFILL_POSTS, author_id
+            ])
+            followers += pushed_followers(author_id)
+    if dropped:
+        graph.forget_popular()
+    return followers
+
+
+def pulled_authors(user):
+    """Авторы из подписок, чьи посты подмешиваются при чтении."""
+    return graph.pulled(user.pk)
+
+
+def follow_feed(user, pulled=None):
+    """
+    Посты ленты подписок, аннотированные ключом пагинации feed_date.
+    pulled — заранее полученный результат pulled_authors(user).
+    """
+    if pulled is None:
+        pulled = pulled_authors(user)
+    if not pulled:
+        return Post.objects.filter(feed_entries__user=user).annotate(
+            feed_date=F('feed_entries__pub_date')
+        )
+    return Post.objects.filter(
+        Q(pk__in=FeedEntry.objects.filter(user=user).values('post'))
+        | Q(author_id__in=pulled)
+    ).annotate(feed_date=F('pub_date'))
@@ -0,0 +1,123 @@
+"""
+Массовая подписка и отписка по списку имён пользователей.
+
+Имена разбираются пачками по CHUNK_SIZE: авторы находятся одним
+in_bulk, подписки пишутся одним bulk_create, а счётчики AuthorStats,
+граф подписок, ленты и версия ленты читателя обновляются на всю
+пачку сразу, без сигналов на каждую строку. Подписки одного читателя
+правятся под блокировкой его строки, иначе параллельная подписка
+попала бы в счётчики дважды.
+"""
+import re
+from collections import namedtuple
+from itertools import islice
+
+from django.db import connection, transaction
+
+from . import feed, graph, stats, versions
+from .models import Follow, User
+
+CHUNK_SIZE = 500
+SEPARATORS = re.compile(r'[\s,;]+')
+
+Outcome = namedtuple('Outcome', 'changed unchanged missing')
+
+
+def parse(text):
+    """Имена из текста через пробелы, запятые или строки, без повторов."""
+    names = (name.lstrip('@') for name in SEPARATORS.split(text))
+    return list(dict.fromkeys(name for name in names if name))
+
+
+def _chunks(names):
+    names = iter(names)
+    while True:
+        chunk = list(islice(names, CHUNK_SIZE))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _resolve(chunk):
+    """id найденных авторов и имена, которых нет в базе."""
+    found = User.objects.only('pk', 'username').in_bulk(
+        chunk, field_name='username'
+    )
+    lost = [name for name in chunk if name not in found]
+    return {author.pk for author in found.values()}, lost
+
+
+def lock(user):
+    """Блокирует строку читателя до конца транзакции."""
+    User.objects.select_for_update().only('pk').get(pk=user.pk)
+
+
+def _followed(user, author_ids):
+    return set(Follow.objects.filter(
+        user=user, author_id__in=author_ids
+    ).values_list('author_id', flat=True))
+
+
+def follow(user, usernames):
+    """Подписывает user на авторов из usernames, возвращает Outcome."""
+    changed = unchanged = 0
+    missing = []
+    authors = []
+    for chunk in _chunks(usernames):
+        author_ids, lost = _resolve(chunk)
+        author_ids.discard(user.pk)
+        with transaction.atomic():
+            lock(user)
+            new = sorted(author_ids - _followed(user, author_ids))
+            if new:
+                Follow.objects.bulk_create(
+                    [Follow(user=user, author_id=pk) for pk in new]
+                )
+                stats.follows_added(user.pk, new)
+                graph.changed(user.pk, added=new)
+                graph.recount(new)
+                feed.backfill_many(user.pk, new)
+        missing += lost
+        authors += [versions.author(pk) for pk in new]
+        changed += len(new)
+        unchanged += len(chunk) - len(lost) - len(new)
+    if changed:
+        versions.bump(versions.follower(user.pk), *authors)
+    return Outcome(changed, unchanged, missing)
+
+
+def unfollow(user, usernames):
+    """Отписывает user от авторов из usernames, возвращает Outcome."""
+    changed = unchanged = 0
+    missing = []
+    authors = []
+    table = Follow._meta.db_table
+    for chunk in _chunks(usernames):
+        author_ids, lost = _resolve(chunk)
+        restored = []
+        with transaction.atomic():
+            lock(user)
+            gone = sorted(_followed(user, author_ids))
+            if gone:
+                # QuerySet.delete() отправил бы post_delete на каждую
+                # строку, а счётчики и ленты здесь правятся пачкой.
+                placeholders = ', '.join(['%s'] * len(gone))
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        f'DELETE FROM {table} WHERE user_id = %s '
+                        f'AND author_id IN ({placeholders})',
+                        [user.pk, *gone]
+                    )
+                stats.follows_removed(user.pk, gone)
+                graph.changed(user.pk, removed=gone)
+                graph.recount(gone)
+                feed.prune_many(user.pk, gone)
+                restored = feed.restore(gone)
+        missing += lost
+        authors += [versions.author(pk) for pk in gone]
+        authors += [versions.follower(pk) for pk in restored]
+        changed += len(gone)
+        unchanged += len(chunk) - len(lost) - len(gone)
+    if changed:
+        versions.bump(versions.follower(user.pk), *authors)
+    return Outcome(changed, unchanged, missing)
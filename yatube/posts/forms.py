@@ -1,7 +1,11 @@
 from django import forms
+from django.conf import settings
 from django.contrib.auth import get_user_model
 
+from . import follows
 from .models import Comment, Post
+from .uploads import (RejectedUpload, dimensions_error, size_error,
+                      strip_metadata)
 
 User = get_user_model()
 
@@ -11,8 +15,55 @@ class PostForm(forms.ModelForm):
         model = Post
         fields = ('text', 'group', 'image')
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Файл, оборванный при приёме, до ImageField не доходит:
+        # проверять в нём нечего, причина уже известна.
+        self.rejected = None
+        upload = self.files.get('image')
+        if isinstance(upload, RejectedUpload):
+            self.files = self.files.copy()
+            del self.files['image']
+            self.rejected = upload.error
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if self.rejected:
+            self.add_error('image', self.rejected)
+        return cleaned_data
+
+    def clean_image(self):
+        image = self.cleaned_data.get('image')
+        if not image or 'image' not in self.changed_data:
+            return image
+        error = (size_error(image.size)
+                 or dimensions_error(*image.image.size))
+        if error:
+            raise forms.ValidationError(error, code='too_large')
+        return strip_metadata(image)
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
         model = Comment
         fields = ('text',)
+
+
+class FollowImportForm(forms.Form):
+    usernames = forms.CharField(
+        label='Имена пользователей',
+        widget=forms.Textarea,
+        help_text='Через пробел, запятую или каждое с новой строки'
+    )
+    unfollow = forms.BooleanField(
+        label='Отписаться от перечисленных',
+        required=False
+    )
+
+    def clean_usernames(self):
+        names = follows.parse(self.cleaned_data['usernames'])
+        if len(names) > settings.FOLLOW_IMPORT_MAX:
+            raise forms.ValidationError(
+                f'Не больше {settings.FOLLOW_IMPORT_MAX} имён за раз'
+            )
+        return names
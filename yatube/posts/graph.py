@@ -0,0 +1,178 @@
+"""
+Граф подписок в общем кэше.
+
+Подписки читателя хранятся одной записью кэша: отсортированный массив
+id авторов (array 'q', 8 байт на подписку). «Подписан ли я на X» —
+двоичный поиск по нему, а авторы, чьи посты подмешиваются в ленту при
+чтении, — пересечение с небольшим множеством популярных авторов. Запись
+правится на месте после коммита подписки или отписки; если её нет в
+кэше, она собирается из Follow при первом чтении.
+
+Рядом с записью хранится поколение: каждая правка его меняет, а запись
+годна, только пока её поколение совпадает с текущим. Так сборка,
+прочитавшая Follow до чужого коммита, не оставит в кэше старый список.
+"""
+import time
+from array import array
+from bisect import bisect_left
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import AuthorStats, Follow
+
+
+def _key(user_id):
+    return f'following:{user_id}'
+
+
+def _lock_key(user_id):
+    return f'following_lock:{user_id}'
+
+
+def _generation_key(user_id):
+    return f'following_generation:{user_id}'
+
+
+def _generation(user_id):
+    """Текущее поколение записи; заводится, если его нет."""
+    key = _generation_key(user_id)
+    generation = cache.get(key)
+    if generation is None:
+        cache.add(key, time.time_ns(), settings.FOLLOW_GRAPH_TIMEOUT)
+        generation = cache.get(key)
+    return generation
+
+
+def _store(user_id, generation, ids):
+    cache.set(
+        _key(user_id), (generation, ids.tobytes()),
+        settings.FOLLOW_GRAPH_TIMEOUT
+    )
+
+
+def _unpack(value):
+    ids = array('q')
+    ids.frombytes(value)
+    return ids
+
+
+def _load(user_id):
+    # Поколение берётся до чтения Follow: правка, закоммиченная после
+    # него, сменит поколение, и собранная здесь запись не будет годна.
+    generation = _generation(user_id)
+    ids = array('q', Follow.objects.filter(user_id=user_id).order_by(
+        'author_id'
+    ).values_list('author_id', flat=True))
+    _store(user_id, generation, ids)
+    return ids
+
+
+def _current(user_id):
+    """Годная запись из кэша или None."""
+    found = cache.get_many([_key(user_id), _generation_key(user_id)])
+    value = found.get(_key(user_id))
+    generation = found.get(_generation_key(user_id))
+    if value is None or generation is None or value[0] != generation:
+        return None
+    return _unpack(value[1])
+
+
+def following(user_id):
+    """Отсортированный массив id авторов, на которых подписан user_id."""
+    ids = _current(user_id)
+    if ids is None:
+        return _load(user_id)
+    return ids
+
+
+def is_following(user_id, author_id):
+    ids = following(user_id)
+    position = bisect_left(ids, author_id)
+    return position < len(ids) and ids[position] == author_id
+
+
+def changed(user_id, added=(), removed=()):
+    """
+    Вносит подписки и отписки в запись читателя, если она в кэше,
+    после коммита транзакции, и меняет поколение записи. Правки одной
+    записи идут по очереди под блокировкой; не дождавшись её, правка
+    только меняет поколение, и запись соберётся заново.
+    """
+    transaction.on_commit(lambda: _apply(user_id, added, removed))
+
+
+def _acquire(user_id):
+    deadline = time.monotonic() + settings.FOLLOW_GRAPH_LOCK
+    while not cache.add(_lock_key(user_id), 1, settings.FOLLOW_GRAPH_LOCK):
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def _apply(user_id, added, removed):
+    generation = time.time_ns()
+    if not _acquire(user_id):
+        cache.set(
+            _generation_key(user_id), generation,
+            settings.FOLLOW_GRAPH_TIMEOUT
+        )
+        return
+    try:
+        ids = _current(user_id)
+        cache.set(
+            _generation_key(user_id), generation,
+            settings.FOLLOW_GRAPH_TIMEOUT
+        )
+        if ids is None:
+            return
+        ids = set(ids)
+        ids.update(added)
+        ids.difference_update(removed)
+        _store(user_id, generation, array('q', sorted(ids)))
+    finally:
+        cache.delete(_lock_key(user_id))
+
+
+def _popular_key():
+    return f'popular_authors:{settings.FEED_FANOUT_MAX_FOLLOWERS}'
+
+
+def _popular_in(author_ids=None):
+    authors = AuthorStats.objects.filter(pulled=True)
+    if author_ids is not None:
+        authors = authors.filter(user_id__in=author_ids)
+    return set(authors.values_list('user_id', flat=True))
+
+
+def popular():
+    """
+    Авторы, чьи посты не раздаются по лентам при записи. Их немного,
+    поэтому множество хранится одной записью кэша.
+    """
+    return frozenset(cache.get_or_set(
+        _popular_key(),
+        lambda: list(_popular_in()),
+        settings.FOLLOW_GRAPH_POPULAR_TIMEOUT
+    ))
+
+
+def recount(author_ids):
+    """Сбрасывает множество популярных, если авторы пересекли порог."""
+    if _popular_in(author_ids) != popular().intersection(author_ids):
+        forget_popular()
+
+
+def forget_popular():
+    """Сбрасывает множество популярных после массовой правки подписок."""
+    cache.delete(_popular_key())
+
+
+def pulled(user_id):
+    """Популярные авторы из подписок читателя, по возрастанию id."""
+    candidates = popular()
+    if not candidates:
+        return []
+    return [author for author in following(user_id) if author in candidates]
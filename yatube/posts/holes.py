@@ -0,0 +1,44 @@
+"""Личные фрагменты страниц постов, см. core.holes."""
+from core.holes import register
+
+from . import graph, recommendations
+from .forms import CommentForm
+
+
+@register('edit_link', 'includes/edit_link.html')
+def edit_link(request, post_id, author):
+    return {
+        'post_id': post_id,
+        'editable': request.user.get_username() == author,
+    }
+
+
+@register('follow_tab', 'includes/follow_tab.html')
+def follow_tab(request, active=''):
+    return {'follow': active == 'True'}
+
+
+@register('follow_button', 'includes/follow_button.html')
+def follow_button(request, author_id, username):
+    user = request.user
+    author_id = int(author_id)
+    return {
+        'username': username,
+        'own': user.pk == author_id,
+        'following': (
+            user.is_authenticated and graph.is_following(user.pk, author_id)
+        ),
+    }
+
+
+@register('suggestions', 'includes/suggestions.html')
+def suggestions(request, author_id):
+    user = request.user
+    if user.pk != int(author_id):
+        return {'suggestions': []}
+    return {'suggestions': recommendations.for_user(user)}
+
+
+@register('comment_form', 'includes/comment_form.html')
+def comment_form(request, post_id):
+    return {'post_id': post_id, 'form': CommentForm()}
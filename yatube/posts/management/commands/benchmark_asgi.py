@@ -0,0 +1,177 @@
+import asyncio
+import json
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.core.wsgi import get_wsgi_application
+from django.test import Client
+from django.utils import timezone
+
+from core.asgi import AsgiHandler
+
+from .benchmark_views import Command as ViewsBenchmark, percentile
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает пропускную способность WSGI- и ASGI-входа на '
+        'страницах лент при множестве одновременных клиентов.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests', type=int, default=400,
+            help='Запросов на каждый вход.'
+        )
+        parser.add_argument(
+            '--concurrency', type=int, default=100,
+            help='Одновременных клиентов.'
+        )
+        parser.add_argument(
+            '--threads', type=int, default=settings.ASGI_THREADS,
+            help='Потоков WSGI-сервера и пула ASGI_THREADS.'
+        )
+        parser.add_argument(
+            '--client-delay', type=float, default=50.0,
+            help='Сколько миллисекунд клиент досылает запрос.'
+        )
+        parser.add_argument('--output', help='Куда записать JSON.')
+
+    def scope(self, path, cookie):
+        return {
+            'type': 'http',
+            'http_version': '1.1',
+            'method': 'GET',
+            'scheme': 'http',
+            'path': path,
+            'root_path': '',
+            'query_string': b'',
+            'headers': [
+                (b'host', b'localhost'),
+                (b'cookie', cookie.encode('latin-1')),
+            ],
+            'server': ('localhost', 80),
+            'client': ('127.0.0.1', 0),
+        }
+
+    def wsgi_request(self, application, environ, delay):
+        # Поток сервера занят, пока медленный клиент шлёт запрос.
+        time.sleep(delay)
+        started = {}
+
+        def start_response(status, headers, exc_info=None):
+            started['status'] = int(status.split(' ', 1)[0])
+
+        result = application(environ, start_response)
+        try:
+            b''.join(result)
+        finally:
+            result.close()
+        return started['status']
+
+    async def asgi_request(self, application, scope, delay):
+        sent = {}
+
+        async def receive():
+            await asyncio.sleep(delay)
+            return {'type': 'http.request', 'body': b''}
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                sent['status'] = message['status']
+
+        await application(scope, receive, send)
+        return sent['status']
+
+    async def load(self, handle, scopes, total, concurrency):
+        """Гоняет клиентов по кругу страниц; (секунды, задержки, ошибки)."""
+        latencies = []
+        errors = 0
+        issued = iter(range(total))
+
+        async def client():
+            nonlocal errors
+            for number in issued:
+                scope = scopes[number % len(scopes)]
+                started = time.perf_counter()
+                status = await handle(scope)
+                latencies.append(time.perf_counter() - started)
+                errors += status >= 400
+
+        started = time.perf_counter()
+        await asyncio.gather(*(client() for _ in range(concurrency)))
+        return time.perf_counter() - started, latencies, errors
+
+    def run(self, name, handle, scopes, options):
+        seconds, latencies, errors = asyncio.run(self.load(
+            handle, scopes, options['requests'], options['concurrency']
+        ))
+        if errors:
+            raise CommandError(f'{name}: ошибок {errors}')
+        return {
+            'rps': round(len(latencies) / seconds, 1),
+            'p50_ms': round(statistics.median(latencies) * 1000, 3),
+            'p95_ms': round(percentile(latencies, 0.95) * 1000, 3),
+            'p99_ms': round(percentile(latencies, 0.99) * 1000, 3),
+        }
+
+    def handle(self, *args, **options):
+        views = ViewsBenchmark()
+        paths = [
+            url for name, method, url, data in views.scenarios()
+            if method == 'get'
+        ]
+        client = Client()
+        client.force_login(views.reader)
+        session = client.cookies[settings.SESSION_COOKIE_NAME].value
+        cookie = f'{settings.SESSION_COOKIE_NAME}={session}'
+        scopes = [self.scope(path, cookie) for path in paths]
+        delay = options['client_delay'] / 1000
+        threads = options['threads']
+
+        wsgi_application = get_wsgi_application()
+        asgi_application = AsgiHandler(wsgi_application, threads)
+        wsgi_pool = ThreadPoolExecutor(max_workers=threads)
+
+        def wsgi(scope):
+            environ = asgi_application.environ(scope, BytesIO())
+            return asyncio.get_running_loop().run_in_executor(
+                wsgi_pool, self.wsgi_request, wsgi_application, environ,
+                delay
+            )
+
+        def asgi(scope):
+            return self.asgi_request(asgi_application, scope, delay)
+
+        # Прогрев кэшей, чтобы оба входа шли в одинаковых условиях.
+        for scope in scopes:
+            asyncio.run(asgi(scope))
+        results = {}
+        try:
+            for name, handle in (('wsgi', wsgi), ('asgi', asgi)):
+                results[name] = self.run(name, handle, scopes, options)
+                self.stdout.write(f'{name}: {results[name]}')
+        finally:
+            wsgi_pool.shutdown()
+            asgi_application.executor.shutdown()
+        self.stdout.write(
+            f'ASGI/WSGI: {results["asgi"]["rps"] / results["wsgi"]["rps"]:.2f}'
+        )
+        if options['output']:
+            report = {
+                'meta': {
+                    'created': timezone.now().isoformat(),
+                    'requests': options['requests'],
+                    'concurrency': options['concurrency'],
+                    'threads': threads,
+                    'client_delay_ms': options['client_delay'],
+                    'paths': paths,
+                },
+                'entries': results,
+            }
+            with open(options['output'], 'w', encoding='utf-8') as output:
+                json.dump(report, output, ensure_ascii=False, indent=2)
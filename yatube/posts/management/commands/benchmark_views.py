@@ -0,0 +1,211 @@
+import json
+import statistics
+import threading
+import time
+import tracemalloc
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.models import AuthorStats, Comment, Follow, Group, Post, User
+
+# Отслеживаемые при сравнении метрики: рост больше порога — регрессия.
+COMPARED = ('p95_ms', 'queries')
+
+
+class QueryTimer:
+    """
+    execute_wrapper: считает запросы и их суммарное время. Через
+    concurrent.gather он стоит и на соединениях потоков пула, поэтому
+    счёт под блокировкой.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            with self.lock:
+                self.seconds += elapsed
+                self.count += 1
+
+
+def percentile(values, share):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, round(share * (len(ordered) - 1)))
+    return ordered[index]
+
+
+class Command(BaseCommand):
+    help = (
+        'Прогоняет страницы posts через тестовый клиент на текущих '
+        'данных и пишет задержки, запросы и пик памяти в JSON.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests', type=int, default=50,
+            help='Запросов на каждую страницу.'
+        )
+        parser.add_argument(
+            '--cold', action='store_true',
+            help='Очищать кэши перед каждым запросом.'
+        )
+        parser.add_argument('--output', help='Куда записать JSON.')
+        parser.add_argument(
+            '--compare',
+            help='JSON прошлого прогона: показать разницу.'
+        )
+        parser.add_argument(
+            '--threshold', type=float, default=20.0,
+            help='Допустимый рост p95 и числа запросов, %%.'
+        )
+
+    def scenarios(self):
+        """(имя, метод, url, данные) на самых тяжёлых объектах базы."""
+        group = Group.objects.annotate(
+            posts_total=Count('posts')
+        ).order_by('-posts_total').first()
+        author = AuthorStats.objects.select_related('user').order_by(
+            '-posts_count'
+        ).first()
+        reader = AuthorStats.objects.select_related('user').order_by(
+            '-following_count'
+        ).first()
+        post = Post.objects.order_by('-comment_count').first()
+        if not (group and author and reader and post):
+            raise CommandError('В базе нет данных: запустите seed_yatube.')
+        self.reader = reader.user
+        return [
+            ('index', 'get', reverse('posts:index'), None),
+            ('group_posts', 'get', reverse(
+                'posts:group_list', args=[group.slug]
+            ), None),
+            ('profile', 'get', reverse(
+                'posts:profile', args=[author.user.username]
+            ), None),
+            ('post_detail', 'get', reverse(
+                'posts:post_detail', args=[post.pk]
+            ), None),
+            ('follow_index', 'get', reverse('posts:follow_index'), None),
+            ('post_create', 'post', reverse('posts:post_create'), {
+                'text': 'Пост из замера производительности',
+                'group': group.pk,
+            }),
+            ('add_comment', 'post', reverse(
+                'posts:add_comment', args=[post.pk]
+            ), {'text': 'Комментарий из замера'}),
+        ]
+
+    def request(self, client, method, url, data, cold):
+        if cold:
+            for alias in settings.CACHES:
+                caches[alias].clear()
+        if method == 'get':
+            # Без транзакции: в ней concurrent.gather идёт по очереди.
+            return client.get(url, data)
+        # Записи откатываются, чтобы прогоны шли на одинаковых данных.
+        with transaction.atomic():
+            response = getattr(client, method)(url, data)
+            transaction.set_rollback(True)
+        return response
+
+    def measure(self, client, scenario, repeat, cold):
+        name, method, url, data = scenario
+        if not cold:
+            # Первый запрос прогревает кэши и в замер не входит.
+            self.request(client, method, url, data, cold)
+        timer = QueryTimer()
+        latencies = []
+        with connection.execute_wrapper(timer):
+            for _ in range(repeat):
+                started = time.perf_counter()
+                response = self.request(client, method, url, data, cold)
+                latencies.append(time.perf_counter() - started)
+        if response.status_code >= 400:
+            raise CommandError(f'{name}: ответ {response.status_code}')
+        tracemalloc.start()
+        self.request(client, method, url, data, cold)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return {
+            'status': response.status_code,
+            'p50_ms': round(statistics.median(latencies) * 1000, 3),
+            'p95_ms': round(percentile(latencies, 0.95) * 1000, 3),
+            'p99_ms': round(percentile(latencies, 0.99) * 1000, 3),
+            'queries': timer.count / repeat,
+            'query_ms': round(timer.seconds * 1000 / repeat, 3),
+            'peak_kb': peak // 1024,
+        }
+
+    def compare(self, report, path, threshold):
+        with open(path, encoding='utf-8') as baseline_file:
+            baseline = json.load(baseline_file)
+        for key in ('cold', 'vendor', 'rows'):
+            if baseline['meta'].get(key) != report['meta'][key]:
+                self.stderr.write(
+                    f'Прогоны несравнимы по {key}: '
+                    f'{baseline["meta"].get(key)} и {report["meta"][key]}'
+                )
+        baseline = baseline['views']
+        regressions = []
+        for name, current in report['views'].items():
+            previous = baseline.get(name)
+            if previous is None:
+                continue
+            changes = []
+            for metric, value in current.items():
+                old = previous.get(metric)
+                if metric == 'status' or not old:
+                    continue
+                delta = (value - old) * 100 / old
+                changes.append(f'{metric} {old} → {value} ({delta:+.1f}%)')
+                if metric in COMPARED and delta > threshold:
+                    regressions.append(f'{name} {metric} {delta:+.1f}%')
+            self.stdout.write(f'{name}: ' + ', '.join(changes))
+        return regressions
+
+    def handle(self, *args, **options):
+        scenarios = self.scenarios()
+        client = Client()
+        client.force_login(self.reader)
+        results = {}
+        for scenario in scenarios:
+            results[scenario[0]] = self.measure(
+                client, scenario, options['requests'], options['cold']
+            )
+            self.stdout.write(f'{scenario[0]}: {results[scenario[0]]}')
+        report = {
+            'meta': {
+                'created': timezone.now().isoformat(),
+                'requests': options['requests'],
+                'cold': options['cold'],
+                'vendor': connection.vendor,
+                'rows': {
+                    model.__name__: model.objects.count()
+                    for model in (User, Group, Post, Comment, Follow)
+                },
+            },
+            'views': results,
+        }
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output:
+                json.dump(report, output, ensure_ascii=False, indent=2)
+        if options['compare']:
+            regressions = self.compare(
+                report, options['compare'], options['threshold']
+            )
+            if regressions:
+                raise CommandError('Регрессии: ' + '; '.join(regressions))
@@ -0,0 +1,29 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts import recommendations
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает рекомендации «на кого подписаться» по всему графу '
+        'подписок и групп.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--top', type=int, default=settings.RECOMMENDATIONS_TOP,
+            help='Сколько авторов хранить на читателя.'
+        )
+        parser.add_argument(
+            '--block-size', type=int, default=recommendations.BLOCK_SIZE,
+            help='Читателей в одном плотном блоке оценок.'
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        total = recommendations.build(options['top'], options['block_size'])
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f'Рекомендаций: {total} за {elapsed:.1f} с')
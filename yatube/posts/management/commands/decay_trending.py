@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from posts import trending
+
+
+class Command(BaseCommand):
+    help = (
+        'Применяет затухание к популярности постов; запускается '
+        'по расписанию раз в TRENDING_DECAY_INTERVAL.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rebuild', action='store_true',
+            help='Пересчитать популярность с нуля по постам и комментариям.'
+        )
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            total = trending.rebuild()
+            self.stdout.write(f'Популярных постов: {total}')
+            return
+        ratio = trending.decay()
+        self.stdout.write(f'Коэффициент затухания: {ratio:.4f}')
@@ -0,0 +1,125 @@
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import Count
+
+from posts.feed import follow_feed, pulled_authors
+from posts.models import AuthorStats, Comment, Follow, Group, Post
+from posts.utils import CursorPaginator, feed_queryset
+
+# Составные индексы под ленты; --compare показывает планы без них.
+FEED_INDEXES = {
+    Post: ('post_group_pub_date_idx', 'post_author_pub_date_idx'),
+    Comment: ('comment_post_created_idx',),
+    Follow: ('follow_author_user_idx',),
+}
+
+
+def first_page(queryset, per_page, key='pub_date'):
+    paginator = CursorPaginator(queryset, per_page, key=key)
+    return paginator.object_list[:per_page + 1]
+
+
+class Command(BaseCommand):
+    help = (
+        'Показывает план и время запросов каждой ленты на текущих данных. '
+        'Для показательных цифр сначала заполните базу: seed_yatube.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--repeat', type=int, default=5,
+            help='Сколько раз выполнить запрос для медианы времени.'
+        )
+        parser.add_argument(
+            '--compare', action='store_true',
+            help='Сначала замерить без составных индексов (с откатом). '
+                 'Удаляет индексы, поэтому нужен явный --database.'
+        )
+        parser.add_argument(
+            '--database',
+            help='Алиас базы, по умолчанию default. Для --compare '
+                 'укажите копию или тестовую базу, не рабочую.'
+        )
+
+    def probes(self, database):
+        """Запросы первых страниц лент для самых «тяжёлых» объектов."""
+        group = Group.objects.using(database).annotate(
+            posts_total=Count('posts')
+        ).order_by('-posts_total').first()
+        stats = AuthorStats.objects.using(database)
+        author = stats.order_by('-posts_count').first()
+        reader = stats.order_by('-following_count').first()
+        post = Post.objects.using(database).order_by(
+            '-comment_count'
+        ).first()
+        if not (group and author and reader and post):
+            raise CommandError('В базе нет данных: запустите seed_yatube.')
+        per_page = settings.VIEWABLE_POSTS
+        probes = [
+            ('index', first_page(
+                feed_queryset(Post.objects.all()), per_page
+            )),
+            (f'group_list {group.slug}', first_page(
+                feed_queryset(group.posts.all()), per_page
+            )),
+            (f'profile user={author.user_id}', first_page(
+                feed_queryset(author.user.posts.all()), per_page
+            )),
+            (f'post_detail comments post={post.pk}', first_page(
+                post.comments.select_related('author'),
+                settings.VIEWABLE_COMMENTS, key='created'
+            )),
+            (f'follow_index user={reader.user_id}', first_page(
+                feed_queryset(follow_feed(
+                    reader.user, pulled_authors(reader.user)
+                )),
+                per_page, key='feed_date'
+            )),
+            (f'followers author={author.user_id}', Follow.objects.filter(
+                author_id=author.user_id
+            ).values_list('user_id', flat=True)),
+        ]
+        return [(name, queryset.using(database)) for name, queryset in probes]
+
+    def report(self, title, probes, repeat):
+        self.stdout.write(self.style.MIGRATE_HEADING(title))
+        for name, queryset in probes:
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                list(queryset.all())
+                timings.append(time.perf_counter() - started)
+            median = statistics.median(timings) * 1000
+            self.stdout.write(f'{name}: {median:.2f} мс')
+            for line in queryset.explain().splitlines():
+                self.stdout.write(f'    {line}')
+
+    def handle(self, *args, **options):
+        if options['compare'] and not options['database']:
+            # DROP INDEX в транзакции держит блокировку записи, а
+            # прерванный прогон может оставить базу без индексов.
+            raise CommandError(
+                '--compare удаляет индексы: укажите --database с копией '
+                'или тестовой базой.'
+            )
+        database = options['database'] or DEFAULT_DB_ALIAS
+        connection = connections[database]
+        probes = self.probes(database)
+        repeat = options['repeat']
+        if options['compare']:
+            editor = connection.schema_editor()
+            with transaction.atomic(using=database):
+                for model, names in FEED_INDEXES.items():
+                    for index in model._meta.indexes:
+                        if index.name in names:
+                            editor.execute(index.remove_sql(model, editor))
+                self.report('Без составных индексов', probes, repeat)
+                transaction.set_rollback(True, using=database)
+            # Кэш подготовленных запросов SQLite не замечает отката
+            # схемы в EXPLAIN: новое соединение начинает с чистого.
+            connection.close()
+        self.report('С составными индексами', probes, repeat)
@@ -0,0 +1,44 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import follows
+from posts.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        'Подписывает пользователя на авторов из файла или stdin '
+        '(имена через пробел, запятую или с новой строки).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('username', help='Кого подписывать.')
+        parser.add_argument(
+            'file', nargs='?',
+            help='Файл со списком имён; без него список читается из stdin.'
+        )
+        parser.add_argument(
+            '--unfollow', action='store_true',
+            help='Отписать от перечисленных авторов.'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f'Нет пользователя {options["username"]}')
+        if options['file']:
+            with open(options['file'], encoding='utf-8') as source:
+                names = follows.parse(source.read())
+        else:
+            names = follows.parse(sys.stdin.read())
+        action = follows.unfollow if options['unfollow'] else follows.follow
+        outcome = action(user, names)
+        self.stdout.write(
+            f'Изменено подписок: {outcome.changed}, '
+            f'без изменений: {outcome.unchanged}, '
+            f'не найдено: {len(outcome.missing)}'
+        )
+        for name in outcome.missing:
+            self.stderr.write(f'Не найден: {name}')
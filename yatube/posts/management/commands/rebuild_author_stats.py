@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import stats
+from posts.models import User
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает или проверяет счётчики AuthorStats.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify', action='store_true',
+            help='Только сравнить сохранённые счётчики с реальными.'
+        )
+        parser.add_argument(
+            'usernames', nargs='*',
+            help='Ограничиться указанными пользователями.'
+        )
+
+    def handle(self, *args, **options):
+        users = User.objects.all()
+        if options['usernames']:
+            users = users.filter(username__in=options['usernames'])
+        if not options['verify']:
+            total = stats.rebuild(users)
+            self.stdout.write(f'Пересчитано строк: {total}')
+            return
+        mismatches = stats.verify(users)
+        for user_id, field, saved, real in mismatches:
+            self.stdout.write(
+                f'user={user_id} {field}: сохранено {saved}, реально {real}'
+            )
+        if mismatches:
+            raise CommandError(f'Расхождений: {len(mismatches)}')
+        self.stdout.write('Счётчики сходятся')
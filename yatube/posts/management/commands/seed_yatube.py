@@ -0,0 +1,254 @@
+import random
+import time
+from array import array
+from bisect import bisect
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from itertools import islice
+
+from django.contrib.auth.hashers import UNUSABLE_PASSWORD_PREFIX
+from django.core.management.base import BaseCommand, CommandError
+from django.db import reset_queries
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from posts import feed, graph, search, stats, trending, versions
+from posts.models import Comment, Follow, Group, Post, User
+
+WORDS = (
+    'кот собака город утро вечер дорога река лес море солнце дождь снег '
+    'книга музыка фильм работа отпуск друг семья праздник кофе чай завтрак '
+    'поезд самолёт велосипед прогулка парк улица дом окно сад цветы осень '
+    'весна лето зима новый старый красивый быстрый тихий яркий интересный '
+    'смотреть читать писать гулять думать любить видеть слушать готовить'
+).split()
+
+
+class PowerLaw:
+    """Индексы 0..size-1 с вероятностью, пропорциональной 1 / rank**alpha."""
+
+    def __init__(self, size, alpha, rng):
+        self.rng = rng
+        self.cumulative = array('d')
+        total = 0.0
+        for rank in range(1, size + 1):
+            total += rank ** -alpha
+            self.cumulative.append(total)
+
+    def __call__(self):
+        point = self.rng.random() * self.cumulative[-1]
+        return bisect(self.cumulative, point)
+
+
+@contextmanager
+def explicit_dates(*fields):
+    """Отключает auto_now_add, чтобы bulk_create сохранил заданные даты."""
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def batches(rows, size):
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+def new_ids(model, after):
+    """id строк, добавленных после after, в компактном массиве."""
+    ids = array('q')
+    ids.extend(model.objects.filter(pk__gt=after).order_by('pk').values_list(
+        'pk', flat=True
+    ).iterator())
+    return ids
+
+
+def last_id(model):
+    return model.objects.order_by('-pk').values_list(
+        'pk', flat=True
+    ).first() or 0
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет базу синтетическими пользователями, группами, постами, '
+        'комментариями и подписками для нагрузочных замеров.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10000)
+        parser.add_argument('--groups', type=int, default=50)
+        parser.add_argument('--posts', type=int, default=100000)
+        parser.add_argument('--comments', type=int, default=200000)
+        parser.add_argument(
+            '--follows', type=int, default=20,
+            help='Среднее число подписок пользователя.'
+        )
+        parser.add_argument(
+            '--alpha', type=float, default=1.1,
+            help='Показатель степенного закона популярности авторов.'
+        )
+        parser.add_argument(
+            '--days', type=int, default=365,
+            help='За сколько дней распределить посты.'
+        )
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=None)
+
+    def handle(self, *args, **options):
+        if options['users'] < 2:
+            raise CommandError('Нужно хотя бы два пользователя.')
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.now = timezone.now()
+        self.start = self.now - timedelta(days=options['days'])
+        started = time.perf_counter()
+
+        users = self.step('Пользователи', User, self.users(options['users']))
+        groups = self.step('Группы', Group, self.groups(options['groups']))
+        popular = PowerLaw(len(users), options['alpha'], self.rng)
+        # Даты постов в порядке id: комментарий не должен быть старше поста.
+        self.post_dates = array('d')
+        with explicit_dates(Post._meta.get_field('pub_date')):
+            posts = self.step('Посты', Post, self.posts(
+                options['posts'], users, groups, popular
+            ))
+        with explicit_dates(Comment._meta.get_field('created')):
+            self.step('Комментарии', Comment, self.comments(
+                options['comments'], users, posts, options['alpha']
+            ), collect=False)
+        self.step('Подписки', Follow, self.follows(
+            users, popular, options['follows']
+        ), collect=False)
+        self.derive()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f'Готово за {elapsed:.1f} с'))
+
+    def step(self, title, model, rows, collect=True):
+        """Вставляет поток строк пачками; collect — вернуть id новых."""
+        after = last_id(model)
+        started = time.perf_counter()
+        created = 0
+        for batch in batches(rows, self.batch_size):
+            model.objects.bulk_create(batch)
+            created += len(batch)
+            # При DEBUG журнал запросов копит тексты огромных INSERT.
+            reset_queries()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f'{title}: {created} за {elapsed:.1f} с')
+        return new_ids(model, after) if collect else None
+
+    def text(self, low, high):
+        words = self.rng.choices(WORDS, k=self.rng.randint(low, high))
+        return ' '.join(words).capitalize()
+
+    def users(self, count):
+        offset = last_id(User)
+        for number in range(offset + 1, offset + count + 1):
+            yield User(
+                username=f'seed{number}',
+                first_name=self.rng.choice(WORDS).capitalize(),
+                password=UNUSABLE_PASSWORD_PREFIX,
+            )
+
+    def groups(self, count):
+        offset = last_id(Group)
+        for number in range(offset + 1, offset + count + 1):
+            yield Group(
+                title=f'Группа {number}',
+                slug=f'seed-{number}',
+                description=self.text(5, 20),
+            )
+
+    def post_date(self, index, total):
+        """Посты идут по времени в порядке id, как при живой записи."""
+        span = (self.now - self.start) * (index + self.rng.random()) / total
+        return self.start + span
+
+    def posts(self, count, users, groups, popular):
+        # Активность автора не связана с его популярностью: иначе
+        # самые читаемые авторы писали бы и больше всех, а ленты
+        # подписчиков разрастались бы квадратично.
+        writers = array('q', users)
+        self.rng.shuffle(writers)
+        for index in range(count):
+            group = None
+            if groups and self.rng.random() < 0.7:
+                group = groups[self.rng.randrange(len(groups))]
+            pub_date = self.post_date(index, count)
+            self.post_dates.append(pub_date.timestamp())
+            yield Post(
+                text=self.text(5, 60),
+                author_id=writers[popular()],
+                group_id=group,
+                pub_date=pub_date,
+            )
+
+    def comments(self, count, users, posts, alpha):
+        if not posts:
+            return
+        # Свежие посты обсуждают чаще: ранг считается с конца.
+        recent = PowerLaw(len(posts), alpha / 2, self.rng)
+        for _ in range(count):
+            index = len(posts) - 1 - recent()
+            posted = datetime.fromtimestamp(
+                self.post_dates[index], timezone.utc
+            )
+            yield Comment(
+                post_id=posts[index],
+                author_id=users[self.rng.randrange(len(users))],
+                text=self.text(2, 20),
+                created=posted + (self.now - posted) * self.rng.random(),
+            )
+
+    def follows(self, users, popular, mean):
+        for user_id in users:
+            wanted = min(
+                len(users) - 1, int(self.rng.expovariate(1 / mean))
+            ) if mean else 0
+            authors = set()
+            # Повторы и подписка на себя отбрасываются, попытки ограничены.
+            for _ in range(wanted * 3):
+                if len(authors) == wanted:
+                    break
+                author_id = users[popular()]
+                if author_id != user_id:
+                    authors.add(author_id)
+            for author_id in authors:
+                yield Follow(user_id=user_id, author_id=author_id)
+
+    def derive(self):
+        """Пересчитывает всё, что обычно ведут сигналы."""
+        counts = Comment.objects.filter(post=OuterRef('pk')).order_by(
+        ).values('post').annotate(total=Count('pk')).values('total')
+        Post.objects.update(comment_count=Coalesce(Subquery(counts), 0))
+        self.stdout.write('Счётчики комментариев пересчитаны')
+        stats.rebuild()
+        self.stdout.write('Статистика авторов пересчитана')
+        feed.rebuild()
+        self.stdout.write('Ленты подписок разложены')
+        search.backend().rebuild()
+        self.stdout.write('Поисковый индекс перестроен')
+        trending.rebuild()
+        self.stdout.write('Популярность постов пересчитана')
+        graph.forget_popular()
+        versions.bump(versions.GLOBAL, *(
+            versions.group(group_id)
+            for group_id in Group.objects.values_list('pk', flat=True)
+        ))
+        users = User.objects.order_by('pk').values_list('pk', flat=True)
+        for batch in batches(users.iterator(), self.batch_size):
+            versions.bump(*(
+                scope for user_id in batch
+                for scope in (versions.author(user_id),
+                              versions.follower(user_id))
+            ))
+        self.stdout.write('Кэши лент сброшены')
@@ -0,0 +1,63 @@
+# Generated by Django 2.2.16 on 2026-10-18 02:27
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Count, Max
+
+
+def fill_stats(apps, schema_editor):
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    Post = apps.get_model('posts', 'Post')
+    Follow = apps.get_model('posts', 'Follow')
+    AuthorStats = apps.get_model('posts', 'AuthorStats')
+    posts = {
+        row['author']: row
+        for row in Post.objects.order_by().values('author').annotate(
+            total=Count('pk'), last=Max('pub_date')
+        )
+    }
+
+    def counts(field):
+        return dict(Follow.objects.order_by().values(field).annotate(
+            total=Count('pk')
+        ).values_list(field, 'total'))
+
+    followers = counts('author')
+    following = counts('user')
+    AuthorStats.objects.bulk_create([
+        AuthorStats(
+            user_id=user_id,
+            posts_count=posts.get(user_id, {}).get('total', 0),
+            last_post=posts.get(user_id, {}).get('last'),
+            followers_count=followers.get(user_id, 0),
+            following_count=following.get(user_id, 0),
+        )
+        for user_id in User.objects.values_list('pk', flat=True)
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0012_post_comment_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuthorStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+                ('posts_count', models.PositiveIntegerField(default=0, verbose_name='Постов')),
+                ('followers_count', models.PositiveIntegerField(default=0, verbose_name='Подписчиков')),
+                ('following_count', models.PositiveIntegerField(default=0, verbose_name='Подписок')),
+                ('last_post', models.DateTimeField(blank=True, null=True, verbose_name='Последний пост')),
+            ],
+            options={
+                'verbose_name': 'Статистика автора',
+                'verbose_name_plural': 'Статистика авторов',
+            },
+        ),
+        migrations.RunPython(fill_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 2.2.16 on 2026-10-18 02:41
+
+from django.db import migrations, models
+import django.db.models.deletion
+import posts.models
+
+
+def install_index(apps, schema_editor):
+    from posts import search
+    backend = search.backend()
+    backend.install(schema_editor.connection)
+    backend.rebuild()
+
+
+def uninstall_index(apps, schema_editor):
+    from posts import search
+    search.backend().uninstall(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0015_post_image_variants'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchEntry',
+            fields=[
+                ('post', models.OneToOneField(db_column='rowid', on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_entry', serialize=False, to='posts.Post')),
+                ('text', posts.models.SearchDocument()),
+            ],
+            options={
+                'db_table': 'posts_post_fts',
+                'managed': False,
+            },
+        ),
+        migrations.RunPython(install_index, uninstall_index),
+    ]
@@ -1,4 +1,7 @@
+import json
+
 from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
 from django.db import models
 
 User = get_user_model()
@@ -53,14 +56,69 @@ class Post(models.Model):
         blank=True,
         help_text='Прикрепите картинку'
     )
+    thumbnail = models.CharField(
+        'Миниатюра',
+        max_length=255,
+        blank=True,
+        editable=False
+    )
+    image_variants = models.TextField(
+        'Варианты картинки',
+        blank=True,
+        editable=False
+    )
+    comment_count = models.PositiveIntegerField(
+        'Число комментариев',
+        default=0,
+        editable=False
+    )
+    trend = models.FloatField(
+        'Популярность',
+        default=0,
+        editable=False
+    )
 
     def __str__(self):
         return self.text[:15]
 
+    @property
+    def variants(self):
+        """{mime-тип: [(ширина, имя файла), ...]} из image_variants."""
+        try:
+            return json.loads(self.image_variants)
+        except ValueError:
+            return {}
+
+    @property
+    def image_sources(self):
+        """Пары (mime-тип, srcset) для тега <picture>, JPEG последним."""
+        return [
+            (mime, ', '.join(
+                f'{default_storage.url(name)} {width}w'
+                for width, name in files
+            ))
+            for mime, files in self.variants.items()
+        ]
+
     class Meta:
         ordering = ('-pub_date',)
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
+        indexes = [
+            # id в конце — под порядок страниц (-pub_date, -pk).
+            models.Index(
+                fields=['group', '-pub_date', '-id'],
+                name='post_group_pub_date_idx'
+            ),
+            models.Index(
+                fields=['author', '-pub_date', '-id'],
+                name='post_author_pub_date_idx'
+            ),
+            models.Index(
+                fields=['-trend', '-id'],
+                name='post_trend_idx'
+            ),
+        ]
 
 
 class Comment(models.Model):
@@ -93,6 +151,11 @@ class Comment(models.Model):
         ordering = ('-created',)
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
+        indexes = [
+            models.Index(
+                fields=['post', 'created'], name='comment_post_created_idx'
+            ),
+        ]
 
 
 class Follow(models.Model):
@@ -118,3 +181,133 @@ class Follow(models.Model):
         constraints = [
             models.UniqueConstraint(fields=['user', 'author'], name='name')
         ]
+        indexes = [
+            models.Index(
+                fields=['author', 'user'], name='follow_author_user_idx'
+            ),
+        ]
+
+
+class FeedEntry(models.Model):
+    """Запись материализованной ленты подписок пользователя."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='feed_entries',
+        verbose_name='Читатель'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='feed_entries',
+        verbose_name='Пост'
+    )
+    pub_date = models.DateTimeField('Время публикации')
+
+    def __str__(self):
+        return f'{self.user_id}: {self.post_id}'
+
+    class Meta:
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи ленты'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'post'], name='unique_feed_entry'
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date'], name='feed_user_pub_date_idx'
+            )
+        ]
+
+
+class AuthorStats(models.Model):
+    """Счётчики пользователя, которые иначе считались бы на каждый показ."""
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Пользователь'
+    )
+    posts_count = models.PositiveIntegerField('Постов', default=0)
+    followers_count = models.PositiveIntegerField('Подписчиков', default=0)
+    following_count = models.PositiveIntegerField('Подписок', default=0)
+    # Посты автора не раздаются по лентам, а подмешиваются при чтении.
+    pulled = models.BooleanField('Подмешивается в ленты', default=False)
+    last_post = models.DateTimeField(
+        'Последний пост',
+        blank=True,
+        null=True
+    )
+
+    def __str__(self):
+        return str(self.user_id)
+
+    class Meta:
+        verbose_name = 'Статистика автора'
+        verbose_name_plural = 'Статистика авторов'
+
+
+class Suggestion(models.Model):
+    """Автор, которого советуют читателю; строит build_recommendations."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='suggestions',
+        verbose_name='Читатель'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='suggested_to',
+        verbose_name='Автор'
+    )
+    rank = models.PositiveSmallIntegerField('Место')
+    score = models.FloatField('Оценка')
+
+    def __str__(self):
+        return f'{self.user_id}: {self.author_id}'
+
+    class Meta:
+        verbose_name = 'Рекомендация'
+        verbose_name_plural = 'Рекомендации'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'rank'], name='unique_suggestion_rank'
+            )
+        ]
+
+
+class SearchDocument(models.TextField):
+    """Колонка полнотекстового индекса, ищется через lookup match."""
+
+
+@SearchDocument.register_lookup
+class Match(models.Lookup):
+    lookup_name = 'match'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} MATCH {rhs}', lhs_params + rhs_params
+
+
+class SearchEntry(models.Model):
+    """
+    Строка виртуальной таблицы FTS5 с основами слов поста. Таблицу
+    создаёт миграция и только на SQLite, см. posts/search.py.
+    """
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.DO_NOTHING,
+        primary_key=True,
+        db_column='rowid',
+        related_name='search_entry'
+    )
+    text = SearchDocument()
+
+    class Meta:
+        managed = False
+        db_table = 'posts_post_fts'
@@ -0,0 +1,69 @@
+"""
+Кэш целых страниц лент.
+
+Страница рисуется один раз на версию лент без личных фрагментов
+(core.holes): вместо шапки, ссылок «редактировать запись», кнопки
+подписки и формы комментария в ней метки. Общее тело хранится в кэше
+PAGE_CACHE_ALIAS, ключ — версии лент и адрес страницы, поэтому запись
+в ленту просто меняет ключ. Вошедшему пользователю в тело
+подставляются его фрагменты; аноним получает готовую страницу,
+которая тоже хранится в кэше.
+"""
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+
+from core import holes
+
+from . import versions
+
+
+def _key(request, scopes):
+    parts = [str(stamp) for stamp in versions.get(*scopes)]
+    parts.append(request.get_full_path())
+    return 'page:' + hashlib.md5(':'.join(parts).encode()).hexdigest()
+
+
+def _render(view, request, *args, **kwargs):
+    """Общее тело страницы или None, если ответ не для кэша."""
+    with holes.within_holes(request):
+        response = view(request, *args, **kwargs)
+    if response.status_code != 200 or response.streaming:
+        return None
+    return response.content.decode(response.charset)
+
+
+def cached(scopes):
+    """
+    Декоратор view ленты. scopes получает аргументы view и возвращает
+    области лент, от которых зависит общее тело страницы.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+            cache = caches[settings.PAGE_CACHE_ALIAS]
+            key = _key(request, scopes(request, *args, **kwargs))
+            anonymous = not request.user.is_authenticated
+            if anonymous:
+                page = cache.get(f'{key}:anonymous')
+                if page is not None:
+                    return HttpResponse(page)
+            body = cache.get(key)
+            if body is None:
+                body = _render(view, request, *args, **kwargs)
+                if body is None:
+                    return view(request, *args, **kwargs)
+                cache.set(key, body, settings.FEED_CACHE_TIMEOUT)
+            page = holes.fill(request, body)
+            if anonymous:
+                cache.set(
+                    f'{key}:anonymous', page, settings.FEED_CACHE_TIMEOUT
+                )
+            return HttpResponse(page)
+        return wrapper
+    return decorator
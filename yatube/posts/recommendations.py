@@ -0,0 +1,185 @@
+"""
+Рекомендации «на кого подписаться».
+
+Оценка автора a для читателя u складывается из двух частей:
+- сколько авторов из подписок u сами подписаны на a — строка u
+  произведения F·F, где F — разреженная матрица подписок;
+- насколько группы, в которых пишет a, совпадают с интересами u —
+  косинус между долями постов a по группам и группами, в которых
+  пишет сам u и его авторы; берётся с весом
+  RECOMMENDATIONS_GROUP_WEIGHT.
+
+build() считает оценки по всему графу блоками строк и сохраняет
+RECOMMENDATIONS_TOP лучших авторов на читателя в Suggestion, откуда
+страницы берут их одним запросом по индексу. Блок оценок остаётся
+разреженным, а строки пишутся пачками по мере расчёта во временную
+таблицу, так что память не растёт с числом читателей.
+"""
+from itertools import chain, islice
+
+import numpy as np
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count
+from scipy import sparse
+
+from . import graph, versions
+from .models import Follow, Post, Suggestion, User
+
+BLOCK_SIZE = 500
+WRITE_BATCH = 5000
+
+STAGING = 'suggestion_staging'
+STAGING_SQL = f"""
+    CREATE TEMPORARY TABLE {STAGING} (
+        user_id integer NOT NULL,
+        author_id integer NOT NULL,
+        rank integer NOT NULL,
+        score double precision NOT NULL
+    )
+"""
+# Пользователи могли удалиться, пока шёл расчёт.
+SWAP_SQL = """
+    INSERT INTO {suggestions} (user_id, author_id, rank, score)
+    SELECT staged.user_id, staged.author_id, staged.rank, staged.score
+    FROM {staging} staged
+    WHERE EXISTS (SELECT 1 FROM {users} WHERE id = staged.user_id)
+    AND EXISTS (SELECT 1 FROM {users} WHERE id = staged.author_id)
+""".format(
+    suggestions=Suggestion._meta.db_table,
+    staging=STAGING,
+    users=User._meta.db_table,
+)
+
+
+def _columns(queryset, width):
+    """values_list в виде массива numpy формы (строки, width)."""
+    flat = chain.from_iterable(queryset.iterator())
+    return np.fromiter(flat, dtype=np.int64).reshape(-1, width)
+
+
+def _normalize(matrix):
+    """Нормирует строки разреженной матрицы по длине."""
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1))).ravel()
+    norms[norms == 0] = 1
+    return sparse.diags((1 / norms).astype(matrix.dtype)) @ matrix
+
+
+def follow_matrix(size):
+    pairs = _columns(Follow.objects.values_list('user_id', 'author_id'), 2)
+    return sparse.csr_matrix(
+        (np.ones(len(pairs), dtype=np.float32), (pairs[:, 0], pairs[:, 1])),
+        shape=(size, size)
+    )
+
+
+def group_matrix(size):
+    """Доли постов пользователей по группам, строки единичной длины."""
+    rows = _columns(Post.objects.filter(group__isnull=False).order_by(
+    ).values('author_id', 'group_id').annotate(
+        total=Count('pk')
+    ).values_list('author_id', 'group_id', 'total'), 3)
+    groups = int(rows[:, 1].max()) + 1 if len(rows) else 1
+    matrix = sparse.csr_matrix(
+        (np.log1p(rows[:, 2]).astype(np.float32), (rows[:, 0], rows[:, 1])),
+        shape=(size, groups)
+    )
+    return _normalize(matrix).tocsr()
+
+
+def scores(follows, groups, start, end):
+    """Разреженный блок оценок для читателей с id от start до end."""
+    readers = follows[start:end]
+    interests = _normalize(groups[start:end] + readers @ groups)
+    block = readers @ follows + settings.RECOMMENDATIONS_GROUP_WEIGHT * (
+        interests @ groups.T
+    )
+    block = sparse.csr_matrix(block)
+    # Уже прочитанные авторы и сам читатель не советуются.
+    for row in range(end - start):
+        low, high = block.indptr[row], block.indptr[row + 1]
+        seen = readers.indices[readers.indptr[row]:readers.indptr[row + 1]]
+        columns = block.indices[low:high]
+        block.data[low:high][
+            np.isin(columns, seen) | (columns == start + row)
+        ] = 0
+    block.eliminate_zeros()
+    block.sort_indices()
+    return block
+
+
+def top(block, count):
+    """
+    (строка, столбцы, оценки) count лучших ненулевых столбцов каждой
+    непустой строки разреженного блока, по убыванию оценки.
+    """
+    for row in range(block.shape[0]):
+        low, high = block.indptr[row], block.indptr[row + 1]
+        if low == high:
+            continue
+        values = block.data[low:high]
+        best = np.arange(high - low)
+        if len(best) > count:
+            best = np.argpartition(-values, count - 1)[:count]
+        best = best[np.argsort(-values[best], kind='stable')]
+        yield row, block.indices[low:high][best], values[best]
+
+
+def compute(count=None, block_size=BLOCK_SIZE):
+    """Строки (читатель, автор, место, оценка) по всему графу."""
+    count = count or settings.RECOMMENDATIONS_TOP
+    size = (User.objects.order_by('-pk').values_list(
+        'pk', flat=True
+    ).first() or 0) + 1
+    follows = follow_matrix(size)
+    groups = group_matrix(size)
+    for start in range(0, size, block_size):
+        end = min(start + block_size, size)
+        block = scores(follows, groups, start, end)
+        for offset, authors, values in top(block, count):
+            for rank, (author, score) in enumerate(zip(authors, values)):
+                yield start + offset, int(author), rank, float(score)
+
+
+def build(count=None, block_size=BLOCK_SIZE):
+    """
+    Пересчитывает Suggestion целиком, возвращает число строк. Оценки
+    копятся во временной таблице соединения вне транзакции, и только
+    замена строк Suggestion идёт в короткой транзакции: запись в базу
+    не блокируется на время расчёта.
+    """
+    rows = compute(count, block_size)
+    with connection.cursor() as cursor:
+        cursor.execute(f'DROP TABLE IF EXISTS {STAGING}')
+        cursor.execute(STAGING_SQL)
+        try:
+            while True:
+                batch = list(islice(rows, WRITE_BATCH))
+                if not batch:
+                    break
+                cursor.executemany(
+                    f'INSERT INTO {STAGING} VALUES (%s, %s, %s, %s)', batch
+                )
+            with transaction.atomic():
+                Suggestion.objects.all().delete()
+                cursor.execute(SWAP_SQL)
+                written = cursor.rowcount
+        finally:
+            cursor.execute(f'DROP TABLE {STAGING}')
+    versions.bump(versions.RECOMMENDATIONS)
+    return written
+
+
+def for_user(user, limit=None):
+    """
+    Авторы, которых стоит показать user. Подписки, сделанные после
+    расчёта, отсеиваются по графу в кэше.
+    """
+    limit = limit or settings.RECOMMENDATIONS_SHOWN
+    suggestions = Suggestion.objects.filter(user=user).select_related(
+        'author'
+    ).order_by('rank')[:limit * 2]
+    return [
+        suggestion.author for suggestion in suggestions
+        if not graph.is_following(user.pk, suggestion.author_id)
+    ][:limit]
@@ -0,0 +1,153 @@
+"""
+Полнотекстовый поиск по постам.
+
+Текст поста раскладывается на основы слов русским стеммером Snowball,
+поэтому «котами» находит «кот». Индекс ведёт бэкенд из
+settings.SEARCH_BACKEND, сигналы держат его в актуальном состоянии.
+Результат поиска — queryset постов с аннотацией score (чем больше, тем
+релевантнее), его листает CursorPaginator с key='score'.
+"""
+import re
+from functools import lru_cache
+
+import snowballstemmer
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+from .models import Post, SearchEntry
+
+WORD = re.compile(r'\w+')
+INDEX_BATCH = 1000
+STEM_CACHE_SIZE = 100000
+
+_stemmer = snowballstemmer.stemmer('russian')
+
+
+@lru_cache(maxsize=STEM_CACHE_SIZE)
+def stem(word):
+    # Словарь живого текста невелик, а стеммер медленный: повторные
+    # слова берутся из кэша.
+    return _stemmer.stemWord(word)
+
+
+def terms(text):
+    """Основы слов текста в порядке появления."""
+    words = WORD.findall(text.lower().replace('ё', 'е'))
+    return [stem(word) for word in words]
+
+
+class SearchBackend:
+    """Интерфейс поискового индекса. Базовая версия индекса не ведёт."""
+
+    def install(self, connection):
+        """Создаёт хранилище индекса; вызывается из миграции."""
+
+    def uninstall(self, connection):
+        """Удаляет хранилище индекса."""
+
+    def index(self, posts):
+        """Добавляет или обновляет посты в индексе."""
+
+    def remove(self, post_ids):
+        """Убирает посты из индекса."""
+
+    def rebuild(self):
+        """Переиндексирует все посты."""
+
+    def search(self, posts, query):
+        """Отбирает из posts подходящие под запрос и добавляет score."""
+        words = terms(query)
+        if not words:
+            return posts.annotate(score=Value(0.0, FloatField())).none()
+        return self.matching(posts, words)
+
+    def matching(self, posts, words):
+        raise NotImplementedError
+
+
+class DatabaseBackend(SearchBackend):
+    """
+    Поиск без индекса: все основы слов должны встречаться в тексте.
+    Запасной вариант для СУБД, под которые нет своего бэкенда.
+    """
+
+    def matching(self, posts, words):
+        condition = Q()
+        for word in words:
+            condition &= Q(text__icontains=word)
+        return posts.filter(condition).annotate(
+            score=Value(0.0, FloatField())
+        )
+
+
+class SqliteBackend(SearchBackend):
+    """
+    Индекс в виртуальной таблице FTS5, rowid строки равен id поста.
+    В таблицу пишутся основы слов, ранжирование — встроенный bm25.
+    """
+    table = SearchEntry._meta.db_table
+
+    def install(self, connection):
+        if connection.vendor != 'sqlite':
+            return
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE VIRTUAL TABLE IF NOT EXISTS {self.table} '
+                "USING fts5(text, tokenize='unicode61 remove_diacritics 2')"
+            )
+
+    def uninstall(self, connection):
+        if connection.vendor != 'sqlite':
+            return
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP TABLE IF EXISTS {self.table}')
+
+    def _write(self, cursor, posts):
+        rows = [(post.pk, ' '.join(terms(post.text))) for post in posts]
+        cursor.executemany(
+            f'DELETE FROM {self.table} WHERE rowid = %s',
+            [(pk,) for pk, text in rows]
+        )
+        cursor.executemany(
+            f'INSERT INTO {self.table} (rowid, text) VALUES (%s, %s)', rows
+        )
+
+    def index(self, posts):
+        with connection.cursor() as cursor:
+            self._write(cursor, posts)
+
+    def remove(self, post_ids):
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'DELETE FROM {self.table} WHERE rowid = %s',
+                [(pk,) for pk in post_ids]
+            )
+
+    def rebuild(self):
+        posts = Post.objects.order_by('pk').only('text')
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table}')
+            last = 0
+            while True:
+                batch = list(posts.filter(pk__gt=last)[:INDEX_BATCH])
+                if not batch:
+                    break
+                self._write(cursor, batch)
+                last = batch[-1].pk
+            cursor.execute(
+                f"INSERT INTO {self.table} ({self.table}) VALUES ('optimize')"
+            )
+
+    def matching(self, posts, words):
+        # Каждая основа в кавычках: синтаксис FTS5 из запроса не читается.
+        expression = ' '.join(f'"{word}"' for word in words)
+        return posts.filter(search_entry__text__match=expression).annotate(
+            score=RawSQL(f'-bm25({self.table})', (), FloatField())
+        )
+
+
+def backend():
+    return import_string(settings.SEARCH_BACKEND)()
@@ -0,0 +1,108 @@
+import threading
+
+from django.db.models import F
+from django.db.models.signals import (post_delete, post_save, pre_delete,
+                                      pre_save)
+from django.dispatch import receiver
+
+from . import feed, graph, search, stats, trending, versions
+from .models import Comment, Follow, Group, Post
+
+# id постов, удаляемых сейчас в этом потоке: их комментарии уходят
+# каскадом, и править счётчик поста, который вот-вот исчезнет, незачем.
+_deleting = threading.local()
+
+
+def _deleting_posts():
+    if not hasattr(_deleting, 'posts'):
+        _deleting.posts = set()
+    return _deleting.posts
+
+
+@receiver(pre_save, sender=Post)
+def post_changing(sender, instance, **kwargs):
+    if instance.pk is not None:
+        instance._old_group_id = Post.objects.filter(
+            pk=instance.pk
+        ).values_list('group_id', flat=True).first()
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, **kwargs):
+    if created:
+        stats.post_added(instance)
+        trending.post_published(instance)
+        followers = feed.fan_out(instance)
+    else:
+        followers = feed.pushed_followers(instance.author_id)
+    search.backend().index([instance])
+    versions.bump_post(instance, followers)
+
+
+@receiver(pre_delete, sender=Post)
+def post_deleting(sender, instance, **kwargs):
+    _deleting_posts().add(instance.pk)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    _deleting_posts().discard(instance.pk)
+    stats.post_removed(instance)
+    search.backend().remove([instance.pk])
+    versions.bump_post(
+        instance, feed.pushed_followers(instance.author_id)
+    )
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, **kwargs):
+    if created:
+        Post.objects.filter(pk=instance.post_id).update(
+            comment_count=F('comment_count') + 1,
+            trend=trending.commented()
+        )
+    versions.bump(versions.post(instance.post_id))
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    # Удаление через админку или каскадом вместе с автором.
+    if instance.post_id in _deleting_posts():
+        return
+    # Счётчик мог разойтись с таблицей (bulk_create), ниже нуля не падает.
+    Post.objects.filter(pk=instance.post_id, comment_count__gt=0).update(
+        comment_count=F('comment_count') - 1
+    )
+    versions.bump(versions.post(instance.post_id))
+
+
+@receiver(post_save, sender=Group)
+def group_saved(sender, instance, **kwargs):
+    versions.bump(versions.GLOBAL, versions.group(instance.pk))
+
+
+@receiver(post_save, sender=Follow)
+def follow_created(sender, instance, created, **kwargs):
+    if created:
+        stats.follow_added(instance)
+        graph.changed(instance.user_id, added=[instance.author_id])
+        graph.recount([instance.author_id])
+        feed.backfill(instance.user_id, instance.author_id)
+        versions.bump(
+            versions.follower(instance.user_id),
+            versions.author(instance.author_id)
+        )
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    stats.follow_removed(instance)
+    graph.changed(instance.user_id, removed=[instance.author_id])
+    graph.recount([instance.author_id])
+    feed.prune(instance.user_id, instance.author_id)
+    restored = feed.restore([instance.author_id])
+    versions.bump(
+        versions.follower(instance.user_id),
+        versions.author(instance.author_id),
+        *[versions.follower(user_id) for user_id in restored]
+    )
@@ -0,0 +1,166 @@
+"""
+Денормализованные счётчики AuthorStats.
+
+Обновляются сигналами на создание и удаление Post и Follow через
+F-выражения, поэтому параллельные запросы не затирают друг друга.
+rebuild() пересчитывает счётчики из исходных таблиц.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import AuthorStats, Follow, Post, User
+
+BATCH_SIZE = 1000
+FIELDS = ('posts_count', 'followers_count', 'following_count', 'last_post')
+
+
+def _ensure(*user_ids):
+    AuthorStats.objects.bulk_create(
+        [AuthorStats(user_id=user_id) for user_id in user_ids],
+        ignore_conflicts=True
+    )
+
+
+def _shift(user_id, **deltas):
+    AuthorStats.objects.filter(user_id=user_id).update(**{
+        field: F(field) + delta for field, delta in deltas.items()
+    })
+
+
+def post_added(post):
+    _ensure(post.author_id)
+    _shift(post.author_id, posts_count=1)
+    AuthorStats.objects.filter(user_id=post.author_id).update(
+        last_post=post.pub_date
+    )
+
+
+def post_removed(post):
+    _shift(post.author_id, posts_count=-1)
+    last_post = Post.objects.filter(
+        author_id=post.author_id
+    ).aggregate(last=Max('pub_date'))['last']
+    AuthorStats.objects.filter(user_id=post.author_id).update(
+        last_post=last_post
+    )
+
+
+def _mark_pulled(author_ids):
+    """Авторы, перешедшие порог раздачи, дальше подмешиваются."""
+    AuthorStats.objects.filter(
+        user_id__in=author_ids, pulled=False,
+        followers_count__gt=settings.FEED_FANOUT_MAX_FOLLOWERS
+    ).update(pulled=True)
+
+
+def follow_added(follow):
+    _ensure(follow.user_id, follow.author_id)
+    _shift(follow.author_id, followers_count=1)
+    _shift(follow.user_id, following_count=1)
+    _mark_pulled([follow.author_id])
+
+
+def follow_removed(follow):
+    _shift(follow.author_id, followers_count=-1)
+    _shift(follow.user_id, following_count=-1)
+
+
+def follows_added(user_id, author_ids):
+    """Счётчики после подписки user_id сразу на многих авторов."""
+    _ensure(user_id, *author_ids)
+    AuthorStats.objects.filter(user_id__in=author_ids).update(
+        followers_count=F('followers_count') + 1
+    )
+    _shift(user_id, following_count=len(author_ids))
+    _mark_pulled(author_ids)
+
+
+def follows_removed(user_id, author_ids):
+    AuthorStats.objects.filter(user_id__in=author_ids).update(
+        followers_count=F('followers_count') - 1
+    )
+    _shift(user_id, following_count=-len(author_ids))
+
+
+def _computed(users):
+    """Пользователи с посчитанными из исходных таблиц счётчиками."""
+    def counted(queryset, field):
+        return Coalesce(Subquery(
+            queryset.filter(**{field: OuterRef('pk')}).order_by().values(
+                field
+            ).annotate(total=Count('pk')).values('total')
+        ), 0)
+
+    return users.annotate(
+        real_posts_count=counted(Post.objects, 'author'),
+        real_followers_count=counted(Follow.objects, 'author'),
+        real_following_count=counted(Follow.objects, 'user'),
+        real_last_post=Subquery(
+            Post.objects.filter(author=OuterRef('pk')).order_by(
+                '-pub_date'
+            ).values('pub_date')[:1]
+        ),
+    ).order_by('pk')
+
+
+def for_user(user):
+    """Счётчики пользователя; отсутствующая строка считается на лету."""
+    try:
+        return user.stats
+    except AuthorStats.DoesNotExist:
+        rebuild(User.objects.filter(pk=user.pk))
+        return AuthorStats.objects.get(user=user)
+
+
+def _batches(users):
+    batch = []
+    for user in _computed(users).iterator(chunk_size=BATCH_SIZE):
+        batch.append(user)
+        if len(batch) == BATCH_SIZE:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def rebuild(users=None):
+    """Пересчитывает счётчики пачками, возвращает число строк."""
+    if users is None:
+        users = User.objects.all()
+    total = 0
+    for batch in _batches(users):
+        rows = [
+            AuthorStats(user_id=user.pk, pulled=(
+                user.real_followers_count
+                > settings.FEED_FANOUT_MAX_FOLLOWERS
+            ), **{
+                field: getattr(user, f'real_{field}') for field in FIELDS
+            })
+            for user in batch
+        ]
+        with transaction.atomic():
+            AuthorStats.objects.filter(
+                user_id__in=[row.user_id for row in rows]
+            ).delete()
+            AuthorStats.objects.bulk_create(rows)
+        total += len(rows)
+    return total
+
+
+def verify(users=None):
+    """Возвращает (user_id, поле, сохранено, реально) для расхождений."""
+    if users is None:
+        users = User.objects.all()
+    mismatches = []
+    for batch in _batches(users):
+        stored = AuthorStats.objects.in_bulk([user.pk for user in batch])
+        for user in batch:
+            stats = stored.get(user.pk)
+            for field in FIELDS:
+                saved = getattr(stats, field) if stats else None
+                real = getattr(user, f'real_{field}')
+                if saved != real and (stats or real):
+                    mismatches.append((user.pk, field, saved, real))
+    return mismatches
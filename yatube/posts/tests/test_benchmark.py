@@ -0,0 +1,84 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.core.management import CommandError, call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.management.commands.benchmark_views import Command
+from posts.models import Post
+
+TEMP_DIR = tempfile.mkdtemp(dir=settings.BASE_DIR)
+VIEWS = (
+    'index', 'group_posts', 'profile', 'post_detail', 'follow_index',
+    'post_create', 'add_comment',
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_DIR)
+class BenchmarkTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        call_command(
+            'seed_yatube', users=20, groups=2, posts=100, comments=100,
+            follows=5, seed=1, stdout=StringIO()
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_DIR, ignore_errors=True)
+
+    def run_benchmark(self, name, **options):
+        path = os.path.join(TEMP_DIR, name)
+        call_command(
+            'benchmark_views', requests=3, output=path,
+            stdout=StringIO(), stderr=StringIO(), **options
+        )
+        with open(path, encoding='utf-8') as result:
+            return path, json.load(result)
+
+    def test_report(self):
+        """Отчёт содержит метрики всех страниц, записи откатываются"""
+        posts_count = Post.objects.count()
+        path, report = self.run_benchmark('first.json')
+        self.assertEqual(tuple(report['views']), VIEWS)
+        for name, metrics in report['views'].items():
+            with self.subTest(view=name):
+                self.assertLess(metrics['status'], 400)
+                self.assertLessEqual(metrics['p50_ms'], metrics['p99_ms'])
+                self.assertGreater(metrics['queries'], 0)
+                self.assertGreater(metrics['peak_kb'], 0)
+        self.assertEqual(report['meta']['rows']['Post'], posts_count)
+        self.assertEqual(Post.objects.count(), posts_count)
+
+    def test_compare(self):
+        """Рост числа запросов сверх порога считается регрессией"""
+        path, report = self.run_benchmark('baseline.json')
+        self.run_benchmark('same.json', compare=path, threshold=1000)
+        for metrics in report['views'].values():
+            metrics['queries'] /= 4
+        with open(path, 'w', encoding='utf-8') as baseline:
+            json.dump(report, baseline)
+        with self.assertRaisesMessage(CommandError, 'index queries'):
+            self.run_benchmark('worse.json', compare=path, threshold=200)
+
+    def test_rollback_only_writes(self):
+        """Чтения идут без транзакции, записи — в откатываемой"""
+        command = Command()
+        client = Client()
+        path = 'posts.management.commands.benchmark_views.transaction'
+        with mock.patch(path) as transaction:
+            command.request(client, 'get', reverse('posts:index'), None,
+                            cold=False)
+            transaction.atomic.assert_not_called()
+            command.request(client, 'post', reverse('posts:post_create'),
+                            {'text': 'Пост'}, cold=False)
+            transaction.atomic.assert_called_once()
+            transaction.set_rollback.assert_called_once_with(True)
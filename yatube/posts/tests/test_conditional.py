@@ -0,0 +1,143 @@
+from itertools import count
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache, caches
+from django.db import transaction
+from django.test import (Client, SimpleTestCase, TestCase,
+                         TransactionTestCase, override_settings)
+from django.urls import reverse
+
+from posts import recommendations, versions
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Коты', slug='cats', description='-'
+        )
+        cls.post = Post.objects.create(
+            text='Пост', author=cls.author, group=cls.group
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def revalidate(self, url, client=None):
+        """Статус повторного запроса с ETag первого ответа."""
+        client = client or self.client
+        etag = client.get(url)['ETag']
+        return lambda: client.get(url, HTTP_IF_NONE_MATCH=etag).status_code
+
+    def test_unchanged_pages_not_modified(self):
+        """Неизменившиеся страницы отдают 304 без запросов к БД"""
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', args=['cats']),
+            reverse('posts:profile', args=['author']),
+            reverse('posts:post_detail', args=[self.post.pk]),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                status = self.revalidate(url)
+                with self.assertNumQueries(0 if url == urls[0] else 1):
+                    self.assertEqual(status(), 304)
+
+    def test_changes_refresh_pages(self):
+        """Пост, комментарий и подписка меняют ETag затронутых страниц"""
+        index = self.revalidate(reverse('posts:index'))
+        detail = self.revalidate(
+            reverse('posts:post_detail', args=[self.post.pk])
+        )
+        profile = self.revalidate(reverse('posts:profile', args=['author']))
+        Comment.objects.create(post=self.post, author=self.reader, text='Да')
+        self.assertEqual(detail(), 200)
+        self.assertEqual(index(), 304)
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.assertEqual(profile(), 200)
+        Post.objects.create(text='Новый', author=self.reader)
+        self.assertEqual(index(), 200)
+
+    def test_if_modified_since(self):
+        url = reverse('posts:group_list', args=['cats'])
+        response = self.client.get(url)
+        cached = self.client.get(
+            url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+        )
+        self.assertEqual(cached.status_code, 304)
+
+    @override_settings(FEED_PROXY_MAX_AGE=120)
+    def test_cache_headers(self):
+        """Анонимам — общий кэш прокси, вошедшим — личный"""
+        url = reverse('posts:index')
+        anonymous = self.client.get(url)
+        self.assertIn('public', anonymous['Cache-Control'])
+        self.assertIn('s-maxage=120', anonymous['Cache-Control'])
+        self.assertIn('Cookie', anonymous['Vary'])
+        self.client.force_login(self.reader)
+        logged_in = self.client.get(url)
+        self.assertIn('private', logged_in['Cache-Control'])
+        self.assertNotEqual(anonymous['ETag'], logged_in['ETag'])
+        missing = self.client.get(reverse('posts:profile', args=['nobody']))
+        self.assertEqual(missing.status_code, 404)
+        self.assertFalse(missing.has_header('ETag'))
+
+    def test_new_login_refreshes_pages(self):
+        """После повторного входа страница с формой приходит заново"""
+        detail = reverse('posts:post_detail', args=[self.post.pk])
+        self.client.force_login(self.reader)
+        status = self.revalidate(detail)
+        self.assertEqual(status(), 304)
+        self.client.logout()
+        self.client.force_login(self.reader)
+        self.assertEqual(status(), 200)
+
+    def test_reader_follow_state(self):
+        """Своя подписка и пересчёт рекомендаций меняют ETag профиля"""
+        self.client.force_login(self.reader)
+        other = self.revalidate(reverse('posts:profile', args=['author']))
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.assertEqual(other(), 200)
+        own = self.revalidate(reverse('posts:profile', args=['reader']))
+        recommendations.build()
+        self.assertEqual(own(), 200)
+
+
+class VersionCommitTests(TransactionTestCase):
+    def setUp(self):
+        caches['versions'].clear()
+
+    @mock.patch('posts.versions._now', side_effect=count(1))
+    def test_bumped_again_on_commit(self, now):
+        """Версия, взятая до коммита записи, после коммита устаревает"""
+        with transaction.atomic():
+            versions.bump(versions.GLOBAL)
+            inside = versions.get(versions.GLOBAL)
+        self.assertGreater(versions.get(versions.GLOBAL), inside)
+        versions.bump(versions.GLOBAL)
+        self.assertEqual(now.call_count, 3)
+
+
+class VersionCacheTests(SimpleTestCase):
+    def setUp(self):
+        caches['versions'].clear()
+
+    def test_versions_not_culled(self):
+        """Версии лент читателей не вытесняют версию общей ленты"""
+        stamp = versions.get(versions.GLOBAL, versions.group(1))
+        for start in range(0, 5000, 500):
+            versions.bump(*(
+                versions.follower(user_id)
+                for user_id in range(start, start + 500)
+            ))
+        self.assertEqual(
+            versions.get(versions.GLOBAL, versions.group(1)), stamp
+        )
@@ -0,0 +1,98 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts import follows
+from posts.models import FeedEntry, Follow, Post
+
+User = get_user_model()
+
+
+class FollowFeedTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.old_post = Post.objects.create(
+            text='Старый пост', author=cls.author
+        )
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def feed(self):
+        response = self.client.get(reverse('posts:follow_index'))
+        return list(response.context['page_obj'])
+
+    def test_backfill_and_fan_out(self):
+        """Подписка заполняет ленту, новые посты раздаются подписчикам"""
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.assertEqual(self.feed(), [self.old_post])
+        new_post = Post.objects.create(text='Новый пост', author=self.author)
+        self.assertTrue(FeedEntry.objects.filter(
+            user=self.reader, post=new_post
+        ).exists())
+        self.assertEqual(self.feed(), [new_post, self.old_post])
+
+    def test_prune_on_unfollow(self):
+        """Отписка убирает посты автора из ленты"""
+        self.client.get(reverse(
+            'posts:profile_follow', kwargs={'username': 'author'}
+        ))
+        self.client.get(reverse(
+            'posts:profile_unfollow', kwargs={'username': 'author'}
+        ))
+        self.assertFalse(FeedEntry.objects.filter(user=self.reader).exists())
+        self.assertEqual(self.feed(), [])
+
+    @override_settings(FEED_FANOUT_MAX_FOLLOWERS=0)
+    def test_pulled_author(self):
+        """Посты популярных авторов подмешиваются при чтении"""
+        Follow.objects.create(user=self.reader, author=self.author)
+        new_post = Post.objects.create(text='Новый пост', author=self.author)
+        self.assertFalse(FeedEntry.objects.exists())
+        self.assertEqual(self.feed(), [new_post, self.old_post])
+
+    @override_settings(FEED_FANOUT_MAX_FOLLOWERS=1)
+    def test_author_drops_below_threshold(self):
+        """Посты, вышедшие, пока автор был популярным, остаются в ленте"""
+        cache.clear()
+        others = [
+            User.objects.create_user(username=f'other{number}')
+            for number in range(2)
+        ]
+        Follow.objects.create(user=self.reader, author=self.author)
+        Follow.objects.create(user=others[0], author=self.author)
+        new_post = Post.objects.create(text='Новый пост', author=self.author)
+        self.assertFalse(FeedEntry.objects.filter(post=new_post).exists())
+        Follow.objects.filter(user=others[0]).delete()
+        self.assertEqual(self.feed(), [new_post, self.old_post])
+        Follow.objects.create(user=others[1], author=self.author)
+        follows.unfollow(others[1], ['author'])
+        self.assertEqual(self.feed(), [new_post, self.old_post])
+
+    @override_settings(FEED_FANOUT_MAX_FOLLOWERS=2)
+    def test_author_jumps_below_threshold(self):
+        """Автор, проскочивший порог за раз, снова раздаётся"""
+        cache.clear()
+        others = [
+            User.objects.create_user(username=f'other{number}')
+            for number in range(3)
+        ]
+        for user in (self.reader, *others):
+            Follow.objects.create(user=user, author=self.author)
+        new_post = Post.objects.create(text='Новый пост', author=self.author)
+        # Параллельные отписки: их restore() видел ещё число выше порога.
+        with mock.patch('posts.feed.restore', return_value=[]):
+            follows.unfollow(others[0], ['author'])
+            follows.unfollow(others[1], ['author'])
+        follows.unfollow(others[2], ['author'])
+        self.assertTrue(FeedEntry.objects.filter(
+            user=self.reader, post=new_post
+        ).exists())
+        self.assertEqual(self.feed(), [new_post, self.old_post])
@@ -0,0 +1,123 @@
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts import follows, stats
+from posts.models import FeedEntry, Follow, Post
+from posts.tests.utils import query_budget
+
+User = get_user_model()
+
+
+class BulkFollowTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+        User.objects.bulk_create([
+            User(username=f'author{number}') for number in range(30)
+        ])
+        cls.authors = list(User.objects.filter(username__startswith='author'))
+        for author in cls.authors[:3]:
+            Post.objects.create(text='Пост', author=author)
+
+    def names(self, count):
+        return [author.username for author in self.authors[:count]]
+
+    def write_names(self, names):
+        source = tempfile.NamedTemporaryFile(
+            'w', suffix='.txt', delete=False, encoding='utf-8'
+        )
+        with source:
+            source.write('\n'.join(names))
+        self.addCleanup(os.remove, source.name)
+        return source.name
+
+    def test_parse(self):
+        self.assertEqual(
+            follows.parse('@a, b\nc;a  b'), ['a', 'b', 'c']
+        )
+
+    def test_follow_in_bulk(self):
+        """Подписки, счётчики и лента пишутся пачкой"""
+        Follow.objects.create(user=self.reader, author=self.authors[0])
+        names = self.names(30) + ['ghost', 'reader']
+        with query_budget(20):
+            outcome = follows.follow(self.reader, names)
+        self.assertEqual(outcome.changed, 29)
+        self.assertEqual(outcome.unchanged, 2)
+        self.assertEqual(outcome.missing, ['ghost'])
+        self.assertEqual(Follow.objects.filter(user=self.reader).count(), 30)
+        self.assertEqual(FeedEntry.objects.filter(user=self.reader).count(), 3)
+        self.assertEqual(stats.verify(), [])
+
+    def test_follow_after_lock(self):
+        """Подписка, записанная до блокировки, не считается повторно"""
+        def concurrent_follow(user):
+            lock(user)
+            Follow.objects.create(user=user, author=self.authors[0])
+
+        lock = follows.lock
+        with mock.patch('posts.follows.lock', side_effect=concurrent_follow):
+            outcome = follows.follow(self.reader, self.names(2))
+        self.assertEqual(outcome.changed, 1)
+        self.assertEqual(outcome.unchanged, 1)
+        self.assertEqual(stats.verify(), [])
+
+    @override_settings(FEED_FANOUT_MAX_FOLLOWERS=0)
+    def test_pulled_authors_not_backfilled(self):
+        follows.follow(self.reader, self.names(3))
+        self.assertFalse(FeedEntry.objects.exists())
+
+    def test_chunks(self):
+        """Длинный список разбирается пачками"""
+        with mock.patch.object(follows, 'CHUNK_SIZE', 7):
+            outcome = follows.follow(self.reader, self.names(30))
+        self.assertEqual(outcome.changed, 30)
+        self.assertEqual(stats.verify(), [])
+
+    def test_unfollow_in_bulk(self):
+        """Отписка пачкой правит счётчики и ленту"""
+        follows.follow(self.reader, self.names(10))
+        outcome = follows.unfollow(self.reader, self.names(5) + ['ghost'])
+        self.assertEqual(outcome, (5, 0, ['ghost']))
+        self.assertEqual(Follow.objects.filter(user=self.reader).count(), 5)
+        self.assertFalse(FeedEntry.objects.filter(user=self.reader).exists())
+        self.assertEqual(stats.verify(), [])
+
+    def test_view(self):
+        client = Client()
+        client.force_login(self.reader)
+        response = client.post(reverse('posts:follow_import'), {
+            'usernames': ' '.join(self.names(4) + ['ghost']),
+        })
+        self.assertEqual(response.context['outcome'].changed, 4)
+        self.assertContains(response, 'ghost')
+        feed = client.get(reverse('posts:follow_index'))
+        self.assertEqual(len(feed.context['page_obj']), 3)
+
+    @override_settings(FOLLOW_IMPORT_MAX=2)
+    def test_view_limit(self):
+        client = Client()
+        client.force_login(self.reader)
+        response = client.post(reverse('posts:follow_import'), {
+            'usernames': ' '.join(self.names(3)),
+        })
+        self.assertFalse(response.context['form'].is_valid())
+        self.assertFalse(Follow.objects.exists())
+
+    def test_command(self):
+        output = StringIO()
+        path = self.write_names(self.names(5))
+        call_command('import_follows', 'reader', path, stdout=output)
+        self.assertIn('Изменено подписок: 5', output.getvalue())
+        call_command(
+            'import_follows', 'reader', path, unfollow=True, stdout=output
+        )
+        self.assertFalse(Follow.objects.exists())
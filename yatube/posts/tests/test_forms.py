@@ -165,3 +165,6 @@ class PostFormTests(TestCase):
                 text='Тестовый коммент'
             ).exists()
         )
+        self.assertEqual(Post.objects.get(pk=1).comment_count, 1)
+        Comment.objects.filter(text='Тестовый коммент').delete()
+        self.assertEqual(Post.objects.get(pk=1).comment_count, 0)
@@ -0,0 +1,117 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.db import transaction
+from django.test import Client, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts import follows, graph
+from posts.models import Follow
+
+User = get_user_model()
+
+
+class FollowGraphTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.reader = User.objects.create_user(username='reader')
+        self.authors = [
+            User.objects.create_user(username=f'author{number}')
+            for number in range(3)
+        ]
+
+    def test_lookup_without_queries(self):
+        """После первого чтения подписки берутся из кэша"""
+        Follow.objects.create(user=self.reader, author=self.authors[1])
+        graph.following(self.reader.pk)
+        with self.assertNumQueries(0):
+            self.assertTrue(
+                graph.is_following(self.reader.pk, self.authors[1].pk)
+            )
+            self.assertFalse(
+                graph.is_following(self.reader.pk, self.authors[0].pk)
+            )
+
+    def test_incremental_updates(self):
+        """Подписка и отписка правят запись в кэше, а не сбрасывают её"""
+        graph.following(self.reader.pk)
+        Follow.objects.create(user=self.reader, author=self.authors[2])
+        Follow.objects.create(user=self.reader, author=self.authors[0])
+        with self.assertNumQueries(0):
+            self.assertEqual(list(graph.following(self.reader.pk)), [
+                self.authors[0].pk, self.authors[2].pk
+            ])
+        Follow.objects.filter(author=self.authors[2]).delete()
+        follows.follow(self.reader, ['author1'])
+        with self.assertNumQueries(0):
+            self.assertEqual(list(graph.following(self.reader.pk)), [
+                self.authors[0].pk, self.authors[1].pk
+            ])
+
+    def test_changed_after_commit(self):
+        """Запись правится только после коммита транзакции"""
+        graph.following(self.reader.pk)
+        with transaction.atomic():
+            Follow.objects.create(user=self.reader, author=self.authors[0])
+            self.assertEqual(list(graph.following(self.reader.pk)), [])
+        self.assertEqual(
+            list(graph.following(self.reader.pk)), [self.authors[0].pk]
+        )
+
+    def test_change_waits_for_lock(self):
+        """Правка при занятой блокировке дожидается её"""
+        graph.following(self.reader.pk)
+        lock = graph._lock_key(self.reader.pk)
+        cache.add(lock, 1)
+        with mock.patch('posts.graph.time.sleep') as sleep:
+            sleep.side_effect = lambda seconds: cache.delete(lock)
+            graph.changed(self.reader.pk, added=[self.authors[0].pk])
+        sleep.assert_called_once()
+        self.assertEqual(
+            list(graph.following(self.reader.pk)), [self.authors[0].pk]
+        )
+
+    @override_settings(FOLLOW_GRAPH_LOCK=0)
+    def test_lock_timeout_drops_entry(self):
+        """Не дождавшись блокировки, правка сбрасывает запись"""
+        graph.following(self.reader.pk)
+        cache.add(graph._lock_key(self.reader.pk), 1, 60)
+        graph.changed(self.reader.pk, added=[self.authors[0].pk])
+        self.assertIsNone(graph._current(self.reader.pk))
+
+    def test_late_load_discarded(self):
+        """Сборка, прочитавшая Follow до коммита подписки, не годна"""
+        generation = graph._generation(self.reader.pk)
+        stale = graph.array('q')
+        Follow.objects.create(user=self.reader, author=self.authors[0])
+        graph._store(self.reader.pk, generation, stale)
+        self.assertEqual(
+            list(graph.following(self.reader.pk)), [self.authors[0].pk]
+        )
+
+    @override_settings(FEED_FANOUT_MAX_FOLLOWERS=0)
+    def test_pulled(self):
+        """Автор, пересёкший порог, сразу попадает в подмешиваемые"""
+        self.assertEqual(graph.pulled(self.reader.pk), [])
+        Follow.objects.create(user=self.reader, author=self.authors[0])
+        self.assertEqual(graph.pulled(self.reader.pk), [self.authors[0].pk])
+        Follow.objects.filter(author=self.authors[0]).delete()
+        self.assertEqual(graph.popular(), frozenset())
+
+    def test_profile(self):
+        """Профиль узнаёт о подписке без запроса к Follow"""
+        client = Client()
+        client.force_login(self.reader)
+        url = reverse('posts:profile', args=['author0'])
+        self.assertNotContains(client.get(url), 'Отписаться')
+        Follow.objects.create(user=self.reader, author=self.authors[0])
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url)
+        self.assertContains(response, 'Отписаться')
+        self.assertFalse([
+            query for query in queries.captured_queries
+            if Follow._meta.db_table in query['sql']
+        ])
@@ -0,0 +1,74 @@
+from io import StringIO
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase
+
+from posts.models import Comment, Follow, Group, Post
+from posts.utils import CursorPaginator
+
+User = get_user_model()
+
+
+@skipUnless(connection.vendor == 'sqlite', 'Планы запросов SQLite')
+class FeedIndexTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test_slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            text='Тестовый пост', author=cls.user, group=cls.group
+        )
+        Comment.objects.create(post=cls.post, author=cls.user, text='Да')
+        Follow.objects.create(user=cls.reader, author=cls.user)
+
+    def plan(self, queryset, key='pub_date'):
+        paginator = CursorPaginator(queryset, 10, key=key)
+        return paginator.object_list[:11].explain()
+
+    def test_feeds_read_index_order(self):
+        """Ленты берут порядок из составного индекса, без сортировки"""
+        cases = {
+            'post_group_pub_date_idx': self.plan(self.group.posts.all()),
+            'post_author_pub_date_idx': self.plan(self.user.posts.all()),
+            'comment_post_created_idx': self.plan(
+                self.post.comments.all(), key='created'
+            ),
+        }
+        for index, plan in cases.items():
+            with self.subTest(index=index):
+                self.assertIn(index, plan)
+                self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_followers_covering_index(self):
+        """Подписчики автора читаются из покрывающего индекса"""
+        plan = Follow.objects.filter(author=self.user).values_list(
+            'user_id', flat=True
+        ).explain()
+        self.assertIn('COVERING INDEX follow_author_user_idx', plan)
+
+    def test_explain_command(self):
+        """Команда показывает планы с индексами и без них"""
+        out = StringIO()
+        call_command(
+            'explain_feeds', compare=True, database='default', repeat=1,
+            stdout=out
+        )
+        report = out.getvalue()
+        without, with_indexes = report.split('С составными индексами')
+        self.assertNotIn('post_group_pub_date_idx', without)
+        self.assertIn('post_group_pub_date_idx', with_indexes)
+        self.assertIn('TEMP B-TREE', without)
+
+    def test_compare_needs_database(self):
+        """Без явного --database индексы рабочей базы не трогаются"""
+        with self.assertRaisesMessage(CommandError, '--database'):
+            call_command('explain_feeds', compare=True, stdout=StringIO())
@@ -1,7 +1,7 @@
 from django.contrib.auth import get_user_model
 from django.test import TestCase
 
-from ..models import Group, Post
+from ..models import Comment, Group, Post
 
 User = get_user_model()
 
@@ -54,3 +54,27 @@ class PostModelTest(TestCase):
             with self.subTest(value=value):
                 self.assertEqual(
                     self.post._meta.get_field(value).help_text, expected)
+
+
+class CommentCountTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='auth')
+        self.post = Post.objects.create(author=self.user, text='Пост')
+        Comment.objects.bulk_create([
+            Comment(post=self.post, author=self.user, text=f'Ответ {i}')
+            for i in range(50)
+        ])
+
+    def test_delete_post_with_comments(self):
+        """Каскад комментариев не правит счётчик удаляемого поста"""
+        with self.assertNumQueries(9):
+            self.post.delete()
+        self.assertFalse(Comment.objects.exists())
+
+    def test_counter_not_below_zero(self):
+        """Разошедшийся счётчик при удалении не уходит ниже нуля"""
+        Comment.objects.first().delete()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 0)
+        self.user.delete()
+        self.assertFalse(Post.objects.exists())
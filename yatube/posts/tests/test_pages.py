@@ -0,0 +1,98 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Follow, Group, Post
+from posts.tests.utils import on_commit_now
+
+User = get_user_model()
+
+
+class PageCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Коты', slug='cats', description='-'
+        )
+        cls.post = Post.objects.create(
+            text='Пост', author=cls.author, group=cls.group
+        )
+        cls.urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', args=['cats']),
+            reverse('posts:profile', args=['author']),
+            reverse('posts:post_detail', args=[cls.post.pk]),
+        )
+
+    def setUp(self):
+        for alias_cache in caches.all():
+            alias_cache.clear()
+
+    def login(self, user):
+        client = Client()
+        client.force_login(user)
+        return client
+
+    def test_anonymous_page_cached_whole(self):
+        """Аноним повторно получает страницу без ленты и шаблонов"""
+        for url in self.urls:
+            with self.subTest(url=url):
+                first = self.client.get(url)
+                # Остаётся только поиск группы, автора или поста по адресу.
+                with self.assertNumQueries(0 if url == self.urls[0] else 1):
+                    second = self.client.get(url)
+                self.assertEqual(second.content, first.content)
+                self.assertFalse(second.templates)
+                self.assertContains(second, 'Войти')
+
+    def test_body_shared_between_users(self):
+        """Вошедшие получают общее тело со своими фрагментами"""
+        edit = reverse('posts:post_edit', args=[self.post.pk])
+        for url in self.urls:
+            with self.subTest(url=url):
+                self.client.get(url)
+                response = self.login(self.author).get(url)
+                self.assertEqual(
+                    [t.name for t in response.templates
+                     if t.name.startswith('posts/')], []
+                )
+                self.assertContains(response, 'Пользователь: author')
+                self.assertContains(response, edit)
+                self.assertNotContains(response, '<!--hole:')
+                response = self.login(self.reader).get(url)
+                self.assertContains(response, 'Пользователь: reader')
+                self.assertNotContains(response, edit)
+
+    def test_personal_fragments(self):
+        """Кнопка подписки и форма комментария — для каждого свои"""
+        profile = reverse('posts:profile', args=['author'])
+        unfollow = reverse('posts:profile_unfollow', args=['author'])
+        reader = self.login(self.reader)
+        self.client.get(profile)
+        self.assertNotContains(reader.get(profile), unfollow)
+        with on_commit_now():
+            Follow.objects.create(user=self.reader, author=self.author)
+        self.assertContains(reader.get(profile), unfollow)
+        self.assertNotContains(
+            self.login(self.author).get(profile), 'Подписаться'
+        )
+        detail = self.urls[3]
+        self.assertNotContains(self.client.get(detail), 'csrfmiddlewaretoken')
+        self.assertContains(reader.get(detail), 'csrfmiddlewaretoken')
+
+    def test_new_post_refreshes_pages(self):
+        """Новый пост меняет ключ и общей, и анонимной страницы"""
+        reader = self.login(self.reader)
+        for url in self.urls[:3]:
+            self.client.get(url)
+            reader.get(url)
+        Post.objects.create(text='Свежий', author=self.author,
+                            group=self.group)
+        for url in self.urls[:3]:
+            with self.subTest(url=url):
+                self.assertContains(self.client.get(url), 'Свежий')
+                self.assertContains(reader.get(url), 'Свежий')
@@ -0,0 +1,119 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts import recommendations
+from posts.models import Follow, Group, Post, Suggestion
+from posts.tests.utils import on_commit_now
+
+User = get_user_model()
+
+
+class RecommendationTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        names = ('reader', 'a', 'b', 'c', 'd', 'e', 'f')
+        cls.users = {
+            name: User.objects.create_user(username=name) for name in names
+        }
+        for user, author in (
+            ('reader', 'a'), ('reader', 'b'),
+            ('a', 'c'), ('b', 'c'), ('a', 'd'), ('c', 'reader'),
+        ):
+            Follow.objects.create(
+                user=cls.users[user], author=cls.users[author]
+            )
+        cats = Group.objects.create(title='Коты', slug='cats', description='')
+        dogs = Group.objects.create(title='Псы', slug='dogs', description='')
+        for author, group in (
+            ('reader', cats), ('e', cats), ('f', dogs), ('a', cats),
+        ):
+            Post.objects.create(
+                text='Пост', author=cls.users[author], group=group
+            )
+
+    def setUp(self):
+        cache.clear()
+
+    def suggested(self, name):
+        return [
+            suggestion.author.username
+            for suggestion in Suggestion.objects.filter(
+                user=self.users[name]
+            ).order_by('rank')
+        ]
+
+    @override_settings(RECOMMENDATIONS_GROUP_WEIGHT=0)
+    def test_friends_of_friends(self):
+        """Чем больше подписок ведут к автору, тем выше он в списке"""
+        recommendations.build()
+        self.assertEqual(self.suggested('reader'), ['c', 'd'])
+
+    def test_group_similarity(self):
+        """Авторы из тех же групп советуются, из чужих — нет"""
+        recommendations.build(block_size=3)
+        suggested = self.suggested('reader')
+        self.assertEqual(suggested[0], 'c')
+        self.assertIn('e', suggested)
+        self.assertNotIn('f', suggested)
+        self.assertNotIn('reader', suggested)
+        self.assertNotIn('a', suggested)
+
+    def test_old_kept_while_computing(self):
+        """Пока идёт расчёт, старые советы на месте; строки — пачками"""
+        total = recommendations.build()
+        compute = recommendations.compute
+
+        def computing(*args):
+            for row in compute(*args):
+                self.assertEqual(Suggestion.objects.count(), total)
+                yield row
+
+        with mock.patch.object(recommendations, 'WRITE_BATCH', 2), \
+                mock.patch.object(recommendations, 'compute', computing):
+            self.assertEqual(recommendations.build(block_size=2), total)
+        self.assertEqual(Suggestion.objects.count(), total)
+
+    def test_deleted_users_skipped(self):
+        """Советы удалённым за время расчёта пользователям не пишутся"""
+        rows = list(recommendations.compute())
+        missing = max(user.pk for user in self.users.values()) + 1
+        rows.append((missing, self.users['a'].pk, 0, 1.0))
+        with mock.patch.object(
+            recommendations, 'compute', return_value=iter(rows)
+        ):
+            self.assertEqual(recommendations.build(), len(rows) - 1)
+
+    def test_top_limit(self):
+        recommendations.build(count=1)
+        self.assertEqual(self.suggested('reader'), ['c'])
+
+    def test_pages(self):
+        """Совет виден в профиле и ленте и пропадает после подписки"""
+        recommendations.build()
+        client = Client()
+        client.force_login(self.users['reader'])
+        profile = reverse('posts:profile', args=['reader'])
+        suggested = reverse('posts:profile_follow', args=['c'])
+        self.assertContains(client.get(profile), suggested)
+        follow = client.get(reverse('posts:follow_index'))
+        self.assertIn(self.users['c'], follow.context['suggestions'])
+        with on_commit_now():
+            Follow.objects.create(
+                user=self.users['reader'], author=self.users['c']
+            )
+        self.assertNotContains(client.get(profile), suggested)
+        other = client.get(reverse('posts:profile', args=['a']))
+        self.assertNotContains(other, suggested)
+
+    def test_command(self):
+        output = StringIO()
+        call_command('build_recommendations', stdout=output)
+        self.assertIn('Рекомендаций:', output.getvalue())
+        self.assertTrue(Suggestion.objects.exists())
@@ -0,0 +1,85 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts import search
+from posts.models import Post
+
+User = get_user_model()
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.cats = Post.objects.create(
+            text='Коты спят весь день', author=cls.user
+        )
+        cls.cat = Post.objects.create(
+            text='Мой кот и ещё один кот', author=cls.user
+        )
+        cls.dog = Post.objects.create(
+            text='Собака гуляет во дворе', author=cls.user
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def found(self, query, **params):
+        response = self.client.get(
+            reverse('posts:search'), {'q': query, **params}
+        )
+        return response, list(response.context['page_obj'])
+
+    def test_stemming_and_rank(self):
+        """Поиск находит словоформы, чаще упомянутое выше"""
+        response, posts = self.found('кошки КОТАМИ')
+        self.assertEqual(posts, [])
+        response, posts = self.found('котов')
+        self.assertEqual(posts, [self.cat, self.cats])
+        self.assertContains(response, self.cat.text)
+
+    def test_index_follows_changes(self):
+        """Правка и удаление поста обновляют индекс"""
+        self.dog.text = 'Кот гуляет во дворе'
+        self.dog.save()
+        self.assertIn(self.dog, self.found('кот')[1])
+        self.assertEqual(self.found('собака')[1], [])
+        self.dog.delete()
+        self.assertNotIn(self.dog, self.found('кот')[1])
+
+    def test_query_syntax_is_text(self):
+        """Операторы FTS5 в запросе ищутся как слова"""
+        for query in ('кот OR собака', '"кот', 'NEAR(кот', '*', ''):
+            with self.subTest(query=query):
+                response, posts = self.found(query)
+                self.assertEqual(response.status_code, 200)
+                self.assertNotIn(self.dog, posts)
+
+    @override_settings(VIEWABLE_POSTS=1)
+    def test_cursor_pages(self):
+        """Результаты листаются курсором по score"""
+        response, first = self.found('кот')
+        cursor = response.context['page_obj'].paginator.next_cursor
+        self.assertContains(response, '?q=%D0%BA%D0%BE%D1%82&amp;cursor=')
+        response, second = self.found('кот', cursor=cursor)
+        self.assertEqual(first + second, [self.cat, self.cats])
+
+    def test_rebuild(self):
+        """Команда перестраивает индекс для постов из bulk_create"""
+        Post.objects.bulk_create([Post(text='Кот в мешке', author=self.user)])
+        self.assertEqual(len(self.found('мешка')[1]), 0)
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(len(self.found('мешка')[1]), 1)
+
+    @override_settings(SEARCH_BACKEND='posts.search.DatabaseBackend')
+    def test_database_backend(self):
+        """Запасной бэкенд ищет по основам без индекса"""
+        posts = search.backend().search(Post.objects.all(), 'дворы')
+        self.assertEqual(list(posts), [self.dog])
@@ -0,0 +1,84 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db.models import F
+from django.test import TestCase
+
+from posts import graph, search, stats, versions
+from posts.feed import follow_feed
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class SeedTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        call_command(
+            'seed_yatube', users=40, groups=3, posts=300, comments=500,
+            follows=5, seed=1, batch_size=70, stdout=StringIO()
+        )
+
+    def test_volumes(self):
+        """Создаётся заказанное число строк"""
+        self.assertEqual(User.objects.count(), 40)
+        self.assertEqual(Group.objects.count(), 3)
+        self.assertEqual(Post.objects.count(), 300)
+        self.assertEqual(Comment.objects.count(), 500)
+        self.assertTrue(Follow.objects.exists())
+        self.assertFalse(Follow.objects.filter(
+            user_id=F('author_id')
+        ).exists())
+
+    def test_dates_are_spread(self):
+        """Даты постов заданы генератором, а не временем вставки"""
+        dates = Post.objects.values_list('pub_date', flat=True)
+        self.assertGreater(len(set(dates)), 290)
+        ordered = list(Post.objects.order_by('pk').values_list(
+            'pub_date', flat=True
+        ))
+        self.assertLess(ordered[0], ordered[-1])
+
+    def test_comments_follow_posts(self):
+        """Комментарий не старше своего поста"""
+        self.assertFalse(Comment.objects.filter(
+            created__lt=F('post__pub_date')
+        ).exists())
+
+    def test_caches_invalidated(self):
+        """Повторный посев сдвигает версии лент и сбрасывает популярных"""
+        user = User.objects.first()
+        scopes = (
+            versions.GLOBAL,
+            versions.group(Group.objects.first().pk),
+            versions.author(user.pk),
+            versions.follower(user.pk),
+        )
+        before = [versions.get(scope) for scope in scopes]
+        graph.popular()
+        call_command(
+            'seed_yatube', users=2, groups=1, posts=2, comments=2,
+            follows=1, seed=2, stdout=StringIO()
+        )
+        for scope, version in zip(scopes, before):
+            with self.subTest(scope=scope):
+                self.assertGreater(versions.get(scope), version)
+        self.assertIsNone(cache.get(graph._popular_key()))
+
+    def test_derived_state(self):
+        """Счётчики, ленты и поиск пересчитаны после вставки"""
+        self.assertEqual(stats.verify(), [])
+        post = Post.objects.order_by('-comment_count').first()
+        self.assertEqual(post.comment_count, post.comments.count())
+        follow = Follow.objects.first()
+        self.assertEqual(
+            set(follow_feed(follow.user)),
+            set(Post.objects.filter(
+                author__following__user=follow.user
+            ))
+        )
+        word = Post.objects.first().text.split()[0]
+        self.assertTrue(search.backend().search(Post.objects.all(), word))
@@ -0,0 +1,65 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import AuthorStats, Follow, Post
+
+User = get_user_model()
+
+
+class AuthorStatsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def test_counters_follow_writes(self):
+        """Счётчики меняются вместе с постами и подписками"""
+        first = Post.objects.create(text='Первый', author=self.author)
+        second = Post.objects.create(text='Второй', author=self.author)
+        self.client.get(reverse(
+            'posts:profile_follow', kwargs={'username': 'author'}
+        ))
+        stats = AuthorStats.objects.get(user=self.author)
+        self.assertEqual(stats.posts_count, 2)
+        self.assertEqual(stats.followers_count, 1)
+        self.assertEqual(stats.last_post, second.pub_date)
+        self.assertEqual(self.reader.stats.following_count, 1)
+        second.delete()
+        self.client.get(reverse(
+            'posts:profile_unfollow', kwargs={'username': 'author'}
+        ))
+        stats.refresh_from_db()
+        self.assertEqual(stats.posts_count, 1)
+        self.assertEqual(stats.followers_count, 0)
+        self.assertEqual(stats.last_post, first.pub_date)
+
+    def test_profile_uses_stats(self):
+        """Профиль выводит число постов из AuthorStats"""
+        Post.objects.create(text='Пост', author=self.author)
+        response = self.client.get(reverse(
+            'posts:profile', kwargs={'username': 'author'}
+        ))
+        self.assertEqual(response.context['stats'].posts_count, 1)
+
+    def test_rebuild_command(self):
+        """Команда находит и исправляет расхождения счётчиков"""
+        Post.objects.bulk_create([
+            Post(text=f'Пост {i}', author=self.author) for i in range(3)
+        ])
+        Follow.objects.create(user=self.reader, author=self.author)
+        with self.assertRaises(CommandError):
+            call_command(
+                'rebuild_author_stats', verify=True, stdout=StringIO()
+            )
+        call_command('rebuild_author_stats', stdout=StringIO())
+        call_command('rebuild_author_stats', verify=True, stdout=StringIO())
+        self.assertEqual(self.author.stats.posts_count, 3)
@@ -0,0 +1,117 @@
+import os
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from posts import thumbnails
+from posts.models import Post
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def image_upload(name='image.png', size=(1200, 800)):
+    buffer = BytesIO()
+    Image.new('RGB', size, (200, 0, 0)).save(buffer, 'png')
+    return SimpleUploadedFile(name, buffer.getvalue(), 'image/png')
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def test_placeholder_until_ready(self):
+        """До готовности миниатюры лента показывает заглушку"""
+        post = Post.objects.create(
+            text='Пост', author=self.user, image=image_upload()
+        )
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'Картинка обрабатывается')
+        url = thumbnails.generate(post.pk)
+        post.refresh_from_db()
+        self.assertEqual(post.thumbnail, url)
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, f'src="{url}"')
+
+    @override_settings(THUMBNAIL_ASYNC=False)
+    def test_create_and_edit_schedule_thumbnail(self):
+        """Создание и смена картинки строят новую миниатюру"""
+        self.client.post(reverse('posts:post_create'), data={
+            'text': 'Пост с картинкой', 'image': image_upload('first.png')
+        })
+        post = Post.objects.get(text='Пост с картинкой')
+        first = post.thumbnail
+        self.assertTrue(first)
+        path = os.path.join(
+            settings.MEDIA_ROOT, first[len(settings.MEDIA_URL):]
+        )
+        with Image.open(path) as thumbnail:
+            self.assertEqual(thumbnail.size, (960, 339))
+        self.client.post(
+            reverse('posts:post_edit', kwargs={'post_id': post.pk}),
+            data={'text': 'Пост с картинкой', 'image': image_upload('two.png')}
+        )
+        post.refresh_from_db()
+        self.assertNotEqual(post.thumbnail, first)
+
+    @override_settings(POST_IMAGE_WIDTHS=(320, 640))
+    def test_no_base_width(self):
+        """Без варианта базовой ширины миниатюрой становится самый широкий"""
+        post = Post.objects.create(
+            text='Пост', author=self.user, image=image_upload()
+        )
+        url = thumbnails.generate(post.pk)
+        self.assertTrue(url.endswith('/640.jpg'))
+        post.refresh_from_db()
+        self.assertEqual(post.thumbnail, url)
+
+    @override_settings(POST_IMAGE_FORMATS=())
+    def test_nothing_generated(self):
+        """Если вариантов нет, ошибка пишется в журнал, а не роняет задачу"""
+        post = Post.objects.create(
+            text='Пост', author=self.user, image=image_upload()
+        )
+        with self.assertLogs('posts.thumbnails', 'ERROR'):
+            self.assertIsNone(thumbnails.generate(post.pk))
+
+    def test_responsive_variants(self):
+        """Картинка нарезается по ширинам и выводится через srcset"""
+        post = Post.objects.create(
+            text='Пост', author=self.user, image=image_upload()
+        )
+        thumbnails.generate(post.pk)
+        post.refresh_from_db()
+        formats = [mime for pillow_format, mime, extension
+                   in thumbnails.supported_formats()]
+        self.assertEqual(list(post.variants), formats)
+        for mime, files in post.variants.items():
+            with self.subTest(mime=mime):
+                self.assertEqual(
+                    [width for width, name in files],
+                    list(settings.POST_IMAGE_WIDTHS)
+                )
+        response = self.client.get(reverse('posts:index'))
+        for mime, srcset in post.image_sources:
+            self.assertContains(response, f'type="{mime}" srcset="{srcset}"')
+        self.assertIn('1440w', dict(post.image_sources)['image/jpeg'])
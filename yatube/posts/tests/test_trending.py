@@ -0,0 +1,129 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import skipUnless
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from posts import trending
+from posts.models import Follow, Group, Post
+from posts.utils import CursorPaginator
+
+User = get_user_model()
+
+
+@override_settings(TRENDING_HALF_LIFE=3600, TRENDING_FLOOR=0.01)
+class TrendingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.popular = User.objects.create_user(username='popular')
+        cls.reader = User.objects.create_user(username='reader')
+        Follow.objects.create(user=cls.reader, author=cls.popular)
+        cls.group = Group.objects.create(
+            title='Коты', slug='cats', description=''
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def trend(self, post):
+        post.refresh_from_db()
+        return post.trend
+
+    def comment(self, post):
+        self.client.post(
+            reverse('posts:add_comment', args=[post.pk]), {'text': 'Да'}
+        )
+
+    def test_reach_and_comments(self):
+        """Вес публикации растёт с подписчиками, комментарии добавляют"""
+        quiet = Post.objects.create(text='Тихий', author=self.author)
+        loud = Post.objects.create(text='Громкий', author=self.popular)
+        self.assertGreater(self.trend(loud), self.trend(quiet))
+        before = self.trend(quiet)
+        self.comment(quiet)
+        self.comment(quiet)
+        self.assertAlmostEqual(
+            self.trend(quiet), before + 2 * settings.TRENDING_COMMENT_WEIGHT
+        )
+
+    def test_page_order(self):
+        """Страница «Популярное» упорядочена по trend, группы — по сумме"""
+        first = Post.objects.create(
+            text='Первый', author=self.author, group=self.group
+        )
+        second = Post.objects.create(text='Второй', author=self.author)
+        self.comment(second)
+        response = self.client.get(reverse('posts:trending'))
+        self.assertEqual(list(response.context['page_obj']), [second, first])
+        self.assertEqual(response.context['groups'], [self.group])
+        anonymous = Client().get(reverse('posts:trending'))
+        self.assertEqual(anonymous.status_code, 200)
+
+    def test_decay(self):
+        """Затухание вдвое за период и обнуление малых значений"""
+        post = Post.objects.create(text='Пост', author=self.author)
+        tiny = Post.objects.create(text='Старый', author=self.author)
+        Post.objects.filter(pk=tiny.pk).update(trend=0.015)
+        before = self.trend(post)
+        now = timezone.now()
+        cache.set(trending.DECAYED_AT_KEY, now - timedelta(hours=1))
+        self.assertAlmostEqual(trending.decay(now), 0.5)
+        self.assertAlmostEqual(self.trend(post), before / 2)
+        self.assertEqual(self.trend(tiny), 0)
+        self.assertNotIn(tiny, trending.posts())
+
+    def test_rebuild(self):
+        """Пересчёт с нуля совпадает с накопленным на лету"""
+        post = Post.objects.create(text='Пост', author=self.popular)
+        self.comment(post)
+        live = self.trend(post)
+        Post.objects.update(trend=0)
+        output = StringIO()
+        call_command('decay_trending', rebuild=True, stdout=output)
+        self.assertIn('Популярных постов: 1', output.getvalue())
+        self.assertAlmostEqual(self.trend(post), live, places=2)
+
+    def test_cursor_survives_decay(self):
+        """Курсор, выданный до затухания, листает без пропусков и повторов"""
+        Post.objects.bulk_create(
+            Post(text=f'Пост {i}', author=self.author, trend=1 + i / 100)
+            for i in range(25)
+        )
+        first = self.client.get(reverse('posts:trending'))
+        seen = list(first.context['page_obj'])
+        cursor = first.context['page_obj'].paginator.next_cursor
+        cache.set(
+            trending.DECAYED_AT_KEY, timezone.now() - timedelta(hours=2)
+        )
+        trending.decay()
+        while cursor:
+            page = self.client.get(
+                reverse('posts:trending'), {'cursor': cursor}
+            ).context['page_obj']
+            seen += list(page)
+            cursor = page.paginator.next_cursor
+        self.assertEqual(
+            [post.pk for post in seen],
+            list(trending.posts().order_by('-trend', '-pk').values_list(
+                'pk', flat=True
+            )),
+        )
+
+    @skipUnless(connection.vendor == 'sqlite', 'Планы запросов SQLite')
+    def test_index_order(self):
+        """Верх страницы читается из индекса, без сортировки таблицы"""
+        paginator = CursorPaginator(trending.posts(), 10, key='trend')
+        plan = paginator.object_list[:11].explain()
+        self.assertIn('post_trend_idx', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
@@ -0,0 +1,87 @@
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.template.defaultfilters import filesizeformat
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from posts.models import Post
+from posts.uploads import BoundedImageUploadHandler, RejectedUpload
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+EXIF_ORIENTATION = 0x0112
+
+
+def jpeg_upload(name='photo.jpg', size=(300, 200)):
+    exif = Image.Exif()
+    exif[EXIF_ORIENTATION] = 6
+    buffer = BytesIO()
+    Image.new('RGB', size, (0, 0, 200)).save(buffer, 'jpeg', exif=exif)
+    return SimpleUploadedFile(name, buffer.getvalue(), 'image/jpeg')
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class BoundedUploadTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def create(self, image):
+        return self.client.post(reverse('posts:post_create'), data={
+            'text': 'Пост с картинкой', 'image': image
+        })
+
+    @override_settings(POST_IMAGE_MAX_BYTES=1024)
+    def test_too_many_bytes(self):
+        """Файл больше лимита отклоняется при приёме"""
+        response = self.create(jpeg_upload(size=(600, 600)))
+        self.assertFormError(
+            response, 'form', 'image', f'Файл больше {filesizeformat(1024)}.'
+        )
+        self.assertFalse(Post.objects.exists())
+
+    @override_settings(POST_IMAGE_MAX_DIMENSIONS=(100, 100))
+    def test_too_many_pixels(self):
+        """Картинка больше лимита по сторонам отклоняется"""
+        response = self.create(jpeg_upload())
+        self.assertFormError(
+            response, 'form', 'image', 'Картинка больше 100x100 пикселей.'
+        )
+        self.assertFalse(Post.objects.exists())
+
+    def test_metadata_stripped(self):
+        """EXIF удаляется, поворот из него применяется к пикселям"""
+        self.create(jpeg_upload())
+        post = Post.objects.get()
+        with Image.open(post.image.path) as image:
+            self.assertNotIn(EXIF_ORIENTATION, image.getexif())
+            self.assertEqual(image.size, (200, 300))
+
+    @override_settings(POST_IMAGE_MAX_BYTES=100)
+    def test_handler_stops_stream(self):
+        """После превышения лимита данные дальше не передаются"""
+        handler = BoundedImageUploadHandler(RequestFactory().post('/'))
+        handler.new_file('image', 'photo.jpg', 'image/jpeg', None)
+        self.assertEqual(handler.receive_data_chunk(b'x' * 64, 0), b'x' * 64)
+        self.assertIsNone(handler.receive_data_chunk(b'x' * 64, 64))
+        self.assertIsNone(handler.receive_data_chunk(b'x' * 64, 128))
+        upload = handler.file_complete(192)
+        self.assertIsInstance(upload, RejectedUpload)
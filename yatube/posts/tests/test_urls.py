@@ -1,6 +1,7 @@
 from http import HTTPStatus
 
 from django.contrib.auth import get_user_model
+from django.core.cache import caches
 from django.test import Client, TestCase
 from django.urls import reverse
 
@@ -36,6 +37,8 @@ class URLTests(TestCase):
         )
 
     def setUp(self):
+        for alias_cache in caches.all():
+            alias_cache.clear()
         self.guest_client = Client()
         self.user = User.objects.create_user(username='HasNoName')
         self.authorized_client = Client()
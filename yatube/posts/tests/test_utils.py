@@ -0,0 +1,70 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Post
+from posts.utils import CursorPaginator
+
+User = get_user_model()
+PER_PAGE = 10
+
+
+class CursorPaginatorTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        Post.objects.bulk_create([
+            Post(text=f'Тестовый пост {i}', author=cls.user)
+            for i in range(25)
+        ])
+        cls.ordered = list(Post.objects.order_by('-pub_date', '-pk'))
+
+    def paginate(self, cursor=None):
+        paginator = CursorPaginator(Post.objects.all(), PER_PAGE)
+        return paginator.page(cursor)
+
+    def test_forward_walk(self):
+        """Проход по next_cursor отдаёт все посты без пропусков"""
+        seen = []
+        page = self.paginate()
+        self.assertFalse(page.has_previous())
+        while True:
+            seen.extend(page.object_list)
+            if not page.has_next():
+                break
+            page = self.paginate(page.paginator.next_cursor)
+        self.assertEqual(seen, self.ordered)
+        self.assertEqual(len(page), 5)
+
+    def test_backward_walk(self):
+        """previous_cursor возвращает на предыдущую страницу"""
+        second = self.paginate(self.paginate().paginator.next_cursor)
+        third = self.paginate(second.paginator.next_cursor)
+        back = self.paginate(third.paginator.previous_cursor)
+        self.assertEqual(list(back), list(second))
+        first = self.paginate(back.paginator.previous_cursor)
+        self.assertEqual(list(first), self.ordered[:PER_PAGE])
+        self.assertFalse(first.has_previous())
+
+    def test_invalid_cursor(self):
+        """Испорченный курсор отдаёт первую страницу"""
+        for cursor in ('мусор', 'e30', 'WyJ4IiwgMSwgMl0'):
+            with self.subTest(cursor=cursor):
+                page = self.paginate(cursor)
+                self.assertEqual(list(page), self.ordered[:PER_PAGE])
+
+    def test_view_cursor(self):
+        """Главная страница листается по ?cursor="""
+        for alias_cache in caches.all():
+            alias_cache.clear()
+        client = Client()
+        response = client.get(reverse('posts:index'))
+        next_cursor = response.context['page_obj'].paginator.next_cursor
+        self.assertContains(response, f'?cursor={next_cursor}')
+        response = client.get(reverse('posts:index'), {'cursor': next_cursor})
+        self.assertEqual(
+            list(response.context['page_obj']),
+            self.ordered[PER_PAGE:PER_PAGE * 2]
+        )
@@ -4,16 +4,20 @@ import tempfile
 from django import forms
 from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.core.cache import cache
+from django.core.cache import caches
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 
-from posts.models import Follow, Group, Post
+from posts.models import Comment, Follow, Group, Post
+
+from .utils import query_budget
 
 User = get_user_model()
 VIEWABLE_POSTS = settings.VIEWABLE_POSTS
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+FEED_QUERY_BUDGET = 6
+VIEWABLE_COMMENTS = settings.VIEWABLE_COMMENTS
 
 
 @override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
@@ -51,6 +55,8 @@ class ViewTests(TestCase):
         shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
 
     def setUp(self):
+        for alias_cache in caches.all():
+            alias_cache.clear()
         self.guest_client = Client()
         self.user = User.objects.create_user(username='HasNoName')
         self.authorized_client = Client()
@@ -272,7 +278,8 @@ class ViewTests(TestCase):
         response_old = self.authorized_client.get(reverse('posts:index'))
         old_posts = response_old.context.get('page_obj').object_list
         self.assertEqual(list(old_posts), list(posts))
-        cache.clear()
+        for alias_cache in caches.all():
+            alias_cache.clear()
         response_new = self.authorized_client.get(reverse('posts:index'))
         new_posts = response_new.context.get('page_obj').object_list
         self.assertEqual(list(old_posts), list(new_posts))
@@ -371,3 +378,116 @@ class ViewTests(TestCase):
             list(response_user.context.get('page_obj').object_list),
             []
         )
+
+
+class FeedQueryBudgetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+        for i in range(VIEWABLE_POSTS + 2):
+            author = User.objects.create_user(
+                username=f'author{i}', first_name='Имя', last_name=f'{i}'
+            )
+            group = Group.objects.create(
+                title=f'Группа {i}', slug=f'group_{i}', description='-'
+            )
+            Follow.objects.create(user=cls.reader, author=author)
+            Post.objects.create(text=f'Пост {i}', author=author, group=group)
+            Post.objects.create(text=f'Пост {i}', author=cls.reader,
+                                group=group)
+
+    def setUp(self):
+        for alias_cache in caches.all():
+            alias_cache.clear()
+        self.client.force_login(self.reader)
+
+    def test_feed_views_query_budget(self):
+        """Число запросов лент не зависит от количества постов"""
+        urls = (
+            (reverse('posts:index'), VIEWABLE_POSTS),
+            (reverse('posts:group_list', kwargs={'slug': 'group_0'}), 2),
+            (reverse('posts:profile', kwargs={'username': 'reader'}),
+             VIEWABLE_POSTS),
+            (reverse('posts:follow_index'), VIEWABLE_POSTS),
+        )
+        for url, expected in urls:
+            with self.subTest(url=url), query_budget(FEED_QUERY_BUDGET):
+                response = self.client.get(url)
+                self.assertEqual(len(response.context['page_obj']), expected)
+
+
+class CommentPaginationTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='auth')
+        cls.post = Post.objects.create(text='Пост', author=cls.author)
+        commenters = [
+            User.objects.create_user(username=f'commenter{i}')
+            for i in range(3)
+        ]
+        Comment.objects.bulk_create([
+            Comment(post=cls.post, author=commenters[i % 3], text=f'К {i}')
+            for i in range(VIEWABLE_COMMENTS + 5)
+        ])
+
+    def test_comments_paginated(self):
+        """Комментарии выводятся страницами без запроса на автора"""
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        with query_budget(FEED_QUERY_BUDGET):
+            response = self.client.get(url)
+        comments = response.context['comments']
+        self.assertEqual(len(comments), VIEWABLE_COMMENTS)
+        response = self.client.get(
+            url, {'comments': comments.paginator.next_cursor}
+        )
+        self.assertEqual(len(response.context['comments']), 5)
+
+
+class FeedCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='auth')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='-'
+        )
+        Post.objects.create(text='Первый пост', author=cls.author,
+                            group=cls.group)
+
+    def setUp(self):
+        for alias_cache in caches.all():
+            alias_cache.clear()
+
+    def test_cached_page_skips_feed_query(self):
+        """Повторный показ страницы берёт ленту из кэша фрагментов"""
+        self.client.get(reverse('posts:index'))
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'Первый пост')
+
+    def test_new_post_invalidates_feeds(self):
+        """Новый пост сразу виден в общей ленте, группе и профиле"""
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': 'group'}),
+            reverse('posts:profile', kwargs={'username': 'auth'}),
+        )
+        for url in urls:
+            self.client.get(url)
+        Post.objects.create(text='Свежий пост', author=self.author,
+                            group=self.group)
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertContains(self.client.get(url), 'Свежий пост')
+
+    def test_follow_invalidates_follow_feed(self):
+        """Подписка сразу меняет закэшированную ленту подписок"""
+        self.client.force_login(self.reader)
+        response = self.client.get(reverse('posts:follow_index'))
+        self.assertNotContains(response, 'Первый пост')
+        Follow.objects.create(user=self.reader, author=self.author)
+        response = self.client.get(reverse('posts:follow_index'))
+        self.assertContains(response, 'Первый пост')
@@ -0,0 +1,47 @@
+from contextlib import ContextDecorator
+from unittest import mock
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import CaptureQueriesContext
+
+
+class query_budget(ContextDecorator):
+    """
+    Падает, если внутри блока выполнено больше limit запросов к БД.
+
+    Работает и как контекстный менеджер, и как декоратор теста.
+    """
+
+    def __init__(self, limit, using=DEFAULT_DB_ALIAS):
+        self.limit = limit
+        self.context = CaptureQueriesContext(connections[using])
+
+    def __enter__(self):
+        self.context.__enter__()
+        return self.context
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.context.__exit__(exc_type, exc_value, traceback)
+        if exc_type is not None:
+            return False
+        executed = len(self.context)
+        if executed > self.limit:
+            queries = '\n'.join(
+                f'{i}. {query["sql"]}'
+                for i, query in enumerate(self.context.captured_queries, 1)
+            )
+            raise AssertionError(
+                f'{executed} запросов при бюджете {self.limit}:\n{queries}'
+            )
+        return False
+
+
+def on_commit_now():
+    """
+    Выполняет transaction.on_commit сразу: TestCase откатывает
+    транзакцию, и без этого обработчики после коммита не вызываются.
+    """
+    return mock.patch(
+        'django.db.transaction.on_commit',
+        lambda func, using=None: func()
+    )
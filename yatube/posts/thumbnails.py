@@ -0,0 +1,152 @@
+"""
+Фоновая генерация картинок постов.
+
+После сохранения поста с новой картинкой в пуле потоков строятся
+варианты нескольких ширин (POST_IMAGE_WIDTHS) в современных форматах
+(AVIF и WebP, если их умеет установленный Pillow) и в JPEG. Их имена
+записываются в Post.image_variants, а адрес основной JPEG-миниатюры —
+в Post.thumbnail. Пока адреса нет, шаблон показывает заглушку, поэтому
+запрос на отрисовку ленты никогда не ждёт Pillow.
+"""
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from PIL import Image, ImageOps
+
+from . import feed, versions
+from .models import Post
+
+logger = logging.getLogger(__name__)
+
+# Формат Pillow, mime-тип и расширение в порядке предпочтения браузером.
+FORMATS = (
+    ('AVIF', 'image/avif', 'avif'),
+    ('WEBP', 'image/webp', 'webp'),
+    ('JPEG', 'image/jpeg', 'jpg'),
+)
+
+_executor = None
+
+
+def _pool():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.THUMBNAIL_WORKERS,
+            thread_name_prefix='thumbnails'
+        )
+    return _executor
+
+
+def supported_formats():
+    """Форматы из POST_IMAGE_FORMATS, которые Pillow умеет сохранять."""
+    Image.init()
+    return [
+        fmt for fmt in FORMATS
+        if fmt[0] in settings.POST_IMAGE_FORMATS and fmt[0] in Image.SAVE
+    ]
+
+
+def _geometry():
+    width, height = settings.POST_THUMBNAIL_GEOMETRY.split('x')
+    return int(width), int(height)
+
+
+def build_variants(post):
+    """
+    Сохраняет варианты картинки поста и возвращает
+    {mime-тип: [[ширина, имя файла], ...]}.
+    """
+    base_width, base_height = _geometry()
+    variants = {}
+    with post.image.open('rb'), Image.open(post.image) as source:
+        source = ImageOps.exif_transpose(source).convert('RGB')
+        for width in settings.POST_IMAGE_WIDTHS:
+            size = (width, round(width * base_height / base_width))
+            resized = ImageOps.fit(source, size, Image.LANCZOS)
+            for pillow_format, mime, extension in supported_formats():
+                buffer = BytesIO()
+                resized.save(
+                    buffer, pillow_format,
+                    quality=settings.POST_IMAGE_QUALITY
+                )
+                name = default_storage.save(
+                    f'posts/variants/{post.pk}/{width}.{extension}',
+                    ContentFile(buffer.getvalue())
+                )
+                variants.setdefault(mime, []).append([width, name])
+    return variants
+
+
+def main_variant(variants):
+    """
+    Имя файла миниатюры: JPEG ширины из POST_THUMBNAIL_GEOMETRY, а если
+    такого нет — самый широкий вариант (JPEG, если он есть).
+    """
+    files = variants.get('image/jpeg') or next(
+        files for files in variants.values() if files
+    )
+    widths = dict(files)
+    return widths.get(_geometry()[0]) or widths[max(widths)]
+
+
+def _delete(variants):
+    for files in variants.values():
+        for width, name in files:
+            default_storage.delete(name)
+
+
+def generate(post_id):
+    """Строит варианты картинки поста и возвращает адрес миниатюры."""
+    post = Post.objects.filter(pk=post_id).only(
+        'image', 'image_variants', 'author', 'group'
+    ).first()
+    if post is None or not post.image:
+        return None
+    variants = {}
+    try:
+        variants = build_variants(post)
+        url = default_storage.url(main_variant(variants))
+    except Exception:
+        logger.exception('Не удалось обработать картинку поста %s', post_id)
+        _delete(variants)
+        return None
+    # Картинку могли заменить, пока строились варианты.
+    updated = Post.objects.filter(pk=post_id, image=post.image.name).update(
+        thumbnail=url, image_variants=json.dumps(variants)
+    )
+    if not updated:
+        _delete(variants)
+        return None
+    _delete(post.variants)
+    versions.bump_post(post, feed.pushed_followers(post.author_id))
+    return url
+
+
+def _run(post_id):
+    close_old_connections()
+    try:
+        generate(post_id)
+    finally:
+        close_old_connections()
+
+
+def schedule(post):
+    """
+    Сбрасывает миниатюру и ставит пост в очередь после коммита.
+    С THUMBNAIL_ASYNC = False картинки строятся сразу.
+    """
+    Post.objects.filter(pk=post.pk).update(thumbnail='')
+    post.thumbnail = ''
+    if not post.image:
+        return
+    if not settings.THUMBNAIL_ASYNC:
+        generate(post.pk)
+        return
+    transaction.on_commit(lambda: _pool().submit(_run, post.pk))
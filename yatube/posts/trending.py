@@ -0,0 +1,124 @@
+"""
+Популярные посты и группы.
+
+Популярность поста — Post.trend: при публикации он получает вес,
+растущий с числом подписчиков автора, каждый комментарий добавляет
+TRENDING_COMMENT_WEIGHT. Всё накопленное затухает вдвое за
+TRENDING_HALF_LIFE: команда decay_trending раз в несколько минут
+умножает trend на коэффициент затухания и обнуляет совсем малые
+значения. Порядок постов при умножении не меняется, поэтому страница
+«Популярное» — диапазон по индексу (-trend, -id), без сортировки
+таблицы постов. Затухание переписывает trend у всех строк, поэтому
+курсор страницы берёт значение границы заново из поста курсора
+(CursorPaginator с reanchor): токен, выданный до decay, продолжает
+ленту без пропусков и повторов. Комментарии и rebuild порядок
+меняют — это уже настоящее изменение рейтинга.
+"""
+import math
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from .models import AuthorStats, Comment, Group, Post
+
+DECAYED_AT_KEY = 'trending:decayed_at'
+GROUPS_KEY = 'trending:groups'
+BATCH_SIZE = 1000
+
+
+def published_weight(followers):
+    return settings.TRENDING_POST_WEIGHT * (1 + math.log1p(followers))
+
+
+def post_published(post):
+    followers = AuthorStats.objects.filter(
+        user_id=post.author_id
+    ).values_list('followers_count', flat=True).first() or 0
+    Post.objects.filter(pk=post.pk).update(
+        trend=F('trend') + published_weight(followers)
+    )
+
+
+def commented():
+    """Прибавка к trend, которая пишется вместе со счётчиком комментариев."""
+    return F('trend') + settings.TRENDING_COMMENT_WEIGHT
+
+
+def factor(seconds):
+    return 0.5 ** (seconds / settings.TRENDING_HALF_LIFE)
+
+
+def decay(now=None):
+    """
+    Затухание с прошлого запуска; возвращает применённый коэффициент.
+    Если время прошлого запуска потеряно, считается, что прошёл
+    TRENDING_DECAY_INTERVAL.
+    """
+    now = now or timezone.now()
+    last = cache.get(DECAYED_AT_KEY) or now - timedelta(
+        seconds=settings.TRENDING_DECAY_INTERVAL
+    )
+    ratio = factor(max((now - last).total_seconds(), 0))
+    with transaction.atomic():
+        Post.objects.filter(
+            trend__gt=0, trend__lt=settings.TRENDING_FLOOR / ratio
+        ).update(trend=0)
+        Post.objects.filter(trend__gt=0).update(trend=F('trend') * ratio)
+    cache.set(DECAYED_AT_KEY, now, None)
+    cache.delete(GROUPS_KEY)
+    return ratio
+
+
+def rebuild(now=None):
+    """
+    Пересчитывает trend с нуля по постам и комментариям за окно, вне
+    которого вклад меньше TRENDING_FLOOR. Возвращает число постов.
+    """
+    now = now or timezone.now()
+    half_lives = math.log2(
+        max(settings.TRENDING_POST_WEIGHT, settings.TRENDING_COMMENT_WEIGHT)
+        * 100 / settings.TRENDING_FLOOR
+    )
+    since = now - timedelta(seconds=settings.TRENDING_HALF_LIFE * half_lives)
+    scores = defaultdict(float)
+    posts = Post.objects.filter(pub_date__gte=since).values_list(
+        'pk', 'pub_date', 'author__stats__followers_count'
+    )
+    for pk, pub_date, followers in posts.iterator():
+        age = (now - pub_date).total_seconds()
+        scores[pk] += published_weight(followers or 0) * factor(age)
+    comments = Comment.objects.filter(created__gte=since).values_list(
+        'post_id', 'created'
+    )
+    for post_id, created in comments.iterator():
+        age = (now - created).total_seconds()
+        scores[post_id] += settings.TRENDING_COMMENT_WEIGHT * factor(age)
+    rows = [
+        Post(pk=pk, trend=score) for pk, score in scores.items()
+        if score >= settings.TRENDING_FLOOR
+    ]
+    with transaction.atomic():
+        Post.objects.filter(trend__gt=0).update(trend=0)
+        Post.objects.bulk_update(rows, ['trend'], batch_size=BATCH_SIZE)
+    cache.set(DECAYED_AT_KEY, now, None)
+    cache.delete(GROUPS_KEY)
+    return len(rows)
+
+
+def posts():
+    """Посты с ненулевой популярностью; листаются по ключу trend."""
+    return Post.objects.filter(trend__gt=0)
+
+
+def groups():
+    """Группы по сумме популярности их постов, кэш на минуту."""
+    return cache.get_or_set(GROUPS_KEY, lambda: list(
+        Group.objects.filter(posts__trend__gt=0).annotate(
+            trend=Sum('posts__trend')
+        ).order_by('-trend')[:settings.TRENDING_GROUPS]
+    ), settings.TRENDING_GROUPS_TIMEOUT)
@@ -0,0 +1,147 @@
+"""
+Потоковый приём картинок постов с ограничениями.
+
+BoundedImageUploadHandler стоит первым в цепочке обработчиков: он
+считает байты и по первым килобайтам файла читает размеры картинки из
+заголовка. Превышение лимитов обрывает приём файла — остаток потока в
+следующий обработчик не передаётся, а форма получает RejectedUpload с
+текстом ошибки. Принятый файл пишется сразу на диск, без буфера в
+памяти. Перекодирование без EXIF выполняется в пуле с ограниченным
+числом потоков, чтобы одновременные загрузки не съели память:
+результат держится в памяти, но его размер ограничен лимитом пикселей.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.uploadedfile import (InMemoryUploadedFile,
+                                            UploadedFile)
+from django.core.files.uploadhandler import (FileUploadHandler,
+                                             TemporaryFileUploadHandler)
+from django.template.defaultfilters import filesizeformat
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
+from PIL import Image, ImageOps
+
+HEADER_BYTES = 64 * 1024
+# Форматы, которые перекодируются ради удаления EXIF. GIF метаданных
+# EXIF не несёт и перекодированием потерял бы анимацию.
+REENCODED_FORMATS = ('JPEG', 'PNG', 'WEBP')
+
+_executor = None
+
+
+def _pool():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.UPLOAD_REENCODE_WORKERS,
+            thread_name_prefix='uploads'
+        )
+    return _executor
+
+
+def size_error(size):
+    if size > settings.POST_IMAGE_MAX_BYTES:
+        return f'Файл больше {filesizeformat(settings.POST_IMAGE_MAX_BYTES)}.'
+    return None
+
+
+def dimensions_error(width, height):
+    max_width, max_height = settings.POST_IMAGE_MAX_DIMENSIONS
+    if width > max_width or height > max_height:
+        return f'Картинка больше {max_width}x{max_height} пикселей.'
+    return None
+
+
+class RejectedUpload(UploadedFile):
+    """Файл, отклонённый при приёме; error — причина для формы."""
+
+    def __init__(self, name, content_type, error):
+        super().__init__(BytesIO(), name, content_type, 0)
+        self.error = error
+
+
+class BoundedImageUploadHandler(FileUploadHandler):
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.error = None
+        self.head = b''
+        self.header_checked = False
+
+    def _check_header(self):
+        self.header_checked = True
+        try:
+            with Image.open(BytesIO(self.head)) as image:
+                self.error = dimensions_error(*image.size)
+        except Exception:
+            # Заголовок не распознан: окончательно проверит форма.
+            pass
+        self.head = b''
+
+    def receive_data_chunk(self, raw_data, start):
+        if self.error:
+            return None
+        self.error = size_error(start + len(raw_data))
+        if not self.error and not self.header_checked:
+            self.head += raw_data
+            if len(self.head) >= HEADER_BYTES:
+                self._check_header()
+        return None if self.error else raw_data
+
+    def file_complete(self, file_size):
+        if not self.error and not self.header_checked:
+            self._check_header()
+        if self.error:
+            return RejectedUpload(
+                self.file_name, self.content_type, self.error
+            )
+        return None
+
+
+def bounded_uploads(view):
+    """
+    Подключает потоковый приём картинок к view. Обработчики нужно
+    заменить до чтения request.POST, поэтому CSRF проверяется уже
+    внутри, после замены.
+    """
+    protected = csrf_protect(view)
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        request.upload_handlers = [
+            BoundedImageUploadHandler(request),
+            TemporaryFileUploadHandler(request),
+        ]
+        return protected(request, *args, **kwargs)
+    return csrf_exempt(wrapper)
+
+
+def _reencode(upload):
+    upload.seek(0)
+    with Image.open(upload) as image:
+        image_format = image.format
+        if image_format not in REENCODED_FORMATS:
+            return None
+        cleaned = ImageOps.exif_transpose(image)
+        cleaned.info.pop('exif', None)
+        buffer = BytesIO()
+        options = {'quality': 90} if image_format != 'PNG' else {}
+        cleaned.save(buffer, image_format, **options)
+    return InMemoryUploadedFile(
+        buffer, 'image', upload.name, upload.content_type,
+        buffer.tell(), None
+    )
+
+
+def strip_metadata(upload):
+    """
+    Перекодирует картинку без EXIF (с учётом поворота из EXIF) и
+    возвращает новый файл; для прочих форматов — исходный.
+    """
+    cleaned = _pool().submit(_reencode, upload).result()
+    if cleaned is None:
+        upload.seek(0)
+        return upload
+    return cleaned
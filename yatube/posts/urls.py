@@ -15,7 +15,10 @@ urlpatterns = [
         'posts/<int:post_id>/comment/',
         views.add_comment,
         name='add_comment'),
+    path('trending/', views.trending_posts, name='trending'),
+    path('search/', views.search_posts, name='search'),
     path('follow/', views.follow_index, name='follow_index'),
+    path('follow/import/', views.follow_import, name='follow_import'),
     path(
         'profile/<str:username>/follow/',
         views.profile_follow,
@@ -1,7 +1,202 @@
+import base64
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
 from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.functional import SimpleLazyObject, cached_property
+
+FORWARD = 'n'
+BACKWARD = 'p'
+
+# Поля, которые читает includes/article.html и заголовки лент.
+FEED_FIELDS = (
+    'text', 'pub_date', 'image', 'thumbnail', 'image_variants',
+    'comment_count', 'trend',
+    'author', 'author__username', 'author__first_name', 'author__last_name',
+    'group', 'group__slug', 'group__title',
+)
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(direction, value, pk):
+    """Упаковывает позицию (значение ключа, pk) в непрозрачный токен."""
+    if hasattr(value, 'isoformat'):
+        value = value.isoformat()
+    raw = json.dumps([direction, value, pk]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """
+    Распаковывает токен курсора, InvalidCursor для мусора. Значение
+    ключа возвращается как есть: тип знает только пагинатор.
+    """
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        direction, value, pk = json.loads(base64.urlsafe_b64decode(padded))
+        pk = int(pk)
+    except (TypeError, ValueError):
+        raise InvalidCursor(token)
+    if direction not in (FORWARD, BACKWARD) or value is None:
+        raise InvalidCursor(token)
+    return direction, value, pk
+
+
+class CursorPaginator(Paginator):
+    """
+    Keyset-пагинация по паре (key, pk) в порядке убывания.
+
+    Вместо OFFSET страница выбирается условием по позиции последней
+    записи предыдущей страницы, поэтому стоимость запроса не зависит
+    от глубины. Возвращает обычный Page: номер страницы считается
+    внутри окна «предыдущая — текущая — следующая», а ссылки строятся
+    по next_cursor / previous_cursor.
+
+    С reanchor значение ключа на границе перечитывается из самой
+    записи pk курсора: так курсор переживает обновления, которые
+    меняют ключ у всех записей, не меняя порядка (затухание trend).
+    """
+    cursor_mode = True
+
+    def __init__(self, object_list, per_page, key='pub_date',
+                 approximate_count=False, reanchor=False):
+        self.key = key
+        self.reanchor = reanchor
+        self.approximate_count = approximate_count
+        self._position = (FORWARD, None, None)
+        super().__init__(object_list.order_by(f'-{key}', '-pk'), per_page)
+
+    def _after(self, value, pk):
+        return (Q(**{f'{self.key}__lt': value})
+                | Q(**{self.key: value, 'pk__lt': pk}))
+
+    def _before(self, value, pk):
+        return (Q(**{f'{self.key}__gt': value})
+                | Q(**{self.key: value, 'pk__gt': pk}))
+
+    def _key_field(self):
+        query = self.object_list.query
+        if self.key in query.annotations:
+            return query.annotations[self.key].output_field
+        return query.model._meta.get_field(self.key)
+
+    def _decode(self, cursor):
+        direction, value, pk = decode_cursor(cursor)
+        try:
+            value = self._key_field().to_python(value)
+        except (TypeError, ValueError, ValidationError):
+            raise InvalidCursor(cursor)
+        if value is None:
+            raise InvalidCursor(cursor)
+        return direction, value, pk
+
+    def _anchor(self, value, pk):
+        """Текущее значение ключа у записи курсора, если она ещё есть."""
+        current = self.object_list.model._default_manager.filter(
+            pk=pk
+        ).values_list(self.key, flat=True).first()
+        return value if current is None else current
+
+    def _cursor(self, direction, obj):
+        return encode_cursor(direction, getattr(obj, self.key), obj.pk)
+
+    @cached_property
+    def _window(self):
+        """Записи страницы и флаги (has_previous, has_next)."""
+        direction, value, pk = self._position
+        if self.reanchor and value is not None:
+            value = self._anchor(value, pk)
+        limit = self.per_page + 1
+        if direction == BACKWARD:
+            rows = list(self.object_list.filter(
+                self._before(value, pk)
+            ).reverse()[:limit])
+            return rows[:self.per_page][::-1], len(rows) > self.per_page, True
+        queryset = self.object_list
+        if value is not None:
+            queryset = queryset.filter(self._after(value, pk))
+        rows = list(queryset[:limit])
+        has_next = len(rows) > self.per_page
+        return rows[:self.per_page], value is not None, has_next
+
+    def page(self, cursor=None):
+        """
+        Возвращает страницу по токену курсора (None — первая).
+
+        Записи при движении вперёд выбираются лениво, при первом
+        обращении, поэтому страница из кэша фрагментов не делает запроса.
+        """
+        try:
+            self._position = self._decode(cursor)
+        except InvalidCursor:
+            self._position = (FORWARD, None, None)
+        rows = SimpleLazyObject(lambda: self._window[0])
+        return self._get_page(rows, self._number(), self)
+
+    def _number(self):
+        direction, value, pk = self._position
+        if direction == BACKWARD:
+            return 2 if self.previous_cursor else 1
+        return 1 if value is None else 2
+
+    def get_page(self, cursor=None):
+        return self.page(cursor)
+
+    @property
+    def previous_cursor(self):
+        rows, has_previous, has_next = self._window
+        if rows and has_previous:
+            return self._cursor(BACKWARD, rows[0])
+        return None
+
+    @property
+    def next_cursor(self):
+        rows, has_previous, has_next = self._window
+        if rows and has_next:
+            return self._cursor(FORWARD, rows[-1])
+        return None
+
+    @property
+    def num_pages(self):
+        number = self._number()
+        return number + 1 if self.next_cursor else number
+
+    @cached_property
+    def count(self):
+        """
+        Общее число записей. С approximate_count значение берётся из
+        кэша и может отставать на PAGINATION_COUNT_TIMEOUT секунд.
+        """
+        if not self.approximate_count:
+            return self.object_list.count()
+        query = str(self.object_list.query).encode()
+        key = 'pagination_count:' + hashlib.md5(query).hexdigest()
+        return cache.get_or_set(
+            key, self.object_list.count, settings.PAGINATION_COUNT_TIMEOUT
+        )
+
+
+def feed_queryset(posts):
+    """Подтягивает автора и группу одним JOIN и только нужные колонки."""
+    return posts.select_related('author', 'group').only(*FEED_FIELDS)
+
 
+def pagination(request, model, page_num, key='pub_date', param='cursor',
+               approximate_count=False, reanchor=False):
+    if 'page' in request.GET:
+        # Старые ссылки с номером страницы продолжают работать.
+        paginator = Paginator(model, page_num)
+        return paginator.get_page(request.GET.get('page'))
+    paginator = CursorPaginator(
+        model, page_num, key=key, approximate_count=approximate_count,
+        reanchor=reanchor,
+    )
+    return paginator.page(request.GET.get(param))
 
-def pagination(request, model, page_num):
-    paginator = Paginator(model, page_num)
-    page_number = request.GET.get('page')
-    return paginator.get_page(page_number)
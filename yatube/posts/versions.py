@@ -0,0 +1,181 @@
+"""
+Версии лент для ключей кэша фрагментов.
+
+Каждая лента (общая, группы, автора, подписок читателя, комментарии
+поста) имеет счётчик версии в кэше. Записи постов, комментариев и
+подписок сдвигают версии затронутых лент, поэтому отрисованные
+страницы можно хранить часами: после изменения ключ просто меняется.
+Версия — это время сдвига в микросекундах, её можно использовать и как
+время последнего изменения ленты.
+"""
+import hashlib
+import time
+from datetime import datetime, timezone
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.utils import make_template_fragment_key
+from django.db import connection, transaction
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.views.decorators.http import condition
+
+from core import holes
+
+GLOBAL = 'global'
+RECOMMENDATIONS = 'recommendations'
+
+
+def group(group_id):
+    return f'group:{group_id}'
+
+
+def author(user_id):
+    return f'author:{user_id}'
+
+
+def follower(user_id):
+    return f'follower:{user_id}'
+
+
+def post(post_id):
+    return f'post:{post_id}'
+
+
+def _cache():
+    return caches[settings.VERSION_CACHE_ALIAS]
+
+
+def _key(scope):
+    return f'feed_version:{scope}'
+
+
+def _now():
+    return int(time.time() * 1000000)
+
+
+def bump(*scopes):
+    """
+    Сдвигает версии лент после записи. Внутри транзакции версии
+    сдвигаются ещё раз после коммита: до него читатель может взять
+    новую версию при старых строках и сохранить под ней устаревший
+    фрагмент, а второй сдвиг такой фрагмент отбрасывает.
+    """
+    def apply():
+        now = _now()
+        _cache().set_many(
+            {_key(scope): now for scope in scopes},
+            settings.FEED_VERSION_TIMEOUT
+        )
+    apply()
+    if connection.in_atomic_block:
+        transaction.on_commit(apply)
+
+
+def bump_post(instance, followers=()):
+    """Сдвигает версии всех лент, в которых показывается пост."""
+    scopes = [GLOBAL, author(instance.author_id), post(instance.pk)]
+    old_group_id = getattr(instance, '_old_group_id', None)
+    for group_id in {instance.group_id, old_group_id}:
+        if group_id is not None:
+            scopes.append(group(group_id))
+    scopes += [follower(user_id) for user_id in followers]
+    bump(*scopes)
+
+
+def get(*scopes):
+    """
+    Версии лент в порядке scopes. Пропавшая из кэша версия (истёкшая
+    при locmem) заводится заново, что равносильно сдвигу.
+    """
+    keys = [_key(scope) for scope in scopes]
+    cache = _cache()
+    versions = cache.get_many(keys)
+    missing = {key: _now() for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, settings.FEED_VERSION_TIMEOUT)
+        versions.update(missing)
+    return [versions[key] for key in keys]
+
+
+def fragment_context(request, *scopes):
+    """
+    Ключ и время жизни кэша фрагмента ленты. Ключ учитывает адрес
+    страницы и пользователя: в статьях есть ссылки для автора. В общей
+    странице вместо ссылок метки, и фрагмент у всех один.
+    """
+    parts = [str(version) for version in get(*scopes)]
+    if holes.punching(request):
+        parts += [request.get_full_path(), 'holes']
+    else:
+        parts += [request.get_full_path(), str(request.user.pk or 0)]
+    return {
+        'cache_key': ':'.join(parts),
+        'cache_timeout': settings.FEED_CACHE_TIMEOUT,
+        'cache_alias': settings.FRAGMENT_CACHE_ALIAS,
+    }
+
+
+def fragment_cached(name, context):
+    """Есть ли в кэше фрагмент name с ключом из fragment_context."""
+    key = make_template_fragment_key(name, [context['cache_key']])
+    return caches[context['cache_alias']].has_key(key)
+
+
+def conditional(scopes):
+    """
+    Декоратор view: ETag и Last-Modified из версий лент. scopes
+    получает аргументы view и возвращает области ленты или None, если
+    проверять нечего. При совпадении с If-None-Match или
+    If-Modified-Since view не вызывается и клиент получает 304.
+
+    Ответы анонимам помечаются общими: прокси может хранить их
+    FEED_PROXY_MAX_AGE секунд, браузер каждый раз сверяет ETag. Ответы
+    вошедшим — личные, с той же сверкой. Vary: Cookie разделяет их.
+    Страницы вошедших несут CSRF-токен, который меняется при новом
+    входе, поэтому их ETag зависит от сессии, а Last-Modified у них нет.
+    """
+    def validators(request, *args, **kwargs):
+        if not hasattr(request, '_feed_validators'):
+            found = scopes(request, *args, **kwargs)
+            request._feed_validators = (None, None)
+            if found is not None:
+                stamps = get(*found)
+                parts = [str(stamp) for stamp in stamps]
+                parts += [request.get_full_path(), str(request.user.pk or 0)]
+                personal = request.user.is_authenticated
+                if personal:
+                    parts.append(request.session.session_key or '')
+                etag = hashlib.md5(':'.join(parts).encode()).hexdigest()
+                modified = datetime.fromtimestamp(
+                    max(stamps) / 1000000, timezone.utc
+                ) if stamps and not personal else None
+                request._feed_validators = (etag, modified)
+        return request._feed_validators
+
+    check = condition(
+        etag_func=lambda *args, **kwargs: validators(*args, **kwargs)[0],
+        last_modified_func=lambda *args, **kwargs: validators(
+            *args, **kwargs
+        )[1],
+    )
+
+    def decorator(view):
+        checked = check(view)
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            response = checked(request, *args, **kwargs)
+            if response.status_code not in (200, 304):
+                return response
+            if request.user.is_authenticated:
+                patch_cache_control(response, private=True, no_cache=True)
+            else:
+                patch_cache_control(
+                    response, public=True, max_age=0,
+                    s_maxage=settings.FEED_PROXY_MAX_AGE
+                )
+            patch_vary_headers(response, ('Cookie',))
+            return response
+        return wrapper
+    return decorator
@@ -1,75 +1,203 @@
 from django.conf import settings
 from django.contrib.auth.decorators import login_required
+from django.db import transaction
 from django.shortcuts import get_object_or_404, redirect, render
 
-from .forms import CommentForm, PostForm
-from .models import Comment, Follow, Group, Post, User
-from .utils import pagination
+from core import concurrent
 
+from . import (follows, pages, recommendations, search, stats, thumbnails,
+               trending, versions)
+from .feed import follow_feed, pulled_authors
+from .forms import CommentForm, FollowImportForm, PostForm
+from .models import Follow, Group, Post, User
+from .uploads import bounded_uploads
+from .utils import feed_queryset, pagination
 
+
+def _lookup(request, name, load):
+    """Объект страницы, общий для проверки ETag и самого view."""
+    cached = f'_page_{name}'
+    if not hasattr(request, cached):
+        setattr(request, cached, load())
+    return getattr(request, cached)
+
+
+def _group(request, slug):
+    return _lookup(request, 'group', lambda: get_object_or_404(
+        Group, slug=slug
+    ))
+
+
+def _author(request, username):
+    return _lookup(request, 'author', lambda: get_object_or_404(
+        User, username=username
+    ))
+
+
+def _post(request, post_id):
+    return _lookup(request, 'post', lambda: get_object_or_404(
+        Post.objects.select_related('author', 'group'), pk=post_id
+    ))
+
+
+def _rows(page_obj, fragment, fragments):
+    """
+    Выборка записей страницы для concurrent.gather; пусто, если
+    фрагмент ленты в кэше и записи шаблону не понадобятся.
+    """
+    if versions.fragment_cached(fragment, fragments):
+        return []
+    return [lambda: len(page_obj)]
+
+
+def _index_scopes(request):
+    return [versions.GLOBAL]
+
+
+def _group_scopes(request, slug):
+    return [versions.group(_group(request, slug).pk)]
+
+
+def _author_scopes(request, username):
+    return [versions.author(_author(request, username).pk)]
+
+
+def _profile_scopes(request, username):
+    author = _author(request, username)
+    scopes = _author_scopes(request, username)
+    user = request.user
+    if user.is_authenticated:
+        # Кнопка подписки зависит от подписок читателя, а на своей
+        # странице показываются рекомендации.
+        scopes.append(versions.follower(user.pk))
+        if user.pk == author.pk:
+            scopes.append(versions.RECOMMENDATIONS)
+    return scopes
+
+
+def _post_scopes(request, post_id):
+    post = _post(request, post_id)
+    return [versions.post(post.pk), versions.author(post.author_id)]
+
+
+@versions.conditional(_index_scopes)
+@pages.cached(_index_scopes)
 def index(request):
-    posts = Post.objects.select_related('group').all()
+    posts = feed_queryset(Post.objects.all())
     page_obj = pagination(request, posts, settings.VIEWABLE_POSTS)
     context = {
         'page_obj': page_obj,
-        'index': True
+        'index': True,
+        **versions.fragment_context(request, versions.GLOBAL)
     }
     return render(request, 'posts/index.html', context)
 
 
+@versions.conditional(_group_scopes)
+@pages.cached(_group_scopes)
 def group_posts(request, slug):
-    group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.all()
+    group = _group(request, slug)
+    posts = feed_queryset(group.posts.all())
     page_obj = pagination(request, posts, settings.VIEWABLE_POSTS)
     context = {
         'group': group,
-        'page_obj': page_obj
+        'page_obj': page_obj,
+        **versions.fragment_context(request, versions.group(group.pk))
     }
     return render(request, 'posts/group_list.html', context)
 
 
+def trending_posts(request):
+    posts = feed_queryset(trending.posts())
+    page_obj = pagination(
+        request, posts, settings.VIEWABLE_POSTS, key='trend', reanchor=True
+    )
+    context = {
+        'page_obj': page_obj,
+        'trending': True,
+        'groups': trending.groups(),
+    }
+    return render(request, 'posts/trending.html', context)
+
+
+def search_posts(request):
+    query = request.GET.get('q', '').strip()
+    posts = feed_queryset(search.backend().search(Post.objects.all(), query))
+    page_obj = pagination(
+        request, posts, settings.VIEWABLE_POSTS, key='score'
+    )
+    context = {
+        'page_obj': page_obj,
+        'query': query,
+        **versions.fragment_context(request, versions.GLOBAL)
+    }
+    return render(request, 'posts/search.html', context)
+
+
+@versions.conditional(_profile_scopes)
+@pages.cached(_author_scopes)
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    posts = author.posts.all()
-    user = request.user
-    if user.is_authenticated:
-        following = Follow.objects.filter(author=author, user=user).exists()
-    else:
-        following = False
+    author = _author(request, username)
+    posts = feed_queryset(author.posts.all())
     page_obj = pagination(request, posts, settings.VIEWABLE_POSTS)
+    fragments = versions.fragment_context(request, versions.author(author.pk))
+    author_stats, *_ = concurrent.gather(
+        lambda: stats.for_user(author),
+        *_rows(page_obj, 'profile_page', fragments)
+    )
     context = {
-        'following': following,
         'author': author,
-        'page_obj': page_obj
+        'stats': author_stats,
+        'page_obj': page_obj,
+        **fragments
     }
     return render(request, 'posts/profile.html', context)
 
 
+@versions.conditional(_post_scopes)
+@pages.cached(_post_scopes)
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
+    post = _post(request, post_id)
     user = post.author
-    comments = Comment.objects.filter(post=post)
-    form = CommentForm(request.POST, request.FILES or None)
+    comments = pagination(
+        request,
+        post.comments.select_related('author').only(
+            'text', 'created', 'post', 'author', 'author__username'
+        ),
+        settings.VIEWABLE_COMMENTS,
+        key='created',
+        param='comments'
+    )
+    fragments = versions.fragment_context(request, versions.post(post.pk))
+    author_stats, *_ = concurrent.gather(
+        lambda: stats.for_user(user),
+        *_rows(comments, 'post_comments', fragments)
+    )
     context = {'post': post,
                'author': user,
+               'stats': author_stats,
                'comments': comments,
-               'form': form}
+               **fragments}
     return render(request, 'posts/post_detail.html', context)
 
 
 @login_required
+@bounded_uploads
 def post_create(request):
     form = PostForm(request.POST, request.FILES or None)
     if request.method == 'POST' and form.is_valid():
         post = form.save(commit=False)
         post.author_id = request.user.pk
-        form.save()
+        with transaction.atomic():
+            form.save()
+        thumbnails.schedule(post)
         return redirect('posts:profile', username=request.user)
     context = {'form': form}
     return render(request, 'posts/create_post.html', context)
 
 
 @login_required
+@bounded_uploads
 def post_edit(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
     form = PostForm(instance=post)
@@ -82,6 +210,8 @@ def post_edit(request, post_id):
     )
     if form.is_valid():
         form.save()
+        if 'image' in form.changed_data:
+            thumbnails.schedule(post)
         return redirect('posts:post_detail', post_id)
     context = {
         'form': form,
@@ -99,17 +229,31 @@ def add_comment(request, post_id):
         comment = form.save(commit=False)
         comment.author = request.user
         comment.post = post
-        comment.save()
+        with transaction.atomic():
+            comment.save()
     return redirect('posts:post_detail', post_id=post_id)
 
 
 @login_required
 def follow_index(request):
-    posts = Post.objects.filter(author__following__user=request.user)
-    page_obj = pagination(request, posts, settings.VIEWABLE_POSTS)
+    user = request.user
+    pulled = pulled_authors(user)
+    posts = feed_queryset(follow_feed(user, pulled))
+    page_obj = pagination(
+        request, posts, settings.VIEWABLE_POSTS, key='feed_date'
+    )
+    scopes = [versions.follower(user.pk)]
+    scopes += [versions.author(author_id) for author_id in pulled]
+    fragments = versions.fragment_context(request, *scopes)
+    suggestions, *_ = concurrent.gather(
+        lambda: recommendations.for_user(user),
+        *_rows(page_obj, 'follow_page', fragments)
+    )
     context = {
         'page_obj': page_obj,
-        'follow': True
+        'follow': True,
+        'suggestions': suggestions,
+        **fragments
     }
     return render(request, 'posts/follow.html', context)
 
@@ -119,15 +263,32 @@ def profile_follow(request, username):
     user = request.user
     author = get_object_or_404(User, username=username)
     if user != author:
-        Follow.objects.get_or_create(
-            user=user,
-            author=author)
+        with transaction.atomic():
+            follows.lock(user)
+            Follow.objects.get_or_create(
+                user=user,
+                author=author)
     return redirect('posts:profile', username=username)
 
 
 @login_required
 def profile_unfollow(request, username):
-    Follow.objects.filter(
-        user=request.user,
-        author=get_object_or_404(User, username=username)).delete()
+    author = get_object_or_404(User, username=username)
+    with transaction.atomic():
+        follows.lock(request.user)
+        Follow.objects.filter(user=request.user, author=author).delete()
     return redirect('posts:profile', username=username)
+
+
+@login_required
+def follow_import(request):
+    form = FollowImportForm(request.POST or None)
+    outcome = None
+    if form.is_valid():
+        if form.cleaned_data['unfollow']:
+            action = follows.unfollow
+        else:
+            action = follows.follow
+        outcome = action(request.user, form.cleaned_data['usernames'])
+    context = {'form': form, 'outcome': outcome}
+    return render(request, 'posts/follow_import.html', context)
@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from users import outbox
+
+
+class Command(BaseCommand):
+    help = 'Отправляет письма из очереди users.outbox.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=None,
+            help='Писем на одно соединение с почтовым сервером.'
+        )
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Не выходить, а проверять очередь каждые --interval секунд.'
+        )
+        parser.add_argument('--interval', type=float, default=5.0)
+
+    def handle(self, *args, **options):
+        while True:
+            delivered, taken = outbox.deliver(options['batch_size'])
+            if taken:
+                self.stdout.write(f'Отправлено {delivered} из {taken}')
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,106 @@
+"""
+Очередь исходящей почты.
+
+View не ходят в SMTP сами: enqueue() кладёт письмо в OutgoingEmail, а
+команда send_outbox разбирает очередь пачками по одному соединению с
+почтовым сервером на пачку. Неудачная отправка повторяется через
+EMAIL_OUTBOX_RETRY_DELAY, 2×, 4×… секунд; после EMAIL_OUTBOX_MAX_ATTEMPTS
+попыток письмо помечается недоставленным.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from .models import OutgoingEmail
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue(subject, body, recipients, from_email=None):
+    return OutgoingEmail.objects.create(
+        subject=subject,
+        body=body,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        recipients='\n'.join(recipients),
+    )
+
+
+def claim(size):
+    """
+    Забирает до size писем, которым пора уходить. Им сразу назначается
+    следующая попытка, поэтому параллельный разборщик их не возьмёт,
+    а упавший разборщик не потеряет.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        batch = list(OutgoingEmail.objects.select_for_update(
+            skip_locked=True
+        ).filter(
+            status=OutgoingEmail.PENDING, next_attempt__lte=now
+        ).order_by('next_attempt', 'pk')[:size])
+        lease = timedelta(seconds=settings.EMAIL_OUTBOX_LEASE)
+        OutgoingEmail.objects.filter(
+            pk__in=[mail.pk for mail in batch]
+        ).update(next_attempt=now + lease)
+    return batch
+
+
+def retry(mail, error):
+    mail.attempts += 1
+    mail.last_error = f'{type(error).__name__}: {error}'
+    if mail.attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+        mail.status = OutgoingEmail.FAILED
+        logger.error('Письмо %s не доставлено: %s', mail.pk, mail.last_error)
+    else:
+        delay = settings.EMAIL_OUTBOX_RETRY_DELAY * 2 ** (mail.attempts - 1)
+        mail.next_attempt = timezone.now() + timedelta(seconds=delay)
+    mail.save(update_fields=(
+        'attempts', 'last_error', 'status', 'next_attempt'
+    ))
+
+
+def send_batch(batch):
+    """Отправляет пачку через одно соединение; возвращает число писем."""
+    delivered = 0
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+    except Exception as error:
+        for mail in batch:
+            retry(mail, error)
+        return delivered
+    try:
+        for mail in batch:
+            message = EmailMessage(
+                mail.subject, mail.body, mail.from_email,
+                mail.recipients.split('\n'), connection=connection
+            )
+            try:
+                message.send()
+            except Exception as error:
+                retry(mail, error)
+                continue
+            mail.status = OutgoingEmail.SENT
+            mail.attempts += 1
+            mail.sent = timezone.now()
+            mail.save(update_fields=('status', 'attempts', 'sent'))
+            delivered += 1
+    finally:
+        connection.close()
+    return delivered
+
+
+def deliver(batch_size=None):
+    """Разбирает всё, чему пора уходить; возвращает (отправлено, взято)."""
+    size = batch_size or settings.EMAIL_OUTBOX_BATCH
+    delivered = taken = 0
+    while True:
+        batch = claim(size)
+        if not batch:
+            return delivered, taken
+        taken += len(batch)
+        delivered += send_batch(batch)
@@ -0,0 +1,109 @@
+from datetime import timedelta
+from io import StringIO
+from smtplib import SMTPException
+
+from django.core import mail
+from django.core.mail.backends import locmem
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from users import outbox
+from users.models import Contact, OutgoingEmail
+
+
+class FlakyBackend(locmem.EmailBackend):
+    """locmem, который считает соединения и не доставляет на broken@."""
+    opened = 0
+
+    def open(self):
+        FlakyBackend.opened += 1
+        return True
+
+    def send_messages(self, messages):
+        for message in messages:
+            if 'broken@example.com' in message.to:
+                raise SMTPException('550 mailbox unavailable')
+        return super().send_messages(messages)
+
+
+class OutboxViewTests(TestCase):
+    def test_password_reset_done_queues_mail(self):
+        """Письмо о сбросе пароля ставится в очередь, а не отправляется"""
+        response = Client().get(reverse('users:password_reset_done'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(mail.outbox, [])
+        queued = OutgoingEmail.objects.get()
+        self.assertEqual(queued.subject, 'Сброс пароля')
+        self.assertEqual(queued.status, OutgoingEmail.PENDING)
+
+    @override_settings(CONTACT_RECIPIENTS=['support@example.com'])
+    def test_contact_queues_mail(self):
+        """Обращение сохраняется и уходит в очередь писем"""
+        Client().post(reverse('users:contact'), {
+            'name': 'Лев', 'email': 'lev@example.com',
+            'subject': 'Вопрос', 'body': 'Как подписаться?',
+        })
+        self.assertTrue(Contact.objects.filter(subject='Вопрос').exists())
+        queued = OutgoingEmail.objects.get()
+        self.assertEqual(queued.recipients, 'support@example.com')
+        self.assertIn('Как подписаться?', queued.body)
+        self.assertEqual(mail.outbox, [])
+
+
+@override_settings(
+    EMAIL_BACKEND='users.tests.test_outbox.FlakyBackend',
+    EMAIL_OUTBOX_MAX_ATTEMPTS=3,
+    EMAIL_OUTBOX_RETRY_DELAY=60,
+)
+class DeliverTests(TestCase):
+    def setUp(self):
+        FlakyBackend.opened = 0
+
+    def test_batches_share_connection(self):
+        """Пачка уходит через одно соединение"""
+        for number in range(5):
+            outbox.enqueue('Тема', 'Текст', [f'user{number}@example.com'])
+        self.assertEqual(outbox.deliver(batch_size=2), (5, 5))
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertEqual(FlakyBackend.opened, 3)
+        self.assertFalse(OutgoingEmail.objects.exclude(
+            status=OutgoingEmail.SENT
+        ).exists())
+
+    def test_retries_with_backoff(self):
+        """Неудача откладывает письмо с удвоением паузы, потом сдаётся"""
+        queued = outbox.enqueue('Тема', 'Текст', ['broken@example.com'])
+        outbox.enqueue('Тема', 'Текст', ['ok@example.com'])
+        delays = []
+        with self.assertLogs('users.outbox', 'ERROR'):
+            for _ in range(3):
+                OutgoingEmail.objects.filter(pk=queued.pk).update(
+                    next_attempt=timezone.now()
+                )
+                before = timezone.now()
+                outbox.deliver()
+                queued.refresh_from_db()
+                delays.append(queued.next_attempt - before)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(queued.attempts, 3)
+        self.assertEqual(queued.status, OutgoingEmail.FAILED)
+        self.assertIn('mailbox unavailable', queued.last_error)
+        self.assertAlmostEqual(delays[0].total_seconds(), 60, delta=5)
+        self.assertAlmostEqual(delays[1].total_seconds(), 120, delta=5)
+
+    def test_future_mail_waits(self):
+        """Письмо с отложенной попыткой не отправляется раньше срока"""
+        queued = outbox.enqueue('Тема', 'Текст', ['ok@example.com'])
+        OutgoingEmail.objects.filter(pk=queued.pk).update(
+            next_attempt=timezone.now() + timedelta(minutes=5)
+        )
+        self.assertEqual(outbox.deliver(), (0, 0))
+
+    def test_command(self):
+        outbox.enqueue('Тема', 'Текст', ['ok@example.com'])
+        output = StringIO()
+        call_command('send_outbox', stdout=output)
+        self.assertIn('Отправлено 1 из 1', output.getvalue())
+        self.assertEqual(mail.outbox[0].to, ['ok@example.com'])
@@ -1,9 +1,10 @@
-from django.core.mail import send_mail
+from django.conf import settings
 from django.shortcuts import render
 from django.urls import reverse_lazy
 from django.views.generic import CreateView
 from django.views.generic.edit import CreateView
 
+from . import outbox
 from .forms import ContactForm, CreationForm
 from .models import Contact
 
@@ -22,6 +23,16 @@ class ContactView(CreateView):
     context = {'form': form}
     success_url = reverse_lazy('posts:index')
 
+    def form_valid(self, form):
+        response = super().form_valid(form)
+        contact = self.object
+        outbox.enqueue(
+            f'Обращение: {contact.subject}',
+            f'{contact.name} <{contact.email}>\n\n{contact.body}',
+            settings.CONTACT_RECIPIENTS,
+        )
+        return response
+
 
 class LoginView(CreateView):
     template_name = 'users/login.html'
@@ -49,11 +60,10 @@ def password_reset(request):
 
 def password_reset_done(request):
     template = 'users/password_reset_done.html'
-    send_mail('Сброс пароля',
-              'Чтобы сбросить пароль, перейдите по ссылке: ',
-              'from@example.com',
-              ['to@example.com'],
-              fail_silently=False,)
+    outbox.enqueue('Сброс пароля',
+                   'Чтобы сбросить пароль, перейдите по ссылке: ',
+                   ['to@example.com'],
+                   'from@example.com')
     return render(request, template)
 
 
@@ -0,0 +1,11 @@
+import os
+
+from django.core.wsgi import get_wsgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+
+wsgi_application = get_wsgi_application()
+
+from core.asgi import AsgiHandler  # noqa: E402
+
+application = AsgiHandler(wsgi_application)
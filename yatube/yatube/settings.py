@@ -1,4 +1,5 @@
 import os
+import sys
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
@@ -19,6 +20,7 @@ INSTALLED_APPS = [
     'core.apps.CoreConfig',
     'users.apps.UsersConfig',
     'posts.apps.PostsConfig',
+    'api.apps.ApiConfig',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -29,6 +31,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.PerformanceMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -38,17 +41,84 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
-CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+# Cache
+# Бэкенд общий для всех именованных кэшей и выбирается переменной
+# окружения CACHE_BACKEND: locmem (по умолчанию), file, db или memcached.
+# locmem свой у каждого процесса: при нескольких воркерах нужен общий.
+# CACHE_LOCATION_<ALIAS> задаёт место отдельного кэша, например свой
+# сервер memcached для versions.
+# Каждый кэш обёрнут core.cache.InstrumentedCache ради счёта попаданий.
+# Для db нужно выполнить `manage.py createcachetable`.
+
+CACHE_BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+    'db': 'django.core.cache.backends.db.DatabaseCache',
+    'memcached': 'django.core.cache.backends.memcached.MemcachedCache',
+}
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'locmem')
+CACHE_LOCATION = os.environ.get('CACHE_LOCATION', '')
+
+# Предел числа записей по кэшам; у memcached вытеснение своё (LRU).
+# None — без предела: версии лент вытеснять нельзя, пропавшая версия
+# сбрасывает все страницы ленты. Их по ключу на читателя, автора,
+# группу и пост, по несколько десятков байт на ключ. На memcached для
+# них нужен отдельный сервер, запущенный с -M (без вытеснения).
+CACHE_MAX_ENTRIES = {
+    'default': 1000,
+    'versions': None,
+    'fragments': 10000,
+    'sessions': 50000,
+    'thumbnails': 20000,
+    'pages': 5000,
+}
+
+
+def cache_config(alias, max_entries):
+    config = {
+        'BACKEND': 'core.cache.InstrumentedCache',
+        'WRAPPED_BACKEND': CACHE_BACKENDS[CACHE_BACKEND],
+        'KEY_PREFIX': alias,
     }
+    location = os.environ.get(f'CACHE_LOCATION_{alias.upper()}')
+    if CACHE_BACKEND == 'memcached':
+        location = location or CACHE_LOCATION
+        config['LOCATION'] = (
+            location.split(',') if location else '127.0.0.1:11211'
+        )
+        return config
+    config['LOCATION'] = location or {
+        'locmem': alias,
+        'file': os.path.join(
+            CACHE_LOCATION or os.path.join(BASE_DIR, 'cache'), alias
+        ),
+        'db': f'cache_{alias}',
+    }[CACHE_BACKEND]
+    config['OPTIONS'] = {
+        'MAX_ENTRIES': max_entries or sys.maxsize, 'CULL_FREQUENCY': 4
+    }
+    return config
+
+
+CACHES = {
+    alias: cache_config(alias, max_entries)
+    for alias, max_entries in CACHE_MAX_ENTRIES.items()
 }
 
+FRAGMENT_CACHE_ALIAS = 'fragments'
+# Счётчики версий лент, см. posts.versions.
+VERSION_CACHE_ALIAS = 'versions'
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+SESSION_CACHE_ALIAS = 'sessions'
+THUMBNAIL_CACHE = 'thumbnails'
+# Общие тела страниц лент и готовые страницы для анонимов.
+PAGE_CACHE_ALIAS = 'pages'
+
 ROOT_URLCONF = 'yatube.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'core.template_backend.InstrumentedTemplates',
         'DIRS': [os.path.join(BASE_DIR, 'templates')],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -67,6 +137,13 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'yatube.wsgi.application'
+# Для ASGI-сервера (uvicorn yatube.asgi:application): запросы Django
+# выполняются в пуле из ASGI_THREADS потоков, см. core.asgi.
+ASGI_APPLICATION = 'yatube.asgi.application'
+ASGI_THREADS = 32
+# Потоки для независимых запросов к БД внутри одного view, см.
+# core.concurrent; 0 — выполнять их по очереди.
+DB_LOOKUP_THREADS = 8
 
 
 # Database
@@ -124,12 +201,112 @@ STATICFILES_DIRS = (
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+POST_THUMBNAIL_GEOMETRY = '960x339'
+POST_IMAGE_WIDTHS = (480, 960, 1440)
+POST_IMAGE_FORMATS = ('AVIF', 'WEBP', 'JPEG')
+POST_IMAGE_QUALITY = 80
+POST_IMAGE_MAX_BYTES = 10 * 1024 * 1024
+POST_IMAGE_MAX_DIMENSIONS = (6000, 6000)
+UPLOAD_REENCODE_WORKERS = 2
+THUMBNAIL_ASYNC = True
+THUMBNAIL_WORKERS = 2
+
 VIEWABLE_POSTS = 10
+VIEWABLE_COMMENTS = 20
+# Наибольший ?limit= страницы JSON API.
+API_MAX_LIMIT = 100
 
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
 
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
+DEFAULT_FROM_EMAIL = 'from@example.com'
+CONTACT_RECIPIENTS = ['to@example.com']
+
+# Очередь users.outbox: писем за соединение, попыток, задержка первого
+# повтора и время, на которое разборщик забирает пачку, в секундах.
+EMAIL_OUTBOX_BATCH = 50
+EMAIL_OUTBOX_MAX_ATTEMPTS = 5
+EMAIL_OUTBOX_RETRY_DELAY = 60
+EMAIL_OUTBOX_LEASE = 10 * 60
 
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
+
+# Границы корзин гистограмм /metrics/, в секундах.
+METRICS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+
+# Запросы дольше порога (мс) пишутся в журнал, None — выключено.
+SLOW_QUERY_THRESHOLD_MS = 100
+# Доля медленных SELECT, для которых снимается план выполнения.
+SLOW_QUERY_EXPLAIN_RATE = 0.1
+SLOW_QUERY_LOG = os.path.join(BASE_DIR, 'slow_queries.log')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'json': {'()': 'core.slow_queries.JsonFormatter'},
+    },
+    'handlers': {
+        'slow_queries': {
+            'class': 'logging.handlers.RotatingFileHandler',
+            'filename': SLOW_QUERY_LOG,
+            'maxBytes': 10 * 1024 * 1024,
+            'backupCount': 5,
+            'encoding': 'utf-8',
+            'delay': True,
+            'formatter': 'json',
+        },
+    },
+    'loggers': {
+        'yatube.slow_queries': {
+            'handlers': ['slow_queries'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}
+
+PAGINATION_COUNT_TIMEOUT = 60
+
+FEED_FANOUT_MAX_FOLLOWERS = 10000
+FEED_BACKFILL_POSTS = 1000
+# posts.graph: время жизни подписок читателя и множества популярных
+# авторов в кэше и блокировки на правку записи, в секундах.
+FOLLOW_GRAPH_TIMEOUT = 60 * 60 * 24
+FOLLOW_GRAPH_POPULAR_TIMEOUT = 60 * 60
+FOLLOW_GRAPH_LOCK = 5
+# posts.trending: период полураспада популярности и ожидаемый интервал
+# запуска decay_trending в секундах, веса публикации и комментария,
+# порог, ниже которого популярность обнуляется, и блок групп.
+TRENDING_HALF_LIFE = 6 * 60 * 60
+TRENDING_DECAY_INTERVAL = 10 * 60
+TRENDING_POST_WEIGHT = 1.0
+TRENDING_COMMENT_WEIGHT = 1.0
+TRENDING_FLOOR = 0.01
+TRENDING_GROUPS = 10
+TRENDING_GROUPS_TIMEOUT = 60
+
+# Рекомендации авторов: сколько хранить на читателя, сколько показывать
+# и вес совпадения групп против общих подписок.
+RECOMMENDATIONS_TOP = 20
+RECOMMENDATIONS_SHOWN = 5
+RECOMMENDATIONS_GROUP_WEIGHT = 1.0
+# Сколько имён принимает за раз страница импорта подписок.
+FOLLOW_IMPORT_MAX = 10000
+
+# Версии лент в locmem сдвигаются только в процессе, где была запись,
+# поэтому с ним и версии, и фрагменты живут недолго, как до версий:
+# остальные воркеры увидят изменение не позже чем через этот срок.
+if CACHE_BACKEND == 'locmem':
+    FEED_CACHE_TIMEOUT = 20
+    FEED_VERSION_TIMEOUT = FEED_CACHE_TIMEOUT
+else:
+    FEED_CACHE_TIMEOUT = 60 * 60 * 6
+    FEED_VERSION_TIMEOUT = None
+# Сколько секунд прокси может отдавать анонимам страницу лент без сверки.
+FEED_PROXY_MAX_AGE = 60
+
+# posts.search.DatabaseBackend — для СУБД без FTS5.
+SEARCH_BACKEND = 'posts.search.SqliteBackend'